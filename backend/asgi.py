@@ -2,6 +2,8 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests are routed through ``backend.urls_asgi``, where the read-heavy
+endpoints answer GET with native async views.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -10,7 +12,14 @@ https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.core.handlers.asgi import ASGIRequest
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
+
+class AsyncReadsRequest(ASGIRequest):
+    urlconf = 'backend.urls_asgi'
+
+
 application = get_asgi_application()
+application.request_class = AsyncReadsRequest
@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'lms_core.compression.CompressionMiddleware',
+    'lms_core.replicas.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,13 +82,72 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Production SQLite profile, applied on every new connection:
+# - WAL lets readers run while a writer commits, and synchronous=NORMAL then
+#   fsyncs at checkpoints, not on every commit. A power cut can lose the last
+#   few commits, but it cannot corrupt the file.
+# - timeout is SQLite's busy_timeout in seconds: a writer waits for the lock
+#   rather than failing with "database is locked" at once.
+# - mmap_size (128 MiB), cache_size (-32000 = 32 MiB) and temp_store keep hot
+#   pages and sort/temp tables in memory.
+# - transaction_mode IMMEDIATE takes the write lock when atomic() starts. A
+#   deferred transaction that reads and then writes can otherwise fail on the
+#   lock upgrade without the busy timeout ever applying.
+# benchmarks/sqlite_profiles.py compares this with SQLite's defaults.
+SQLITE_PRODUCTION_OPTIONS = {
+    'timeout': 20,
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=134217728;'
+        'PRAGMA cache_size=-32000;'
+        'PRAGMA temp_store=MEMORY;'
+    ),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_PRODUCTION_OPTIONS,
+    },
+    # Local stand-in for a read replica: a copy of db.sqlite3 refreshed by
+    # whatever replicates it (the tests copy it with SQLite's backup API).
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'OPTIONS': SQLITE_PRODUCTION_OPTIONS,
+    },
+}
+
+# Catalog and dashboard reads go to these aliases (see lms_core/replicas.py);
+# empty keeps everything on 'default'. After a write, the writer, and every
+# catalog reader, stays on the primary for LMS_REPLICA_LAG seconds, so set it
+# above the worst replication delay.
+DATABASE_ROUTERS = ['lms_core.replicas.PrimaryReplicaRouter']
+LMS_DATABASE_REPLICAS = ()
+LMS_REPLICA_LAG = 2
+LMS_REPLICA_CACHE = 'default'
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Local memory is per process; with several workers on one host switch to
+# 'django.core.cache.backends.filebased.FileBasedCache' with a shared LOCATION
+# so catalog invalidations reach every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lms-default',
     }
 }
 
+# Catalog (courses/categories) response cache, see lms_core/caching.py
+LMS_CATALOG_CACHE = 'default'
+LMS_CATALOG_CACHE_TIMEOUT = 300
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -127,17 +188,54 @@ STATIC_URL = 'static/'
 # Custom User Model
 AUTH_USER_MODEL = 'users.User'
 
+AUTHENTICATION_BACKENDS = ['users.backends.UsernameOrEmailBackend']
+
 # CORS Settings
 CORS_ALLOW_ALL_ORIGINS = True # For development only
 
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'lms_core.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+    # orjson when installed, stdlib json otherwise (see lms_core.renderers)
+    'DEFAULT_RENDERER_CLASSES': (
+        'lms_core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'lms_core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
+# Response codings in server preference order; br and zstd need the brotli and
+# zstandard packages. Smaller bodies are sent as they are.
+LMS_COMPRESSION_ENCODINGS = ('br', 'zstd', 'gzip')
+LMS_COMPRESSION_MIN_SIZE = 1024
+
+# List endpoints only paginate when the client sends ?cursor= or ?page_size=.
+# Turn off once every frontend caller follows next/previous cursors.
+LMS_LEGACY_UNPAGINATED_LISTS = True
+
+# Course and enrollment lists are built from values_list() rows instead of
+# serializer instances (see lms_core.rows); the output is the same.
+LMS_FAST_LIST_READS = True
+
 from datetime import timedelta
+# Seconds an account's (is_active, role) is trusted from the cache before
+# StatelessJWTAuthentication re-reads it; user saves refresh it immediately.
+LMS_AUTH_CACHE = 'default'
+LMS_AUTH_STATE_TTL = 60
+
+# Responses replayed for a repeated Idempotency-Key (see lms_core.idempotency).
+# Like the catalog cache, this needs a shared backend across workers.
+LMS_IDEMPOTENCY_CACHE = 'default'
+LMS_IDEMPOTENCY_TTL = 24 * 60 * 60
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),  # Extended for development convenience
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -147,6 +245,33 @@ SIMPLE_JWT = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are stored once per content, under their SHA-256
+# (lms_core/storage.py), and served as immutable by lms_core/media.py.
+STORAGES = {
+    'default': {'BACKEND': 'lms_core.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# Let the front server send media bytes: None (Django streams them),
+# 'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx, with an
+# internal location at LMS_MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT).
+LMS_MEDIA_OFFLOAD = None
+LMS_MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# manage.py gc_media only removes unreferenced blobs older than this (seconds),
+# which covers uploads whose row has not been committed yet.
+LMS_MEDIA_GC_GRACE = 24 * 60 * 60
+
+# Validators and hashes of the assets manage.py sync_media downloaded. Keep it
+# outside MEDIA_ROOT, which is served.
+LMS_SYNC_MEDIA_CACHE = BASE_DIR / '.sync-media-cache.json'
+
+# Responsive derivatives of thumbnails/avatars, see lms_core/images.py.
+# 'avif' is honoured when Pillow is built with libavif.
+LMS_IMAGE_VARIANT_WIDTHS = (320, 640, 960)
+LMS_IMAGE_VARIANT_FORMATS = ('webp',)
+LMS_IMAGE_VARIANTS_ASYNC = True
+
 # Email Backend for Development (Saves to project folder)
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
@@ -0,0 +1,10 @@
+"""URLconf for backend/asgi.py: ``backend.urls`` with the read-heavy views
+answering GET natively async (see lms_core/async_views.py)."""
+from lms_core import async_views as lms_async_views
+from users import async_views as users_async_views
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = lms_async_views.with_async_reads(
+    sync_urlpatterns, {**lms_async_views.READS, **users_async_views.READS},
+)
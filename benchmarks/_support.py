@@ -0,0 +1,43 @@
+"""Shared plumbing for the benchmark scripts: a throwaway SQLite database and
+small statistics helpers. Import this before anything that touches models."""
+import math
+import os
+import subprocess
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+
+def use_scratch_database(directory, name='bench.sqlite3', debug=False, options=None):
+    """Point the default database at ``directory/name``, set Django up and migrate.
+
+    ``options`` replaces the database OPTIONS (the SQLite profile)."""
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = os.path.join(directory, name)
+    if options is not None:
+        settings.DATABASES['default']['OPTIONS'] = options
+    settings.DEBUG = debug
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values`` (0 < pct <= 100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
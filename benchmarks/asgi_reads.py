@@ -0,0 +1,74 @@
+"""Requests/sec and tail latency of the read endpoints, WSGI vs ASGI.
+
+Seeds a scratch database with ``generate_dataset`` and then serves it three
+times from this process, one worker each: a threaded wsgiref server with
+--concurrency threads (``wsgi``), uvicorn running Django's plain ASGI handler
+so every view goes through ``sync_to_async`` (``asgi-sync``), and uvicorn
+running ``backend.asgi.application``, where the async read views answer GET
+(``asgi``). The same client load (--concurrency in-flight requests) goes to
+each. Pass --no-cache to measure the database path, not the catalog
+response cache.
+
+    python -m benchmarks.asgi_reads --concurrency 32 --requests 2000
+"""
+import argparse
+import sys
+import tempfile
+
+from benchmarks._support import use_scratch_database
+
+SERVERS = ('wsgi', 'asgi-sync', 'asgi')
+READ_SCENARIOS = ('categories-list', 'courses-list', 'courses-page', 'courses-detail', 'dashboard-stats', 'profile')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=1000, help='Timed requests per endpoint and server.')
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--enrollments', type=int, default=10000)
+    parser.add_argument('--only', nargs='*', help='Scenario names to run (default: all reads).')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the catalog response cache.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_scratch_database(tmp)
+        from django.conf import settings
+        from django.core.asgi import get_asgi_application
+        from django.core.management import call_command
+        from benchmarks.endpoints import SCENARIOS, Fixture, HTTPTransport, run_scenario
+
+        if args.no_cache:
+            settings.LMS_CATALOG_CACHE_TIMEOUT = 0
+        call_command('generate_dataset', users=args.users, courses=args.courses,
+                     enrollments=args.enrollments, verbosity=0, stdout=sys.stderr)
+        fixture = Fixture()
+        names = args.only or READ_SCENARIOS
+        scenarios = [s for s in SCENARIOS if s.name in names]
+
+        results = {}
+        for kind in SERVERS:
+            application = get_asgi_application() if kind == 'asgi-sync' else None
+            transport = HTTPTransport(kind, args.concurrency, application)
+            try:
+                for scenario in scenarios:
+                    results[scenario.name, kind] = run_scenario(
+                        scenario, transport, fixture, args.requests, args.concurrency,
+                    )
+            finally:
+                transport.close()
+
+    print(f'{args.concurrency} concurrent clients, {args.requests} requests per endpoint'
+          f'{", catalog cache off" if args.no_cache else ""}\n')
+    print(f'{"endpoint":<18} {"server":<9} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    for scenario in scenarios:
+        for kind in SERVERS:
+            row = results[scenario.name, kind]
+            latency = row['latency_ms']
+            print(f'{scenario.name:<18} {kind:<9} {row["throughput_rps"]!s:>8} {latency["p50"]!s:>8} '
+                  f'{latency["p95"]!s:>8} {latency["p99"]!s:>8} {row["errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,474 @@
+"""Endpoint latency benchmark for every route in lms_core/urls.py and users/urls.py.
+
+Runs each scenario against a throwaway SQLite database seeded by
+``generate_dataset``. Requests go either in-process through Django's test
+client or over HTTP to a real server started in this process: wsgiref for
+WSGI, or uvicorn for ASGI when it is installed. For every endpoint it records
+latency percentiles, queries per request and bytes per response, and writes
+a JSON report that ``compare`` can diff against another commit's report.
+
+    python -m benchmarks.endpoints run --transport inprocess --concurrency 8 -o head.json
+    python -m benchmarks.endpoints run --transport wsgi --requests 500 -o head.json
+    python -m benchmarks.endpoints compare base.json head.json --threshold 0.2
+"""
+import argparse
+import itertools
+import json
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from benchmarks._support import git_revision, percentile, use_scratch_database
+
+QUERY_COUNT_HEADER = 'X-Bench-Queries'
+BENCH_PASSWORD = 'bench-password-1'
+
+
+class QueryCountMiddleware:
+    """Report the number of SQL queries a request ran in a response header.
+
+    Added to MIDDLEWARE by the harness only, so every transport (test client,
+    WSGI, ASGI) can read the count the same way."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from django.db import connection
+
+        counter = itertools.count()
+
+        def count_query(execute, sql, params, many, context):
+            next(counter)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            response = self.get_response(request)
+        response[QUERY_COUNT_HEADER] = str(next(counter))
+        return response
+
+
+class Fixture:
+    """Known accounts and rows the scenarios act on, plus factories for the
+    throwaway objects that write scenarios consume (created untimed)."""
+
+    def __init__(self):
+        from django.contrib.auth.hashers import make_password
+        from django.contrib.auth import get_user_model
+        from lms_core.models import Category, Course, Enrollment
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        User = get_user_model()
+        self.password_hash = make_password(BENCH_PASSWORD)
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+
+        self.users = {}
+        for role in ('admin', 'instructor', 'student'):
+            self.users[role], _ = User.objects.update_or_create(
+                username=f'bench_{role}',
+                defaults={'email': f'bench_{role}@example.com', 'role': role, 'password': self.password_hash},
+            )
+        self.category, _ = Category.objects.get_or_create(name='Benchmarks')
+        self.course, _ = Course.objects.get_or_create(
+            title='Benchmark course',
+            defaults={'description': 'Used by the endpoint benchmark.', 'instructor': self.users['instructor'],
+                      'category': self.category},
+        )
+        self.enrollment, _ = Enrollment.objects.get_or_create(student=self.users['student'], course=self.course)
+        self.refresh = {role: RefreshToken.for_user(user) for role, user in self.users.items()}
+        self.access = {role: str(token.access_token) for role, token in self.refresh.items()}
+
+    def unique(self, prefix):
+        with self.lock:
+            return f'{prefix}_{next(self.sequence)}_{time.monotonic_ns()}'
+
+    def new_course(self):
+        from lms_core.models import Course
+
+        return Course.objects.create(
+            title=self.unique('Bench course'), description='-', instructor=self.users['instructor'],
+            category=self.category,
+        )
+
+    def new_user(self):
+        from django.contrib.auth import get_user_model
+
+        name = self.unique('bench_tmp')
+        return get_user_model().objects.create(username=name, email=f'{name}@example.com', password=self.password_hash)
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    role: Optional[str] = None
+    # prepare(fixture) -> (path format values, json body); runs untimed before each request
+    prepare: Optional[Callable] = None
+    body: Optional[dict] = None
+    expect: tuple = (200,)
+
+    def build(self, fixture):
+        values, body = {}, self.body
+        if self.prepare is not None:
+            values, prepared = self.prepare(fixture)
+            body = prepared if prepared is not None else body
+        values.setdefault('course', fixture.course.pk)
+        values.setdefault('category', fixture.category.pk)
+        values.setdefault('enrollment', fixture.enrollment.pk)
+        headers = {}
+        if self.role:
+            headers['Authorization'] = f'Bearer {fixture.access[self.role]}'
+        return self.path.format(**values), body, headers
+
+
+def _password_reset_confirm(fixture):
+    from django.contrib.auth.tokens import PasswordResetTokenGenerator
+    from django.utils.encoding import smart_bytes
+    from django.utils.http import urlsafe_base64_encode
+
+    user = fixture.new_user()
+    return {}, {
+        'password': 'N3w-password!',
+        'token': PasswordResetTokenGenerator().make_token(user),
+        'uidb64': urlsafe_base64_encode(smart_bytes(user.id)),
+    }
+
+
+SCENARIOS = [
+    # lms_core/urls.py
+    Scenario('categories-list', 'GET', '/api/lms/categories/'),
+    Scenario('categories-detail', 'GET', '/api/lms/categories/{category}/'),
+    Scenario('categories-create', 'POST', '/api/lms/categories/', role='instructor',
+             prepare=lambda f: ({}, {'name': f.unique('Category')}), expect=(201,)),
+    Scenario('courses-list', 'GET', '/api/lms/courses/'),
+    Scenario('courses-page', 'GET', '/api/lms/courses/?page_size=20'),
+    Scenario('courses-search', 'GET', '/api/lms/courses/?search=python'),
+    Scenario('courses-detail', 'GET', '/api/lms/courses/{course}/'),
+    Scenario('courses-create', 'POST', '/api/lms/courses/', role='instructor',
+             prepare=lambda f: ({}, {'title': f.unique('Course'), 'description': '-', 'price': '10.00'}),
+             expect=(201,)),
+    Scenario('courses-update', 'PATCH', '/api/lms/courses/{course}/', role='instructor',
+             prepare=lambda f: ({}, {'duration': f.unique('Hours')[:50]})),
+    Scenario('courses-delete', 'DELETE', '/api/lms/courses/{course}/', role='instructor',
+             prepare=lambda f: ({'course': f.new_course().pk}, None), expect=(204,)),
+    Scenario('enrollments-list-student', 'GET', '/api/lms/enrollments/', role='student'),
+    Scenario('enrollments-list-instructor', 'GET', '/api/lms/enrollments/', role='instructor'),
+    Scenario('enrollments-detail', 'GET', '/api/lms/enrollments/{enrollment}/', role='student'),
+    Scenario('enrollments-create', 'POST', '/api/lms/enrollments/', role='student',
+             prepare=lambda f: ({}, {'course': f.new_course().pk}), expect=(201,)),
+    Scenario('dashboard-stats', 'GET', '/api/lms/dashboard/stats/', role='admin'),
+    # users/urls.py
+    Scenario('register', 'POST', '/api/auth/register/',
+             prepare=lambda f: ({}, {'username': f.unique('bench_new'), 'password': BENCH_PASSWORD}),
+             expect=(201,)),
+    Scenario('login', 'POST', '/api/auth/login/', body={'username': 'bench_student', 'password': BENCH_PASSWORD}),
+    Scenario('token-refresh', 'POST', '/api/auth/token/refresh/',
+             prepare=lambda f: ({}, {'refresh': str(f.refresh['student'])})),
+    Scenario('profile', 'GET', '/api/auth/profile/', role='student'),
+    Scenario('profile-update', 'PUT', '/api/auth/profile/', role='student', body={'first_name': 'Bench'}),
+    Scenario('password-reset', 'POST', '/api/auth/password-reset/', body={'email': 'bench_student@example.com'}),
+    Scenario('password-reset-confirm', 'PATCH', '/api/auth/password-reset-confirm/', prepare=_password_reset_confirm),
+    Scenario('users-list', 'GET', '/api/auth/users/', role='admin'),
+    Scenario('users-delete', 'DELETE', '/api/auth/users/{user}/', role='admin',
+             prepare=lambda f: ({'user': f.new_user().pk}, None), expect=(204,)),
+]
+
+
+class InProcessTransport:
+    """Django's test client, one per worker thread."""
+
+    name = 'inprocess'
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def request(self, method, path, body, headers):
+        from django.test import Client
+
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client()
+        kwargs = {'headers': headers}
+        if body is not None:
+            kwargs.update(data=json.dumps(body), content_type='application/json')
+        response = client.generic(method, path, **kwargs)
+        return response.status_code, len(response.content), response.get(QUERY_COUNT_HEADER)
+
+    def close(self):
+        pass
+
+
+class HTTPTransport:
+    """A real server on a local port, driven by one requests.Session per thread."""
+
+    def __init__(self, kind, threads, application=None):
+        import requests  # noqa: F401 (fail early if missing)
+
+        self.name = kind
+        self.local = threading.local()
+        self.server = self.start_wsgi(threads) if kind == 'wsgi' else self.start_asgi(application)
+
+    def start_wsgi(self, threads):
+        from socketserver import ThreadingMixIn
+        from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+        from django.core.wsgi import get_wsgi_application
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+            daemon_threads = True
+            request_queue_size = max(threads * 2, 16)
+
+        server = make_server('127.0.0.1', 0, get_wsgi_application(), ThreadingWSGIServer, QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{server.server_port}'
+        return server
+
+    def start_asgi(self, application=None):
+        try:
+            import uvicorn
+        except ImportError:
+            raise SystemExit('The asgi transport needs uvicorn: pip install uvicorn')
+        import socket
+
+        if application is None:
+            from backend.asgi import application
+
+        sock = socket.socket()
+        # Inherited by accepted connections; without it Nagle holds back the
+        # body behind the headers for a delayed ACK (~40 ms per response).
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.bind(('127.0.0.1', 0))
+        config = uvicorn.Config(application, log_level='warning', lifespan='off')
+        server = uvicorn.Server(config)
+        server.install_signal_handlers = lambda: None
+        threading.Thread(target=server.run, kwargs={'sockets': [sock]}, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+        self.base_url = f'http://127.0.0.1:{sock.getsockname()[1]}'
+        return server
+
+    def request(self, method, path, body, headers):
+        import requests
+
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        response = session.request(method, self.base_url + path, json=body, headers=headers)
+        return response.status_code, len(response.content), response.headers.get(QUERY_COUNT_HEADER)
+
+    def close(self):
+        if self.name == 'wsgi':
+            self.server.shutdown()
+            self.server.server_close()
+        else:
+            self.server.should_exit = True
+
+
+def run_scenario(scenario, transport, fixture, requests, concurrency, warmup=2):
+    """Issue ``requests`` timed calls of one scenario and summarise them."""
+    from django.db import close_old_connections
+
+    def one_call(_):
+        try:
+            path, body, headers = scenario.build(fixture)
+            start = time.perf_counter()
+            status, size, queries = transport.request(scenario.method, path, body, headers)
+            elapsed = (time.perf_counter() - start) * 1000
+        except Exception as exc:
+            return {'error': repr(exc)}
+        finally:
+            if concurrency > 1:
+                close_old_connections()
+        return {'ms': elapsed, 'status': status, 'bytes': size,
+                'queries': int(queries) if queries is not None else None}
+
+    for _ in range(warmup):
+        one_call(None)
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(one_call, range(requests)))
+    else:
+        samples = [one_call(i) for i in range(requests)]
+    wall = time.perf_counter() - started
+
+    ok = [s for s in samples if s.get('status') in scenario.expect]
+    latencies = [s['ms'] for s in ok]
+    queries = [s['queries'] for s in ok if s['queries'] is not None]
+    statuses = {}
+    for sample in samples:
+        key = str(sample.get('status', 'exception'))
+        statuses[key] = statuses.get(key, 0) + 1
+
+    def rounded(value):
+        return round(value, 3) if value is not None else None
+
+    return {
+        'method': scenario.method,
+        'path': scenario.path,
+        'requests': len(samples),
+        'errors': len(samples) - len(ok),
+        'statuses': statuses,
+        'throughput_rps': rounded(len(samples) / wall if wall else None),
+        'latency_ms': {
+            'p50': rounded(percentile(latencies, 50)),
+            'p95': rounded(percentile(latencies, 95)),
+            'p99': rounded(percentile(latencies, 99)),
+            'mean': rounded(sum(latencies) / len(latencies)) if latencies else None,
+            'max': rounded(max(latencies)) if latencies else None,
+        },
+        'queries': {
+            'mean': rounded(sum(queries) / len(queries)) if queries else None,
+            'max': max(queries) if queries else None,
+        },
+        'bytes_mean': rounded(sum(s['bytes'] for s in ok) / len(ok)) if ok else None,
+    }
+
+
+def run_benchmark(transport, scenarios, requests, concurrency, log=None):
+    fixture = Fixture()
+    results = {}
+    for scenario in scenarios:
+        results[scenario.name] = run_scenario(scenario, transport, fixture, requests, concurrency)
+        if log:
+            row = results[scenario.name]
+            log(f"{scenario.name:<30} p50 {row['latency_ms']['p50']!s:>8} ms  p95 {row['latency_ms']['p95']!s:>8} ms"
+                f"  q {row['queries']['mean']!s:>5}  {row['bytes_mean']!s:>10} B  errors {row['errors']}")
+    return results
+
+
+def install_query_counter():
+    from django.conf import settings
+
+    path = f'{__name__}.QueryCountMiddleware'
+    if path not in settings.MIDDLEWARE:
+        settings.MIDDLEWARE = [path, *settings.MIDDLEWARE]
+
+
+def command_run(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        use_scratch_database(tmp)
+        install_query_counter()
+        from django.conf import settings
+        from django.core.management import call_command
+
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        if args.no_cache:
+            settings.LMS_CATALOG_CACHE_TIMEOUT = 0
+        call_command('generate_dataset', users=args.users, courses=args.courses,
+                     enrollments=args.enrollments, verbosity=0, stdout=sys.stderr)
+
+        selected = [s for s in SCENARIOS if not args.only or s.name in args.only]
+        if args.transport == 'inprocess':
+            transport = InProcessTransport()
+        else:
+            transport = HTTPTransport(args.transport, args.concurrency)
+        try:
+            results = run_benchmark(transport, selected, args.requests, args.concurrency, log=print)
+        finally:
+            transport.close()
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'transport': args.transport,
+            'concurrency': args.concurrency,
+            'requests_per_endpoint': args.requests,
+            'catalog_cache': not args.no_cache,
+            'dataset': {'users': args.users, 'courses': args.courses, 'enrollments': args.enrollments},
+            'python': sys.version.split()[0],
+        },
+        'endpoints': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(report, handle, indent=2, sort_keys=True)
+    print(f'\nWrote {args.output}')
+    errors = sum(row['errors'] for row in results.values())
+    return 1 if errors and args.fail_on_errors else 0
+
+
+def compare_reports(base, head, threshold=0.2, min_ms=1.0):
+    """Return ``(rows, regressions)`` for endpoints present in both reports.
+
+    Latency regresses when p95 grows by more than ``threshold`` (relative) and
+    ``min_ms`` (absolute); queries regress on any increase; response size on
+    growth beyond ``threshold``."""
+    rows, regressions = [], []
+    for name, new in head['endpoints'].items():
+        old = base['endpoints'].get(name)
+        if old is None:
+            continue
+        checks = []
+        old_p95, new_p95 = old['latency_ms']['p95'], new['latency_ms']['p95']
+        if old_p95 is not None and new_p95 is not None:
+            if new_p95 - old_p95 > min_ms and new_p95 > old_p95 * (1 + threshold):
+                checks.append(f'p95 {old_p95:.2f} -> {new_p95:.2f} ms')
+        old_q, new_q = old['queries']['max'], new['queries']['max']
+        if old_q is not None and new_q is not None and new_q > old_q:
+            checks.append(f'queries {old_q} -> {new_q}')
+        old_b, new_b = old['bytes_mean'], new['bytes_mean']
+        if old_b and new_b and new_b > old_b * (1 + threshold):
+            checks.append(f'bytes {old_b:.0f} -> {new_b:.0f}')
+        if new['errors'] > old['errors']:
+            checks.append(f"errors {old['errors']} -> {new['errors']}")
+        rows.append((name, old_p95, new_p95, old_q, new_q, checks))
+        if checks:
+            regressions.append((name, checks))
+    return rows, regressions
+
+
+def command_compare(args):
+    with open(args.base, encoding='utf-8') as handle:
+        base = json.load(handle)
+    with open(args.head, encoding='utf-8') as handle:
+        head = json.load(handle)
+    rows, regressions = compare_reports(base, head, args.threshold, args.min_ms)
+    print(f"{'endpoint':<30} {'p95 base':>10} {'p95 head':>10} {'q base':>7} {'q head':>7}")
+    for name, old_p95, new_p95, old_q, new_q, checks in rows:
+        flag = '  REGRESSION: ' + '; '.join(checks) if checks else ''
+        print(f'{name:<30} {old_p95!s:>10} {new_p95!s:>10} {old_q!s:>7} {new_q!s:>7}{flag}')
+    print(f'\n{len(regressions)} regression(s)')
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Benchmark the endpoints and write a JSON report.')
+    run.add_argument('--transport', choices=('inprocess', 'wsgi', 'asgi'), default='inprocess')
+    run.add_argument('--concurrency', type=int, default=4)
+    run.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint.')
+    run.add_argument('--users', type=int, default=2000)
+    run.add_argument('--courses', type=int, default=200)
+    run.add_argument('--enrollments', type=int, default=10000)
+    run.add_argument('--only', nargs='*', help='Scenario names to run (default: all).')
+    run.add_argument('--no-cache', action='store_true', help='Disable the catalog response cache.')
+    run.add_argument('--fail-on-errors', action='store_true')
+    run.add_argument('-o', '--output', default='bench-report.json')
+
+    compare = commands.add_parser('compare', help='Diff two reports and exit 1 on regressions.')
+    compare.add_argument('base')
+    compare.add_argument('head')
+    compare.add_argument('--threshold', type=float, default=0.2, help='Relative p95/bytes growth allowed.')
+    compare.add_argument('--min-ms', type=float, default=1.0, help='Ignore p95 changes smaller than this.')
+
+    args = parser.parse_args(argv)
+    return command_run(args) if args.command == 'run' else command_compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Launch-day burst against POST /api/lms/enrollments/.
+
+Every one of --students students enrolls in each of --courses courses at the
+same moment. Requests come from --threads threads on a file-backed SQLite
+database, so writers really contend for the lock. A --double-click share of
+the requests is sent twice, half of them with an Idempotency-Key. The run
+reports the status mix, sustained enrollments/s and latency, and exits 1
+when any request got a 5xx.
+
+    python -m benchmarks.enrollment_burst --students 500 --threads 32
+    python -m benchmarks.enrollment_burst --transport wsgi --threads 16
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._support import percentile, use_scratch_database
+
+
+def seed(n_students, n_courses):
+    from django.contrib.auth import get_user_model
+    from lms_core.models import Course
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    User = get_user_model()
+    instructor = User.objects.create(username='burst_instructor', role='instructor')
+    students = User.objects.bulk_create(
+        [User(username=f'burst_{i}', password='!', role='student') for i in range(n_students)]
+    )
+    courses = Course.objects.bulk_create(
+        [Course(title=f'Launch course {i}', description='-', instructor=instructor) for i in range(n_courses)]
+    )
+    return [str(AccessToken.for_user(student)) for student in students], [course.pk for course in courses]
+
+
+def build_jobs(tokens, course_ids, double_click, rng):
+    jobs = []
+    for token in tokens:
+        for course in course_ids:
+            headers = {'Authorization': f'Bearer {token}'}
+            repeats = 2 if rng.random() < double_click else 1
+            if repeats == 2 and rng.random() < 0.5:
+                headers['Idempotency-Key'] = uuid.uuid4().hex
+            jobs += [(course, headers)] * repeats
+    rng.shuffle(jobs)
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--courses', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--double-click', type=float, default=0.3)
+    parser.add_argument('--transport', choices=('inprocess', 'wsgi'), default='inprocess')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_scratch_database(tmp)
+        from django.db import close_old_connections
+        from lms_core.models import Enrollment
+
+        from benchmarks.endpoints import HTTPTransport, InProcessTransport
+
+        tokens, course_ids = seed(args.students, args.courses)
+        jobs = build_jobs(tokens, course_ids, args.double_click, random.Random(args.seed))
+        transport = InProcessTransport() if args.transport == 'inprocess' else HTTPTransport('wsgi', args.threads)
+
+        def post(job):
+            course, headers = job
+            start = time.perf_counter()
+            try:
+                status, _, _ = transport.request('POST', '/api/lms/enrollments/', {'course': course}, headers)
+            except Exception as exc:
+                status = type(exc).__name__
+            finally:
+                close_old_connections()
+            return status, (time.perf_counter() - start) * 1000
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=args.threads) as pool:
+                samples = list(pool.map(post, jobs))
+        finally:
+            transport.close()
+        wall = time.perf_counter() - started
+
+        enrolled = Enrollment.objects.count()
+        statuses = {}
+        for status, _ in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        latencies = [ms for _, ms in samples]
+        server_errors = sum(count for status, count in statuses.items() if not status.startswith(('2', '4')))
+
+        print(f'{len(jobs)} requests from {args.threads} threads ({args.transport}) in {wall:.2f}s')
+        print(f'statuses: {dict(sorted(statuses.items()))}')
+        print(f'enrollments: {enrolled} of {args.students * args.courses} expected, '
+              f'{enrolled / wall:.0f} enrollments/s, {len(jobs) / wall:.0f} requests/s')
+        print(f'latency ms: p50 {percentile(latencies, 50):.1f}  p95 {percentile(latencies, 95):.1f}  '
+              f'p99 {percentile(latencies, 99):.1f}  max {max(latencies):.1f}')
+        if server_errors or enrolled != args.students * args.courses:
+            print('FAILED: server errors or missing enrollments', file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
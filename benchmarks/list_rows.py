@@ -0,0 +1,109 @@
+"""Rows/sec for the course and enrollment lists: serializers vs. row mapper.
+
+Seeds --rows courses, each with an instructor, a category and one enrollment
+for a single student. Both legacy unpaginated lists are then rendered
+in-process with LMS_FAST_LIST_READS off and on. The "serialize" columns time
+just the row building over rows that are already fetched. The "list" columns
+time the whole request: query, build and JSON rendering.
+
+    python -m benchmarks.list_rows --rows 5000
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from benchmarks._support import use_scratch_database
+
+
+def seed(n_rows):
+    from django.contrib.auth import get_user_model
+    from lms_core.models import Category, Course, Enrollment
+
+    User = get_user_model()
+    instructors = User.objects.bulk_create(
+        [User(username=f'rows_instructor_{i}', first_name='Ada', role='instructor', password='!') for i in range(50)]
+    )
+    student = User.objects.create(username='rows_student', role='student', password='!')
+    categories = Category.objects.bulk_create([Category(name=f'Category {i}') for i in range(20)])
+    courses = Course.objects.bulk_create(
+        [
+            Course(title=f'Course {i}', description='A course description of a typical length. ' * 4,
+                   instructor=instructors[i % 50], category=categories[i % 20], duration='6 Weeks', price='49.00')
+            for i in range(n_rows)
+        ],
+        batch_size=1000,
+    )
+    Enrollment.objects.bulk_create([Enrollment(student=student, course=course) for course in courses], batch_size=1000)
+    return student
+
+
+def median_seconds(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_scratch_database(tmp)
+        from django.core.cache import cache
+        from django.test import override_settings
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory, force_authenticate
+        from lms_core.rows import RowMapper
+        from lms_core.views import CourseViewSet, EnrollmentViewSet
+
+        student = seed(args.rows)
+        factory = APIRequestFactory()
+
+        def call(viewset, path):
+            request = factory.get(path)
+            force_authenticate(request, user=student)
+            response = viewset.as_view({'get': 'list'})(request)
+            # The catalog cache hands back an already rendered HttpResponse.
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+
+        def serializer_for(viewset, path):
+            request = factory.get(path)
+            force_authenticate(request, user=student)
+            view = viewset(request=Request(request), format_kwarg=None, action='list', kwargs={})
+            view.request.user = student
+            return view, view.get_serializer()
+
+        print(f'{args.rows} rows, median of {args.repeat}\n')
+        print(f'{"endpoint":<22} {"serialize rows/s":>28} {"list rows/s":>28}')
+        print(f'{"":<22} {"serializer":>13} {"mapper":>14} {"serializer":>13} {"mapper":>14}')
+        for viewset, path in ((CourseViewSet, '/api/lms/courses/'), (EnrollmentViewSet, '/api/lms/enrollments/')):
+            view, serializer = serializer_for(viewset, path)
+            instances = list(view.filter_queryset(view.get_queryset()))
+            mapper = RowMapper(serializer)
+            rows = list(mapper.values(view.filter_queryset(view.get_queryset())))
+            slow_build = median_seconds(lambda: type(serializer)(instances, many=True, context=serializer.context).data,
+                                        args.repeat)
+            fast_build = median_seconds(lambda: mapper.map(rows), args.repeat)
+
+            def listed(fast):
+                def run():
+                    cache.clear()
+                    with override_settings(LMS_FAST_LIST_READS=fast):
+                        call(viewset, path)
+                return median_seconds(run, args.repeat)
+
+            slow_list, fast_list = listed(False), listed(True)
+            print(f'{path:<22} {args.rows / slow_build:>13,.0f} {args.rows / fast_build:>14,.0f} '
+                  f'{args.rows / slow_list:>13,.0f} {args.rows / fast_list:>14,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Login throughput: the old double-hash token view vs. UsernameOrEmailBackend.
+
+Seeds --users accounts (all sharing one password hash, so seeding is cheap)
+and pushes --logins successful logins through CustomTokenObtainPairSerializer,
+half by username and half by email. "before" replays the old validate(): an
+unindexed username-or-email lookup plus check_password, then simplejwt's own
+authenticate() through ModelBackend. "after" is the current code path.
+
+logins/s per core divides by process CPU time, so it stays comparable when
+--threads spreads the hashing over several cores.
+
+    python -m benchmarks.logins --users 10000 --logins 40
+"""
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._support import use_scratch_database
+
+PASSWORD = 'bench-password-1'
+
+
+def legacy_serializer_class():
+    from django.db.models import Q
+    from users.models import User
+    from users.serializers import CustomTokenObtainPairSerializer
+
+    class LegacyTokenObtainPairSerializer(CustomTokenObtainPairSerializer):
+        """validate() as it was before users.backends existed."""
+
+        def validate(self, attrs):
+            username_or_email = attrs.get('username')
+            password = attrs.get('password')
+            if username_or_email and password:
+                user = User.objects.filter(Q(username=username_or_email) | Q(email=username_or_email)).first()
+                if user and user.check_password(password):
+                    attrs['username'] = user.username
+            return super().validate(attrs)
+
+    return LegacyTokenObtainPairSerializer
+
+
+def seed(n):
+    from django.contrib.auth.hashers import make_password
+    from users.models import User
+
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        [User(username=f'login_{i}', email=f'login_{i}@example.com', password=password) for i in range(n)],
+        batch_size=5000,
+    )
+
+
+def run(serializer_class, n_users, n_logins, threads):
+    def login(i):
+        user = (i * 7919) % n_users
+        name = f'login_{user}' if i % 2 else f'login_{user}@example.com'
+        serializer = serializer_class(data={'username': name, 'password': PASSWORD})
+        serializer.is_valid(raise_exception=True)
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(login, range(n_logins)))
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--logins', type=int, default=40)
+    parser.add_argument('--threads', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_scratch_database(tmp)
+        from django.db import connection
+        from django.test.utils import override_settings
+        from users.serializers import CustomTokenObtainPairSerializer
+
+        seed(args.users)
+        # The legacy run must not benefit from the email index added with the backend.
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX IF EXISTS user_email_idx')
+        with override_settings(AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend']):
+            before = run(legacy_serializer_class(), args.users, args.logins, args.threads)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE INDEX user_email_idx ON users_user (email)')
+        after = run(CustomTokenObtainPairSerializer, args.users, args.logins, args.threads)
+
+        print(f'{args.logins} logins over {args.users} users, {args.threads} thread(s)\n')
+        print(f'{"":<8} {"wall s":>8} {"cpu s":>8} {"logins/s":>10} {"per core":>10}')
+        for label, (wall, cpu) in (('before', before), ('after', after)):
+            print(f'{label:<8} {wall:>8.2f} {cpu:>8.2f} {args.logins / wall:>10.1f} {args.logins / cpu:>10.1f}')
+        print(f'\nspeed-up per core: {before[1] / after[1]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
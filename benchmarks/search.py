@@ -0,0 +1,130 @@
+"""Course search latency: FTS5 index vs. an icontains scan.
+
+Builds a throwaway SQLite database with --courses rows (100k by default)
+whose text follows a Zipf-like word distribution, then times the same queries
+through lms_core.search and through the icontains filter the fallback path
+uses. Frequent terms let the scan stop early on the created_at index while
+bm25 has to rank every hit; selective terms are where the scan reads the
+whole table.
+
+    python -m benchmarks.search --courses 100000
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks._support import use_scratch_database
+
+WORDS = (
+    'python django react rest api design data science machine learning deep neural network '
+    'security cloud devops docker kubernetes testing agile database sql postgres frontend '
+    'backend mobile swift kotlin rust go systems compiler algorithm graph statistics finance '
+    'marketing leadership writing photography music guitar cooking language spanish japanese'
+).split()
+
+SYLLABLES = 'ka lo mi ne ru sa ti vo ze pa do li mu fe ro'.split()
+
+QUERIES = ['python', 'machine learning', 'kube', 'rust compiler', 'lomi', 'kalone', 'zzzz']
+
+
+def vocabulary(rng, size=20_000):
+    rare = {
+        ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        for _ in range(size)
+    }
+    return WORDS + sorted(rare)
+
+
+def pick_words(rng, vocab, weights, k):
+    return rng.choices(vocab, weights, k=k)
+
+
+def build_dataset(n_courses, seed):
+    from django.contrib.auth import get_user_model
+    from lms_core import search
+    from lms_core.models import Category, Course
+
+    User = get_user_model()
+    rng = random.Random(seed)
+    vocab = vocabulary(rng)
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    instructors = User.objects.bulk_create(
+        [User(username=f'instructor_{i}', first_name=rng.choice(WORDS).title(), role='instructor', password='!')
+         for i in range(200)]
+    )
+    categories = Category.objects.bulk_create([Category(name=f'{word.title()} Track') for word in WORDS])
+    batch = []
+    for i in range(n_courses):
+        batch.append(Course(
+            title=' '.join(pick_words(rng, vocab, weights, 4)).title(),
+            description=' '.join(pick_words(rng, vocab, weights, 60)),
+            instructor=rng.choice(instructors),
+            category=rng.choice(categories),
+        ))
+        if len(batch) == 5000:
+            Course.objects.bulk_create(batch)
+            batch = []
+    Course.objects.bulk_create(batch)
+    search.rebuild_index()
+
+
+def icontains_search(text, limit):
+    from django.db.models import Q
+    from lms_core.models import Course
+
+    condition = Q()
+    for word in text.split():
+        condition &= (
+            Q(title__icontains=word) | Q(description__icontains=word)
+            | Q(category__name__icontains=word) | Q(instructor__first_name__icontains=word)
+        )
+    return list(Course.objects.filter(condition).order_by('-created_at', '-id').values_list('id', flat=True)[:limit])
+
+
+def count_hits(text):
+    from django.db import connection
+    from lms_core import search
+
+    expression = search.to_match_expression(text)
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) FROM {search.FTS_TABLE} WHERE {search.FTS_TABLE} MATCH %s', [expression])
+        return cursor.fetchone()[0]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--courses', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_scratch_database(tmp)
+        from lms_core import search
+
+        start = time.perf_counter()
+        build_dataset(args.courses, args.seed)
+        print(f'Seeded {args.courses} courses in {time.perf_counter() - start:.1f}s\n')
+
+        print(f'{"query":<18} {"hits":>7} {"fts5 p50/max ms":>18} {"icontains p50/max ms":>22}')
+        for text in QUERIES:
+            hits = count_hits(text)
+            fts = timed(lambda: search.search_courses(text, args.limit), args.repeat)
+            scan = timed(lambda: icontains_search(text, args.limit), args.repeat)
+            print(f'{text:<18} {hits:>7} {fts[0]:>8.2f} / {fts[1]:<8.2f} {scan[0]:>10.2f} / {scan[1]:<8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""Concurrent readers and writers on one SQLite file, default vs production profile.
+
+For each profile, a fresh file database is seeded and then --readers threads
+and --writers threads hit the API in-process for --seconds. Readers fetch a
+course page, a course, the dashboard stats and their profile. Writers
+alternate between enrolling a student and updating a profile. The catalog
+cache is off, so every read reaches the database.
+
+``default`` is SQLite as Django opens it with no OPTIONS. ``production`` is
+``SQLITE_PRODUCTION_OPTIONS`` from backend/settings.py. Each profile runs in
+its own process, since the connection settings are fixed at startup. The
+report gives reads/s and writes/s with p95/p99 latency, the SQL statements
+that failed with "database is locked" (retried or not), and the requests
+that failed.
+
+    python -m benchmarks.sqlite_profiles --readers 8 --writers 4 --seconds 10
+"""
+import argparse
+import itertools
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks._support import percentile, use_scratch_database
+
+PROFILES = ('default', 'production')
+
+
+def profile_options(name):
+    from django.conf import settings
+
+    return {} if name == 'default' else dict(settings.SQLITE_PRODUCTION_OPTIONS)
+
+
+def seed(n_writers, students_per_writer, n_courses):
+    from django.contrib.auth import get_user_model
+    from lms_core.models import Course
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    User = get_user_model()
+    instructor = User.objects.create(username='profile_instructor', role='instructor')
+    admin = User.objects.create(username='profile_admin', role='admin')
+    courses = Course.objects.bulk_create(
+        [Course(title=f'Course {i}', description='-' * 200, instructor=instructor) for i in range(n_courses)]
+    )
+    students = User.objects.bulk_create(
+        [User(username=f'profile_student_{i}', password='!', role='student')
+         for i in range(n_writers * students_per_writer)]
+    )
+    tokens = [str(AccessToken.for_user(student)) for student in students]
+    return {
+        'courses': [course.pk for course in courses],
+        'admin': str(AccessToken.for_user(admin)),
+        'writers': [tokens[i * students_per_writer:(i + 1) * students_per_writer] for i in range(n_writers)],
+    }
+
+
+def reader_requests(fixture):
+    course_ids = itertools.cycle(fixture['courses'])
+    token = fixture['writers'][0][0]
+    for n in itertools.count():
+        kind = n % 4
+        if kind == 0:
+            yield 'GET', '/api/lms/courses/?page_size=20', None, {}
+        elif kind == 1:
+            yield 'GET', f'/api/lms/courses/{next(course_ids)}/', None, {}
+        elif kind == 2:
+            yield 'GET', '/api/lms/dashboard/stats/', None, {'Authorization': f'Bearer {fixture["admin"]}'}
+        else:
+            yield 'GET', '/api/auth/profile/', None, {'Authorization': f'Bearer {token}'}
+
+
+def writer_requests(fixture, writer):
+    tokens = fixture['writers'][writer]
+    pairs = itertools.product(fixture['courses'], tokens)
+    for n in itertools.count():
+        if n % 2 == 0:
+            course, token = next(pairs)
+            yield 'POST', '/api/lms/enrollments/', {'course': course}, {'Authorization': f'Bearer {token}'}
+        else:
+            token = tokens[n % len(tokens)]
+            yield ('PUT', '/api/auth/profile/', {'first_name': f'Writer {writer}.{n}'},
+                   {'Authorization': f'Bearer {token}'})
+
+
+def run_profile(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        use_scratch_database(tmp, options=profile_options(args.profile))
+        from django.conf import settings
+        from django.db import OperationalError, close_old_connections, connection
+
+        from benchmarks.endpoints import InProcessTransport
+
+        settings.LMS_CATALOG_CACHE_TIMEOUT = 0
+        fixture = seed(args.writers, args.students_per_writer, args.courses)
+        transport = InProcessTransport()
+        lock = threading.Lock()
+        lock_errors = [0]
+        samples = {'read': [], 'write': []}
+        failures = {'read': 0, 'write': 0}
+        barrier = threading.Barrier(args.readers + args.writers + 1)
+
+        def count_locks(execute, sql, params, many, context):
+            try:
+                return execute(sql, params, many, context)
+            except OperationalError as exc:
+                if 'locked' in str(exc):
+                    with lock:
+                        lock_errors[0] += 1
+                raise
+
+        def work(role, requests):
+            latencies, failed = [], 0
+            with connection.execute_wrapper(count_locks):
+                barrier.wait()
+                deadline = time.perf_counter() + args.seconds
+                for method, path, body, headers in requests:
+                    start = time.perf_counter()
+                    if start >= deadline:
+                        break
+                    try:
+                        status, _, _ = transport.request(method, path, body, headers)
+                    except Exception:
+                        status = None
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    failed += status is None or status >= 500
+            close_old_connections()
+            with lock:
+                samples[role] += latencies
+                failures[role] += failed
+
+        threads = [threading.Thread(target=work, args=('read', reader_requests(fixture)))
+                   for _ in range(args.readers)]
+        threads += [threading.Thread(target=work, args=('write', writer_requests(fixture, i)))
+                    for i in range(args.writers)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        for thread in threads:
+            thread.join()
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+
+    result = {'profile': args.profile, 'journal_mode': journal_mode, 'lock_errors': lock_errors[0]}
+    for role, latencies in samples.items():
+        result[role] = {
+            'per_second': round(len(latencies) / args.seconds, 1),
+            'p95': round(percentile(latencies, 95) or 0, 1),
+            'p99': round(percentile(latencies, 99) or 0, 1),
+            'failed': failures[role],
+        }
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--courses', type=int, default=50)
+    parser.add_argument('--students-per-writer', type=int, default=200)
+    parser.add_argument('--profile', choices=PROFILES, help='Run one profile and print its result as JSON.')
+    args = parser.parse_args()
+
+    if args.profile:
+        run_profile(args)
+        return
+
+    results = []
+    for profile in PROFILES:
+        command = [sys.executable, '-m', 'benchmarks.sqlite_profiles', '--profile', profile,
+                   '--readers', str(args.readers), '--writers', str(args.writers), '--seconds', str(args.seconds),
+                   '--courses', str(args.courses), '--students-per-writer', str(args.students_per_writer)]
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f'{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile\n')
+    print(f'{"profile":<11} {"journal":<8} {"reads/s":>8} {"p95":>7} {"p99":>7} {"writes/s":>9} {"p95":>7} '
+          f'{"p99":>7} {"locked":>7} {"failed":>7}')
+    for row in results:
+        read, write = row['read'], row['write']
+        print(f'{row["profile"]:<11} {row["journal_mode"]:<8} {read["per_second"]:>8} {read["p95"]:>7} '
+              f'{read["p99"]:>7} {write["per_second"]:>9} {write["p95"]:>7} {write["p99"]:>7} '
+              f'{row["lock_errors"]:>7} {read["failed"] + write["failed"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
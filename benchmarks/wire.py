@@ -0,0 +1,101 @@
+"""Bytes on the wire and ms/response for GET /api/lms/courses/.
+
+Seeds --courses courses and renders the legacy catalog list in-process. The
+first table compares the stdlib and orjson renderers on the same payload. The
+second table times whole requests once per Accept-Encoding: one cold pass
+with the catalog cache cleared, and one warm pass where only rendering from
+the cache and compression remain. Codings whose package is missing are
+reported as unavailable.
+
+    python -m benchmarks.wire --courses 500
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from benchmarks._support import use_scratch_database
+
+ACCEPT_ENCODINGS = ('identity', 'gzip', 'br', 'zstd')
+
+
+def seed(n_courses):
+    from django.contrib.auth import get_user_model
+    from lms_core.models import Category, Course
+
+    User = get_user_model()
+    instructors = User.objects.bulk_create(
+        [User(username=f'wire_instructor_{i}', first_name='Ada', last_name='Lovelace', role='instructor', password='!')
+         for i in range(50)]
+    )
+    categories = Category.objects.bulk_create([Category(name=f'Category {i}') for i in range(20)])
+    Course.objects.bulk_create(
+        [
+            Course(title=f'Course number {i}', description=f'Learn topic {i} from the ground up. ' * 5,
+                   instructor=instructors[i % 50], category=categories[i % 20], duration='6 Weeks', price='49.00')
+            for i in range(n_courses)
+        ],
+        batch_size=1000,
+    )
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--courses', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_scratch_database(tmp)
+        from django.core.cache import cache
+        from django.test import Client, override_settings
+        from rest_framework.renderers import JSONRenderer
+        from lms_core import renderers
+        from lms_core.compression import available_encodings
+
+        seed(args.courses)
+        client = Client()
+        payload = client.get('/api/lms/courses/').json()
+
+        print(f'{args.courses} courses, median of {args.repeat}\n')
+        print(f'{"renderer":<10} {"bytes":>10} {"ms":>8}')
+        for name, enabled in (('stdlib', False), ('orjson', True)):
+            if enabled and renderers.orjson is None:
+                print(f'{name:<10} {"(not installed)":>19}')
+                continue
+            with override_settings(LMS_ORJSON=enabled):
+                renderer = renderers.FastJSONRenderer() if enabled else JSONRenderer()
+                size = len(renderer.render(payload))
+                ms = median_ms(lambda: renderer.render(payload), args.repeat)
+            print(f'{name:<10} {size:>10,} {ms:>8.2f}')
+
+        available = {'identity', *available_encodings()}
+        print(f'\n{"Accept-Encoding":<16} {"wire bytes":>11} {"cold ms":>9} {"warm ms":>9}')
+        for encoding in ACCEPT_ENCODINGS:
+            if encoding not in available:
+                print(f'{encoding:<16} {"(unavailable)":>11}')
+                continue
+
+            def get():
+                return client.get('/api/lms/courses/', HTTP_ACCEPT_ENCODING=encoding)
+
+            size = len(get().content)
+
+            def cold():
+                cache.clear()
+                get()
+            print(f'{encoding:<16} {size:>11,} {median_ms(cold, args.repeat):>9.2f} '
+                  f'{median_ms(get, args.repeat):>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,13 @@ import PageTransition from '../components/PageTransition';
 import { Clock, User, ArrowRight, PlusCircle, BookOpen, Star, Code, Cpu, Layout, Brain, Terminal, Cloud, Database, Smartphone } from 'lucide-react';
 import { motion } from 'framer-motion';
 
+// Only what the cards render (see lms_core/sparse.py)
+const CARD_FIELDS = [
+    'id', 'title', 'description', 'price', 'duration', 'thumbnail', 'thumbnail_variants', 'category_name',
+    'instructor_detail.username', 'instructor_detail.first_name', 'instructor_detail.last_name',
+    'instructor_detail.avatar', 'instructor_detail.avatar_variants',
+].join(',');
+
 const CourseList = ({ isHome = false, limit = null }) => {
     const [courses, setCourses] = useState([]);
     const [loading, setLoading] = useState(true);
@@ -14,7 +21,7 @@ const CourseList = ({ isHome = false, limit = null }) => {
     useEffect(() => {
         const fetchCourses = async () => {
             try {
-                const response = await api.get('lms/courses/');
+                const response = await api.get('lms/courses/', { params: { fields: CARD_FIELDS } });
                 // Apply limit if provided
                 const data = limit ? response.data.slice(0, limit) : response.data;
                 setCourses(data);
@@ -88,6 +95,11 @@ const CourseList = ({ isHome = false, limit = null }) => {
                                             <div className="absolute inset-0 w-full h-full z-0 overflow-hidden">
                                                 <img
                                                     src={course.thumbnail}
+                                                    srcSet={course.thumbnail_variants?.srcset?.webp}
+                                                    sizes="(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw"
+                                                    loading="lazy"
+                                                    decoding="async"
+                                                    style={course.thumbnail_variants?.lqip ? { backgroundImage: `url(${course.thumbnail_variants.lqip})`, backgroundSize: 'cover' } : undefined}
                                                     alt=""
                                                     className="w-full h-full object-cover group-hover:scale-110 transition-transform duration-700"
                                                 />
@@ -155,7 +167,7 @@ const CourseList = ({ isHome = false, limit = null }) => {
                                                 <div className="flex items-center gap-2">
                                                     <div className="w-8 h-8 rounded-full bg-surface-light border border-white/10 flex items-center justify-center text-primary text-[10px] font-black overflow-hidden">
                                                         {course.instructor_detail?.avatar ? (
-                                                            <img src={course.instructor_detail.avatar} alt="" className="w-full h-full object-cover" />
+                                                            <img src={course.instructor_detail.avatar} srcSet={course.instructor_detail.avatar_variants?.srcset?.webp} sizes="32px" loading="lazy" alt="" className="w-full h-full object-cover" />
                                                         ) : (
                                                             (course.instructor_detail?.first_name || course.instructor_detail?.username || '?').charAt(0).toUpperCase()
                                                         )}
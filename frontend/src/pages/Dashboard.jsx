@@ -5,6 +5,14 @@ import { Link } from 'react-router-dom';
 import { Users, BookOpen, GraduationCap, Shield, UserCheck, User, ArrowRight, Clock, PlayCircle, TrendingUp } from 'lucide-react';
 import { motion } from 'framer-motion';
 
+// Only what the enrollment cards render (see lms_core/sparse.py)
+const ENROLLMENT_CARD_FIELDS = [
+    'id', 'course', 'course_title', 'course_detail.description', 'course_detail.duration',
+    'course_detail.instructor_name', 'course_detail.category_detail.name',
+    'course_detail.instructor_detail.first_name', 'course_detail.instructor_detail.last_name',
+    'course_detail.instructor_detail.avatar', 'course_detail.instructor_detail.avatar_variants',
+].join(',');
+
 const Dashboard = () => {
     const { user } = useContext(AuthContext);
     const [stats, setStats] = useState(null);
@@ -24,7 +32,7 @@ const Dashboard = () => {
         if (user?.role === 'student') {
             const fetchEnrollments = async () => {
                 try {
-                    const response = await api.get('lms/enrollments/');
+                    const response = await api.get('lms/enrollments/', { params: { fields: ENROLLMENT_CARD_FIELDS } });
                     setEnrolledCourses(response.data);
                 } catch (error) {
                     console.error("Error fetching enrollments", error);
@@ -127,7 +135,7 @@ const Dashboard = () => {
                                                 <div className="flex items-center gap-3">
                                                     <div className="w-8 h-8 rounded-full bg-background border border-white/10 flex items-center justify-center text-primary text-[10px] overflow-hidden">
                                                         {enrollment.course_detail?.instructor_detail?.avatar ? (
-                                                            <img src={enrollment.course_detail.instructor_detail.avatar} alt="" className="w-full h-full object-cover" />
+                                                            <img src={enrollment.course_detail.instructor_detail.avatar} srcSet={enrollment.course_detail.instructor_detail.avatar_variants?.srcset?.webp} sizes="32px" loading="lazy" alt="" className="w-full h-full object-cover" />
                                                         ) : (
                                                             <User size={14} />
                                                         )}
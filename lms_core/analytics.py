@@ -0,0 +1,109 @@
+"""Per-course enrollment analytics from ``EnrollmentDailyRollup``.
+
+Each rollup row holds one course's enrollments and revenue for one day (in
+``TIME_ZONE``). Enrollment writes adjust it as they happen: the signal
+handlers for single rows, ``bulk_enroll`` for each chunk. The analytics
+endpoint only reads rollups, so a year of data costs at most 365 rows per
+course, however many enrollments there are.
+
+Revenue is approximate. It is counted at the course's price when the rollup
+is adjusted: at enrollment time when a student enrolls, but at the current
+price when an enrollment is deleted. Enrollments do not record what was paid,
+so after a price change a delete takes off a different amount than its
+enrollment added. ``backfill_enrollment_rollups`` recomputes revenue at
+today's prices.
+"""
+from collections import Counter
+from decimal import Decimal
+
+from django.db.models import (
+    Case, Count, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from .models import Course, Enrollment, EnrollmentDailyRollup
+
+DAY = 'day'
+WEEK = 'week'
+PERIODS = (DAY, WEEK)
+
+CENT = Decimal('0.01')
+
+
+def enrollment_day(moment):
+    return timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+
+
+def adjust_rollups(deltas):
+    """Add ``{(course_id, day): enrollments}`` (negative to remove) to the
+    rollups, with revenue at each course's current price. Costs two queries
+    however many rows change."""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    new = [(course, day) for (course, day), delta in deltas.items() if delta > 0]
+    if new:
+        EnrollmentDailyRollup.objects.bulk_create(
+            [EnrollmentDailyRollup(course_id=course, day=day) for course, day in new], ignore_conflicts=True,
+        )
+    change = Case(
+        *[When(course_id=course, day=day, then=Value(delta)) for (course, day), delta in deltas.items()],
+        default=Value(0), output_field=IntegerField(),
+    )
+    price = Subquery(Course.objects.filter(pk=OuterRef('course_id')).values('price')[:1])
+    matching = Q()
+    for course, day in deltas:
+        matching |= Q(course_id=course, day=day)
+    EnrollmentDailyRollup.objects.filter(matching).update(
+        enrollments=F('enrollments') + change,
+        revenue=ExpressionWrapper(F('revenue') + change * price, output_field=DecimalField()),
+    )
+
+
+def record_enrollments(enrollments, sign=1):
+    """Count ``enrollments`` into their rollups, or out of them with ``sign=-1``."""
+    counts = Counter((enrollment.course_id, enrollment_day(enrollment.enrolled_at)) for enrollment in enrollments)
+    adjust_rollups({key: sign * count for key, count in counts.items()})
+
+
+def computed_rollups(enrollments=None):
+    """``(course_id, day, enrollments, revenue)`` aggregated from raw
+    enrollment rows, at today's prices."""
+    enrollments = Enrollment.objects.all() if enrollments is None else enrollments
+    rows = (
+        enrollments.annotate(day=TruncDate('enrolled_at'))
+        .values('course_id', 'day')
+        .annotate(count=Count('id'), revenue=Sum('course__price'))
+        .order_by('course_id', 'day')
+    )
+    for row in rows.iterator():
+        yield row['course_id'], row['day'], row['count'], row['revenue'] or Decimal(0)
+
+
+def series(courses, start, end, period=DAY):
+    """Enrollments and revenue per course per day (or per week, starting on
+    Monday) between ``start`` and ``end`` inclusive. Only buckets with
+    enrollments are listed."""
+    rollups = EnrollmentDailyRollup.objects.filter(course__in=courses, day__range=(start, end))
+    bucket = F('day') if period == DAY else TruncWeek('day')
+    rows = (
+        rollups.annotate(bucket=bucket)
+        .values('course_id', 'bucket')
+        .annotate(enrollments=Sum('enrollments'), revenue=Sum('revenue'))
+        .filter(enrollments__gt=0)
+        .order_by('course_id', 'bucket')
+    )
+    by_course = {}
+    for row in rows:
+        by_course.setdefault(row['course_id'], []).append({
+            'date': row['bucket'],
+            'enrollments': row['enrollments'],
+            'revenue': row['revenue'] or Decimal(0),
+        })
+    return by_course
+
+
+def money(value):
+    """Decimal amounts as strings, the way serializers render Course.price."""
+    return str(Decimal(value).quantize(CENT))
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class LmsCoreConfig(AppConfig):
     name = 'lms_core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,190 @@
+"""Native async GET handlers for the read-heavy endpoints, routed by
+``backend/urls_asgi.py`` when the app runs under ``backend/asgi.py``.
+
+Under ASGI, a sync DRF view costs a hop through ``sync_to_async`` on the one
+thread-sensitive executor that all sync code shares. ``async_reads()`` wraps
+a DRF view so GET requests stay on the event loop. They authenticate,
+negotiate and check permissions with the view's own classes, query through
+the async ORM and cache API, and render with the view's renderer, so the
+bytes match the sync view.
+
+Everything else goes to the sync view unchanged: other methods, non-JSON
+formats, ``?search=``, and any request that fails validation, permissions or
+a lookup. That way error responses are always the sync view's own.
+"""
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.http import Http404
+from django.urls import URLPattern, URLResolver
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from .models import DashboardStats
+from .replicas import ReplicaReadsMixin, ause_replica
+from .views import CategoryViewSet, CourseViewSet, DashboardStatsView
+
+# Exceptions that send a request to the sync view instead of failing here
+FALLBACK_ERRORS = (APIException, Http404, ObjectDoesNotExist, ValidationError, ValueError)
+
+
+async def aauthenticate(request):
+    """Authenticate a DRF ``request`` with async-capable authenticators.
+
+    Returns False when the sync view has to decide, either because an
+    authenticator has no async path or because authentication failed.
+    """
+    for authenticator in request.authenticators:
+        if not hasattr(authenticator, 'aauthenticate'):
+            return False
+        try:
+            result = await authenticator.aauthenticate(request)
+        except APIException:
+            return False
+        if result is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = result
+            return True
+    request._not_authenticated()
+    return True
+
+
+async def prepare_view(callback, request, args, kwargs):
+    """A DRF view instance set up the way ``as_view()`` and ``dispatch()``
+    would set it up, or None."""
+    view = callback.cls(**callback.initkwargs)
+    actions = getattr(callback, 'actions', None)
+    if actions is not None:
+        actions = {'head': actions['get'], **actions} if 'get' in actions else actions
+        view.action_map = actions
+        for method, action in actions.items():
+            setattr(view, method, getattr(view, action))
+    view.setup(request, *args, **kwargs)
+    view.format_kwarg = view.get_format_suffix(**kwargs)
+    view.request = view.initialize_request(request, *args, **kwargs)
+    view.headers = view.default_response_headers
+    if not await aauthenticate(view.request):
+        return None
+    try:
+        view.check_permissions(view.request)
+        view.check_throttles(view.request)
+        renderer, media_type = view.perform_content_negotiation(view.request)
+    except APIException:
+        return None
+    if renderer.format != 'json':
+        return None
+    view.request.accepted_renderer, view.request.accepted_media_type = renderer, media_type
+    if isinstance(view, ReplicaReadsMixin):
+        await ause_replica(view.request, view.replica_fences)
+    return view
+
+
+def finalize(view, response):
+    """What ``APIView.finalize_response`` adds, for a response built here."""
+    if isinstance(response, Response):
+        response.accepted_renderer = view.request.accepted_renderer
+        response.accepted_media_type = view.request.accepted_media_type
+        response.renderer_context = view.get_renderer_context()
+        response.render()
+    headers = dict(view.headers)
+    vary = headers.pop('Vary', None)
+    if vary is not None:
+        patch_vary_headers(response, [value.strip() for value in vary.split(',')])
+    for key, value in headers.items():
+        response[key] = value
+    return response
+
+
+def async_reads(callback, read):
+    """Wrap the DRF view ``callback`` so GET is answered by ``await read(view)``.
+    Other methods, and any GET for which ``read`` returns None, go to
+    ``callback``."""
+    sync_view = sync_to_async(callback)
+
+    async def view(request, *args, **kwargs):
+        if request.method == 'GET':
+            drf_view = await prepare_view(callback, request, args, kwargs)
+            if drf_view is not None:
+                try:
+                    response = await read(drf_view)
+                except FALLBACK_ERRORS:
+                    response = None
+                if response is not None:
+                    return finalize(drf_view, response)
+        return await sync_view(request, *args, **kwargs)
+
+    view.cls, view.initkwargs = callback.cls, callback.initkwargs
+    return csrf_exempt(view)
+
+
+def read_key(callback):
+    cls = getattr(callback, 'cls', None)
+    actions = getattr(callback, 'actions', None) or {}
+    return cls, actions.get('get')
+
+
+def with_async_reads(patterns, reads):
+    """Copy of ``patterns`` in which every view listed in ``reads`` (keyed by
+    ``(view class, GET action)``) is wrapped with ``async_reads()``."""
+    converted = []
+    for entry in patterns:
+        if isinstance(entry, URLResolver):
+            entry = URLResolver(
+                entry.pattern, with_async_reads(entry.url_patterns, reads), entry.default_kwargs,
+                entry.app_name, entry.namespace,
+            )
+        elif isinstance(entry, URLPattern) and read_key(entry.callback) in reads:
+            read = reads[read_key(entry.callback)]
+            entry = URLPattern(entry.pattern, async_reads(entry.callback, read), entry.default_args, entry.name)
+        converted.append(entry)
+    return converted
+
+
+async def alist(view):
+    """``ListModelMixin.list`` through the async ORM, with the row mapper when
+    the view has one."""
+    queryset = view.filter_queryset(view.get_queryset())
+    mapper = view.get_row_mapper() if hasattr(view, 'get_row_mapper') else None
+    if mapper is not None:
+        queryset = mapper.values(queryset)
+    paginator = view.paginator
+    page = None
+    if paginator is not None:
+        page = await paginator.apaginate_queryset(queryset, view.request, view=view)
+    rows = page if page is not None else [row async for row in queryset]
+    data = mapper.map(rows) if mapper is not None else view.get_serializer(rows, many=True).data
+    if page is not None:
+        return view.get_paginated_response(data)
+    return Response(data)
+
+
+async def aretrieve(view):
+    queryset = view.filter_queryset(view.get_queryset())
+    lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+    instance = await queryset.aget(**{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+    view.check_object_permissions(view.request, instance)
+    return Response(view.get_serializer(instance).data)
+
+
+async def catalog_list(view):
+    if 'search' in view.request.query_params:
+        return None
+    return await view.aserve_cached(lambda request: alist(view), view.request)
+
+
+async def catalog_detail(view):
+    return await view.aserve_cached(lambda request: aretrieve(view), view.request)
+
+
+async def dashboard_stats(view):
+    return Response(DashboardStatsView.stats_data(await DashboardStats.aload()))
+
+
+READS = {
+    (CategoryViewSet, 'list'): catalog_list,
+    (CategoryViewSet, 'retrieve'): catalog_detail,
+    (CourseViewSet, 'list'): catalog_list,
+    (CourseViewSet, 'retrieve'): catalog_detail,
+    (DashboardStatsView, None): dashboard_stats,
+}
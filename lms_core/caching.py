@@ -0,0 +1,137 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .replicas import CATALOG_FENCE, note_write
+
+VERSION_KEY = 'lms:catalog:version'
+
+
+def catalog_cache():
+    return caches[getattr(settings, 'LMS_CATALOG_CACHE', 'default')]
+
+
+def get_catalog_version():
+    cache = catalog_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock rather than 1 so an evicted counter can never
+        # resurrect entries written under an older version.
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+async def aget_catalog_version():
+    cache = catalog_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+def _bump():
+    cache = catalog_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+    # Until replicas have the change, catalog misses must not be filled from them
+    note_write(CATALOG_FENCE)
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response.
+
+    Bumps immediately and again after the surrounding transaction commits, so
+    a read racing the commit cannot pin pre-commit data under the new version.
+    """
+    _bump()
+    transaction.on_commit(_bump)
+
+
+def make_etag(content):
+    return '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+
+class CatalogCacheMixin:
+    """Serve ``list``/``retrieve`` JSON from a cache keyed on the catalog version.
+
+    Responses carry a strong ETag and ``If-None-Match`` short-circuits to 304.
+    The bodies only depend on the URL (absolute media links include the host),
+    so one entry is shared by every caller.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.serve_cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.serve_cached(super().retrieve, request, *args, **kwargs)
+
+    def get_catalog_cache_key(self, request, version=None):
+        if version is None:
+            version = get_catalog_version()
+        url = f'{request.get_host()}{request.get_full_path()}'
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        return f'lms:catalog:{version}:{self.basename}:{digest}'
+
+    def serve_cached(self, handler, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        cache = catalog_cache()
+        key = self.get_catalog_cache_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = self.make_catalog_entry(request, response)
+            cache.set(key, entry, getattr(settings, 'LMS_CATALOG_CACHE_TIMEOUT', 300))
+        return self.catalog_response(request, entry)
+
+    async def aserve_cached(self, handler, request, *args, **kwargs):
+        """``serve_cached`` for the async views: ``handler`` is awaited and the
+        cache is used through its async API."""
+        cache = catalog_cache()
+        key = self.get_catalog_cache_key(request, await aget_catalog_version())
+        entry = await cache.aget(key)
+        if entry is None:
+            response = await handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = self.make_catalog_entry(request, response)
+            await cache.aset(key, entry, getattr(settings, 'LMS_CATALOG_CACHE_TIMEOUT', 300))
+        return self.catalog_response(request, entry)
+
+    def make_catalog_entry(self, request, response):
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = self.get_renderer_context()
+        content = response.rendered_content
+        return {
+            'content': content,
+            'content_type': response['Content-Type'],
+            'etag': make_etag(content),
+        }
+
+    def catalog_response(self, request, entry):
+        if_none_match = request.headers.get('If-None-Match')
+        # Weak comparison: CompressionMiddleware hands out W/ versions of the tag.
+        if if_none_match and (
+            if_none_match.strip() == '*'
+            or entry['etag'] in [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+        ):
+            not_modified = HttpResponseNotModified()
+            not_modified['ETag'] = entry['etag']
+            return not_modified
+
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+        response['ETag'] = entry['etag']
+        return response
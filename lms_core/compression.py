@@ -0,0 +1,109 @@
+"""Response compression negotiated from ``Accept-Encoding``.
+
+``CompressionMiddleware`` replaces Django's gzip-only ``GZipMiddleware``.
+It picks the client's most preferred coding among those available here:
+brotli when the ``brotli`` package is installed, zstd with ``zstandard``
+(or ``compression.zstd`` on Python 3.14+), and gzip always. Ties go to the
+order of ``LMS_COMPRESSION_ENCODINGS``.
+
+A response is left alone when it is streaming, already encoded, a partial
+response, smaller than ``LMS_COMPRESSION_MIN_SIZE`` bytes, or of a type that
+does not compress (images, video, archives). It is also left alone when the
+compressed body would not be smaller. Like ``GZipMiddleware``, compressing
+weakens a strong ETag, since the bytes no longer match it.
+
+    pip install brotli zstandard
+"""
+import gzip
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+DEFAULT_ENCODINGS = ('br', 'zstd', 'gzip')
+DEFAULT_MIN_SIZE = 1024
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml|[\w.+-]+\+(json|xml))|image/svg\+xml)', re.IGNORECASE,
+)
+
+COMPRESSORS = {'gzip': lambda data: gzip.compress(data, compresslevel=6, mtime=0)}
+if brotli is not None:
+    COMPRESSORS['br'] = lambda data: brotli.compress(data, quality=5)
+if zstd is not None:
+    COMPRESSORS['zstd'] = lambda data: zstd.compress(data, 3)
+
+
+def available_encodings():
+    wanted = getattr(settings, 'LMS_COMPRESSION_ENCODINGS', DEFAULT_ENCODINGS)
+    return [name for name in wanted if name in COMPRESSORS]
+
+
+def parse_accept_encoding(header):
+    """``{'gzip': 1.0, 'br': 0.8, '*': 0.1}`` from an ``Accept-Encoding`` value."""
+    preferences = {}
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                quality = 0.0
+        preferences[name] = quality
+    return preferences
+
+
+def negotiate(header, encodings):
+    """The coding to use for ``header`` among ``encodings``, or None."""
+    preferences = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for name in encodings:
+        quality = preferences.get(name, preferences.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding') or response.status_code == 206:
+            return response
+        if not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+            return response
+        if len(response.content) < getattr(settings, 'LMS_COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), available_encodings())
+        if encoding is None:
+            return response
+
+        compressed = COMPRESSORS[encoding](response.content)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        return response
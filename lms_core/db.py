@@ -0,0 +1,24 @@
+"""Database helpers shared by both apps."""
+import random
+import time
+
+from django.db import OperationalError
+
+
+def retry_when_locked(fn, attempts=6, base_delay=0.02, max_delay=0.5):
+    """Call ``fn`` and retry it when SQLite reports a lock.
+
+    Retries cover "database is locked", and "database table is locked" in
+    shared-cache mode. The wait is exponential with jitter. Any other error,
+    or the last failed attempt, propagates. ``fn`` must be a single
+    autocommit query or open its own transaction (or savepoint), so that a
+    retry starts clean.
+    """
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except OperationalError as exc:
+            if 'locked' not in str(exc) or attempt == attempts - 1:
+                raise
+        delay = min(max_delay, base_delay * 2 ** attempt)
+        time.sleep(delay / 2 + random.uniform(0, delay / 2))
@@ -0,0 +1,75 @@
+"""Counting enrollment deletes once per delete.
+
+Deleting N enrollments (a queryset delete, or the cascade from a course or a
+user) sends post_delete for each of them. Deletes that go through
+``CountedDeleteQuerySet`` or ``CountedDeleteModel`` collect those rows and
+adjust the dashboard counters, the course counts and the rollups once, when
+the delete has gone through, in the same transaction. A delete that fails
+adjusts nothing, and the batch goes with the call that opened it. Any other
+delete (the Collector used directly) adjusts them per row.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import models, router, transaction
+
+_deleted_enrollments = ContextVar('lms_deleted_enrollments', default=None)
+
+
+def count_enrollment_deletes(deleted):
+    from . import analytics
+    from .models import Course, DashboardStats
+
+    DashboardStats.adjust(total_enrollments=-len(deleted))
+    Course.adjust_enrollment_counts({
+        course: -count for course, count in Counter(enrollment.course_id for enrollment in deleted).items()
+    })
+    analytics.record_enrollments(deleted, sign=-1)
+
+
+def enrollment_deleted(enrollment):
+    """Called from post_delete: counts ``enrollment`` out now, or when the
+    delete it belongs to returns."""
+    deleted = _deleted_enrollments.get()
+    if deleted is None:
+        count_enrollment_deletes([enrollment])
+    else:
+        deleted.append(enrollment)
+
+
+@contextmanager
+def counted_deletes(using):
+    if _deleted_enrollments.get() is not None:
+        # Nested in a delete that already counts
+        yield
+        return
+    deleted = []
+    token = _deleted_enrollments.set(deleted)
+    try:
+        with transaction.atomic(using=using, savepoint=False):
+            yield
+            if deleted:
+                count_enrollment_deletes(deleted)
+    finally:
+        _deleted_enrollments.reset(token)
+
+
+class CountedDeleteQuerySet(models.QuerySet):
+    def delete(self):
+        with counted_deletes(self.db):
+            return super().delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class CountedDeleteModel(models.Model):
+    class Meta:
+        abstract = True
+
+    def delete(self, using=None, keep_parents=False):
+        with counted_deletes(using or router.db_for_write(self.__class__, instance=self)):
+            return super().delete(using=using, keep_parents=keep_parents)
+
+    delete.alters_data = True
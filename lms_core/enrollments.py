@@ -0,0 +1,101 @@
+"""Enrollment writes that stay correct under contention.
+
+``enroll`` backs the single-course POST. Enrolling twice returns the existing
+row, and SQLite "database is locked" errors are retried with backoff.
+
+``bulk_enroll`` works through (student, course) pairs in chunks, and each chunk
+is its own transaction. A chunk costs a fixed number of queries: one read of
+the pairs that already exist, one multi-row INSERT ... ON CONFLICT DO NOTHING,
+the same read again to see which pairs it inserted, one dashboard counter
+update, one course enrollment_count update and two rollup writes for the
+analytics. That holds however many pairs the chunk has.
+"""
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .analytics import record_enrollments
+from .db import retry_when_locked
+from .models import Course, DashboardStats, Enrollment
+
+CREATED = 'created'
+ALREADY_ENROLLED = 'already_enrolled'
+UNKNOWN_STUDENT = 'unknown_student'
+UNKNOWN_COURSE = 'unknown_course'
+
+# Stays well below SQLite's bound-parameter limit for the IN (...) lookups.
+DEFAULT_BATCH_SIZE = 500
+
+
+def enroll(student_id, course):
+    """Returns ``(enrollment, created)``; an existing enrollment is not an error."""
+    return retry_when_locked(lambda: Enrollment.objects.get_or_create(student_id=student_id, course=course))
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def existing_ids(model, ids, batch_size):
+    found = set()
+    for chunk in chunked(sorted(ids), batch_size):
+        found.update(model._default_manager.filter(pk__in=chunk).values_list('pk', flat=True))
+    return found
+
+
+def existing_pairs(pairs):
+    """Which of ``pairs`` are enrolled, in one query."""
+    return set(
+        Enrollment.objects.filter(
+            student_id__in={s for s, _ in pairs}, course_id__in={c for _, c in pairs},
+        ).values_list('student_id', 'course_id')
+    ) & set(pairs)
+
+
+def bulk_enroll(pairs, batch_size=DEFAULT_BATCH_SIZE):
+    """Enroll each ``(student_id, course_id)`` pair that is not enrolled yet.
+
+    Returns ``[(student_id, course_id, status)]`` in input order, without
+    duplicate pairs. Each chunk reads what already exists before it inserts.
+    ``ignore_conflicts`` then makes sure a concurrent insert of the same pair
+    can never fail the chunk or create a duplicate, and only the rows the
+    insert really wrote are counted and reported as created.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    students = existing_ids(get_user_model(), {student for student, _ in pairs}, batch_size)
+    courses = existing_ids(Course, {course for _, course in pairs}, batch_size)
+
+    results = []
+    for chunk in chunked(pairs, batch_size):
+        valid = [(s, c) for s, c in chunk if s in students and c in courses]
+        with transaction.atomic():
+            enrolled = existing_pairs(valid) if valid else set()
+            new = [pair for pair in valid if pair not in enrolled]
+            if new:
+                objects = Enrollment.objects.bulk_create(
+                    [Enrollment(student_id=s, course_id=c) for s, c in new], ignore_conflicts=True,
+                )
+                # Pairs that exist now and did not at the first read are the
+                # ones this INSERT wrote. transaction_mode IMMEDIATE holds the
+                # write lock from that read on, so no one else can add any.
+                inserted = existing_pairs(new) - enrolled
+                created = [obj for obj in objects if (obj.student_id, obj.course_id) in inserted]
+                enrolled |= set(new) - inserted
+                # bulk_create bypasses the post_save counter and rollup handlers.
+                DashboardStats.adjust(total_enrollments=len(created))
+                Course.adjust_enrollment_counts(Counter(obj.course_id for obj in created))
+                record_enrollments(created)
+
+        for student, course in chunk:
+            if student not in students:
+                status = UNKNOWN_STUDENT
+            elif course not in courses:
+                status = UNKNOWN_COURSE
+            elif (student, course) in enrolled:
+                status = ALREADY_ENROLLED
+            else:
+                status = CREATED
+            results.append((student, course, status))
+    return results
@@ -0,0 +1,76 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+def idempotency_cache():
+    return caches[getattr(settings, 'LMS_IDEMPOTENCY_CACHE', 'default')]
+
+
+def fingerprint(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotentCreateMixin:
+    """Honor an ``Idempotency-Key`` header on ``create`` (or any handler passed
+    to ``serve_idempotent``).
+
+    The first request with a key runs normally, and a successful response is
+    stored for ``LMS_IDEMPOTENCY_TTL`` seconds under the user and key. A retry
+    with the same key and body gets that response replayed. The same key with
+    a different body is a 422. While the first request is still running,
+    retries get a 409. Failed requests release the key so the client can try
+    again.
+    """
+
+    def create(self, request, *args, **kwargs):
+        return self.serve_idempotent(super().create, request, *args, **kwargs)
+
+    def serve_idempotent(self, handler, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return handler(request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({'detail': f'{IDEMPOTENCY_HEADER} must be at most 255 characters.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        cache = idempotency_cache()
+        ttl = getattr(settings, 'LMS_IDEMPOTENCY_TTL', 24 * 60 * 60)
+        scope = f'{request.user.pk}:{self.basename}:{key}'
+        cache_key = f'lms:idempotency:{hashlib.sha256(scope.encode()).hexdigest()}'
+        body = fingerprint(request.data)
+
+        if not cache.add(cache_key, {'fingerprint': body, 'pending': True}, ttl):
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return self.replay(stored, body)
+            cache.set(cache_key, {'fingerprint': body, 'pending': True}, ttl)
+
+        try:
+            response = handler(request, *args, **kwargs)
+        except Exception:
+            cache.delete(cache_key)
+            raise
+        if status.is_success(response.status_code):
+            cache.set(cache_key, {'fingerprint': body, 'status': response.status_code, 'data': response.data}, ttl)
+        else:
+            cache.delete(cache_key)
+        return response
+
+    def replay(self, stored, body):
+        if stored['fingerprint'] != body:
+            return Response({'detail': f'{IDEMPOTENCY_HEADER} was already used with a different request.'},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if stored.get('pending'):
+            return Response({'detail': f'A request with this {IDEMPOTENCY_HEADER} is still in progress.'},
+                            status=status.HTTP_409_CONFLICT)
+        response = Response(stored['data'], status=stored['status'])
+        response[REPLAYED_HEADER] = 'true'
+        return response
@@ -0,0 +1,208 @@
+"""Responsive derivatives for uploaded images (course thumbnails, avatars).
+
+After an image field changes, a background job decodes the original once,
+writes fixed-width variants next to it (``<stem>.w320.webp`` ...) and a tiny
+blurred LQIP data URI, and records them in the model's JSON metadata field:
+
+    {"source": "course_thumbnails/x.jpg", "width": 1200,
+     "variants": {"webp": {"320": "course_thumbnails/x.w320.webp", ...}},
+     "lqip": "data:image/webp;base64,..."}
+
+``ImageVariantsField`` turns that into ``srcset`` strings for the API.
+"""
+import base64
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from PIL import Image, ImageFilter, ImageOps, features
+from rest_framework import serializers
+
+from .caching import bump_catalog_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = (320, 640, 960)
+DEFAULT_FORMATS = ('webp',)
+LQIP_SIZE = 24
+
+MIME_TYPES = {'webp': 'image/webp', 'avif': 'image/avif'}
+SAVE_OPTIONS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'avif': {'format': 'AVIF', 'quality': 60},
+}
+
+_executor = None
+
+
+def image_fields():
+    """``(model, image field, metadata field)`` for every image with variants."""
+    from django.contrib.auth import get_user_model
+
+    return (
+        (apps.get_model('lms_core', 'Course'), 'thumbnail', 'thumbnail_variants'),
+        (get_user_model(), 'avatar', 'avatar_variants'),
+    )
+
+
+def variant_widths():
+    return tuple(sorted(getattr(settings, 'LMS_IMAGE_VARIANT_WIDTHS', DEFAULT_WIDTHS)))
+
+
+def variant_formats():
+    formats = getattr(settings, 'LMS_IMAGE_VARIANT_FORMATS', DEFAULT_FORMATS)
+    # AVIF needs a Pillow build with libavif; skip it rather than fail uploads.
+    return tuple(fmt for fmt in formats if fmt != 'avif' or features.check('avif'))
+
+
+def _encode(image, fmt):
+    buffer = BytesIO()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    image.save(buffer, **SAVE_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def _resized(image, width):
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def generate_variants(storage, name):
+    """Write the derivatives of ``name`` to ``storage`` and return the metadata."""
+    with storage.open(name, 'rb') as handle:
+        image = Image.open(handle)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    stem = os.path.splitext(name)[0]
+    widths = [width for width in variant_widths() if width < image.width] or [image.width]
+    variants = {}
+    for fmt in variant_formats():
+        variants[fmt] = {}
+        for width in widths:
+            content = ContentFile(_encode(_resized(image, width), fmt))
+            variants[fmt][str(width)] = storage.save(f'{stem}.w{width}.{fmt}', content)
+
+    tiny = image.copy()
+    tiny.thumbnail((LQIP_SIZE, LQIP_SIZE))
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    lqip = base64.b64encode(_encode(tiny, 'webp')).decode('ascii')
+
+    return {
+        'source': name,
+        'width': image.width,
+        'variants': variants,
+        'lqip': f'data:image/webp;base64,{lqip}',
+    }
+
+
+def variant_names(meta):
+    for by_width in (meta or {}).get('variants', {}).values():
+        yield from by_width.values()
+
+
+def delete_variants(storage, meta):
+    for name in variant_names(meta):
+        storage.delete(name)
+
+
+def needs_variants(instance, image_field, meta_field):
+    image = getattr(instance, image_field)
+    meta = getattr(instance, meta_field) or {}
+    return (image.name or None) != meta.get('source')
+
+
+def refresh_variants(model_label, pk, image_field, meta_field):
+    """Bring the derivatives of one row in line with its current image."""
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).only('pk', image_field, meta_field).first()
+    if instance is None or not needs_variants(instance, image_field, meta_field):
+        return
+    image = getattr(instance, image_field)
+    storage = image.storage
+    previous = getattr(instance, meta_field)
+
+    meta = {}
+    if image.name:
+        try:
+            meta = generate_variants(storage, image.name)
+        except Exception:
+            logger.exception('Could not build variants for %s %s (%s)', model_label, pk, image.name)
+            meta = {'source': image.name, 'error': True}
+
+    # Only record the result if the image was not replaced meanwhile.
+    if image.name:
+        unchanged = Q(**{image_field: image.name})
+    else:
+        unchanged = Q(**{image_field: ''}) | Q(**{f'{image_field}__isnull': True})
+    updated = model.objects.filter(unchanged, pk=pk).update(**{meta_field: meta})
+    if updated:
+        delete_variants(storage, previous)
+        bump_catalog_version()
+    else:
+        delete_variants(storage, meta)
+
+
+def _run_in_background(*args):
+    try:
+        refresh_variants(*args)
+    except Exception:
+        logger.exception('Image variant job failed: %r', args)
+    finally:
+        close_old_connections()
+
+
+def schedule_variants(instance, image_field, meta_field):
+    """Queue a variant refresh once the current transaction commits."""
+    if not needs_variants(instance, image_field, meta_field):
+        return
+    args = (instance._meta.label, instance.pk, image_field, meta_field)
+    if getattr(settings, 'LMS_IMAGE_VARIANTS_ASYNC', True):
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_background, *args))
+    else:
+        transaction.on_commit(lambda: refresh_variants(*args))
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-variants')
+    return _executor
+
+
+class ImageVariantsField(serializers.Field):
+    """Read-only ``{"lqip", "width", "srcset": {format: "url 320w, ..."}}``
+    built from an image metadata field, or None until variants exist."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, meta):
+        if not meta or not meta.get('variants'):
+            return None
+        request = self.context.get('request')
+
+        def url(name):
+            path = default_storage.url(name)
+            return request.build_absolute_uri(path) if request is not None else path
+
+        return {
+            'lqip': meta.get('lqip'),
+            'width': meta.get('width'),
+            'srcset': {
+                fmt: ', '.join(f'{url(name)} {width}w' for width, name in by_width.items())
+                for fmt, by_width in meta['variants'].items()
+            },
+            'types': {fmt: MIME_TYPES[fmt] for fmt in meta['variants']},
+        }
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lms_core.analytics import computed_rollups
+from lms_core.models import Enrollment, EnrollmentDailyRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily enrollment rollups behind the analytics endpoint from the enrollment rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses',
+                            help='Only rebuild this course (repeatable).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rollups = EnrollmentDailyRollup.objects.all()
+        enrollments = Enrollment.objects.all()
+        if options['courses']:
+            rollups = rollups.filter(course_id__in=options['courses'])
+            enrollments = enrollments.filter(course_id__in=options['courses'])
+
+        written = 0
+        with transaction.atomic():
+            rollups.delete()
+            batch = []
+            for course, day, count, revenue in computed_rollups(enrollments):
+                batch.append(EnrollmentDailyRollup(course_id=course, day=day, enrollments=count, revenue=revenue))
+                if len(batch) >= options['batch_size']:
+                    EnrollmentDailyRollup.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            EnrollmentDailyRollup.objects.bulk_create(batch)
+            written += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} daily rollup row(s).'))
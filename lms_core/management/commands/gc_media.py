@@ -0,0 +1,113 @@
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models
+
+from lms_core import images
+from lms_core.storage import BLOB_ROOT
+
+
+def file_fields():
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField) and field.storage.location == default_storage.location:
+                yield model, field
+
+
+def referenced_names():
+    """Every media name a row points at, image variants included."""
+    names = set()
+    for model, field in file_fields():
+        rows = model._default_manager.exclude(**{field.name: ''}).exclude(**{f'{field.name}__isnull': True})
+        names.update(rows.values_list(field.name, flat=True).iterator())
+    for model, image_field, meta_field in images.image_fields():
+        for meta in model._default_manager.exclude(**{meta_field: {}}).values_list(meta_field, flat=True).iterator():
+            names.update(images.variant_names(meta))
+    return names
+
+
+def walk(root):
+    """``(path, stat)`` of every file under ``root``."""
+    try:
+        entries = list(os.scandir(root))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk(entry.path)
+        elif entry.is_file(follow_symlinks=False):
+            yield entry.path, entry.stat(follow_symlinks=False)
+
+
+def remove_empty_dirs(root):
+    for directory, _, _ in sorted(os.walk(root), key=lambda item: -len(item[0])):
+        if directory != root:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+
+
+class Command(BaseCommand):
+    help = 'Remove media files no row references, once they are older than the grace period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace', type=int, default=getattr(settings, 'LMS_MEDIA_GC_GRACE', 24 * 60 * 60),
+            help='Keep unreferenced files modified less than this many seconds ago (default: LMS_MEDIA_GC_GRACE).',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be removed without removing it.')
+        parser.add_argument(
+            '--legacy', action='store_true',
+            help='Also sweep the upload_to directories written before content-addressed storage.',
+        )
+
+    def handle(self, *args, **options):
+        media_root = os.path.abspath(default_storage.location)
+        referenced = referenced_names()
+        roots = [BLOB_ROOT]
+        if options['legacy']:
+            roots += sorted({
+                field.upload_to.strip('/') for _, field in file_fields()
+                if isinstance(field.upload_to, str) and field.upload_to.strip('/')
+            })
+
+        cutoff = time.time() - options['grace']
+        stats = {'scanned': 0, 'referenced': 0, 'removed': 0, 'bytes': 0, 'within grace': 0}
+        for root in roots:
+            root = os.path.join(media_root, root)
+            for path, stat in walk(root):
+                stats['scanned'] += 1
+                name = os.path.relpath(path, media_root).replace(os.sep, '/')
+                if name in referenced:
+                    stats['referenced'] += 1
+                    continue
+                if stat.st_mtime > cutoff:
+                    stats['within grace'] += 1
+                    continue
+                if options['dry_run']:
+                    self.stdout.write(f'would remove {name}')
+                else:
+                    try:
+                        # A save may have touched the blob since the walk
+                        if os.stat(path).st_mtime > cutoff:
+                            stats['within grace'] += 1
+                            continue
+                        os.remove(path)
+                    except FileNotFoundError:
+                        continue
+                stats['removed'] += 1
+                stats['bytes'] += stat.st_size
+            if not options['dry_run']:
+                remove_empty_dirs(root)
+
+        verb = 'would remove' if options['dry_run'] else 'removed'
+        self.stdout.write(self.style.SUCCESS(
+            f'{stats["scanned"]} file(s) scanned, {stats["referenced"]} referenced, '
+            f'{stats["within grace"]} within the {options["grace"]}s grace period; '
+            f'{verb} {stats["removed"]} ({stats["bytes"]} bytes)'
+        ))
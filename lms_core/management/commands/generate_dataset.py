@@ -0,0 +1,226 @@
+import math
+import random
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from lms_core.caching import bump_catalog_version
+from lms_core.models import Category, Course, Enrollment, EnrollmentDailyRollup
+
+User = get_user_model()
+
+CATEGORIES = (
+    'Software Engineering', 'Artificial Intelligence', 'Cybersecurity', 'Data Science',
+    'Cloud & DevOps', 'Mobile Development', 'Design', 'Business', 'Languages', 'Music',
+)
+TOPICS = (
+    'Python', 'Django', 'React', 'Go', 'Rust', 'Kubernetes', 'SQL', 'Statistics', 'Machine Learning',
+    'Networking', 'Figma', 'Marketing', 'Spanish', 'Guitar', 'Linux', 'Security', 'Swift', 'Kotlin',
+)
+LEVELS = ('Foundations of', 'Practical', 'Advanced', 'Mastering', 'Hands-on', 'Intro to')
+
+
+@contextmanager
+def fast_bulk_load():
+    """Synthetic data can be regenerated, so trade durability for speed on SQLite."""
+    # The pragma cannot change inside a transaction (e.g. under TestCase).
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA synchronous')
+        previous = cursor.fetchone()[0]
+        cursor.execute('PRAGMA synchronous = OFF')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA synchronous = {int(previous)}')
+
+
+def count(value):
+    """Accept plain integers as well as 1e6-style counts."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise CommandError(f'Not a number: {value!r}')
+    if number < 0 or number != int(number):
+        raise CommandError(f'Counts must be non-negative integers: {value!r}')
+    return int(number)
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-load deterministic synthetic users, courses and enrollments for load testing, '
+        'e.g. generate_dataset --users 1e6 --courses 1e5 --enrollments 1e7'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=count, default=1000)
+        parser.add_argument('--courses', type=count, default=100)
+        parser.add_argument('--enrollments', type=count, default=10000)
+        parser.add_argument('--instructor-ratio', type=float, default=0.01,
+                            help='Share of generated users who are instructors.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=count, default=5000)
+        parser.add_argument('--password', default='synthetic',
+                            help='Password for every synthetic account (hashed once).')
+        parser.add_argument('--prefix', default='synthetic',
+                            help='Username prefix that marks generated accounts.')
+        parser.add_argument('--reset', action='store_true',
+                            help='Delete accounts (and their courses/enrollments) from an earlier run first.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = max(1, options['batch_size'])
+        self.prefix = f"{options['prefix']}_{options['seed']}_"
+        started = time.perf_counter()
+
+        existing = User.objects.filter(username__startswith=self.prefix)
+        if existing.exists():
+            if not options['reset']:
+                raise CommandError(f'Users prefixed {self.prefix!r} already exist; pass --reset to replace them.')
+            self.log('Deleting previous synthetic data')
+            self.delete_previous(existing)
+
+        n_users = options['users']
+        n_instructors = min(n_users, max(1, math.ceil(n_users * options['instructor_ratio']))) if n_users else 0
+        n_students = n_users - n_instructors
+        n_courses, n_enrollments = options['courses'], options['enrollments']
+        if n_courses and not n_instructors:
+            raise CommandError('Courses need at least one generated instructor (--users > 0).')
+        if n_enrollments and (not n_students or not n_courses):
+            raise CommandError('Enrollments need generated students and courses.')
+        if n_enrollments > n_students * n_courses:
+            raise CommandError(
+                f'{n_enrollments} enrollments exceed the {n_students} x {n_courses} unique (student, course) pairs.'
+            )
+
+        with fast_bulk_load():
+            password = make_password(options['password'])
+            instructor_ids = self.create_users(n_instructors, 'instructor', password)
+            student_ids = self.create_users(n_students, 'student', password, offset=n_instructors)
+            course_ids = self.create_courses(n_courses, instructor_ids)
+            self.create_enrollments(n_enrollments, student_ids, course_ids)
+
+        self.log('Refreshing derived data')
+        call_command('reconcile_stats', stdout=self.stdout)
+        call_command('reconcile_enrollment_counts', stdout=self.stdout)
+        call_command('backfill_enrollment_rollups', stdout=self.stdout)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.perf_counter() - started:.1f}s'))
+
+    def log(self, message):
+        self.stdout.write(message)
+        self.stdout.flush()
+
+    def delete_previous(self, users):
+        # Raw deletes skip the per-row signal handlers (stats, search, cache),
+        # which would take hours at this scale; everything derived is rebuilt
+        # after the load anyway.
+        with transaction.atomic():
+            for queryset in (
+                Enrollment.objects.filter(student__in=users),
+                Enrollment.objects.filter(course__instructor__in=users),
+                EnrollmentDailyRollup.objects.filter(course__instructor__in=users),
+                Course.objects.filter(instructor__in=users),
+                users,
+            ):
+                queryset._raw_delete(queryset.db)
+
+    def insert(self, model, rows, total, label, keep_pks=True):
+        """bulk_create ``rows`` (a generator) batch by batch; returns the new
+        pks, or an empty list with ``keep_pks=False``."""
+        pks, batch, done, started = [], [], 0, time.perf_counter()
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                pks += self.flush(model, batch, keep_pks)
+                done += len(batch)
+                batch = []
+                if done % (self.batch_size * 20) == 0:
+                    rate = done / (time.perf_counter() - started)
+                    self.log(f'  {label}: {done}/{total} ({rate:,.0f} rows/s)')
+        if batch:
+            pks += self.flush(model, batch, keep_pks)
+            done += len(batch)
+        if total:
+            self.log(f'{label}: {done} rows in {time.perf_counter() - started:.1f}s')
+        return pks
+
+    def flush(self, model, batch, keep_pks=True):
+        with transaction.atomic():
+            created = model.objects.bulk_create(batch, batch_size=self.batch_size)
+        if not keep_pks:
+            return []
+        return [obj.pk for obj in created] if created and created[0].pk is not None else []
+
+    def create_users(self, n, role, password, offset=0):
+        rng = self.rng
+        first_names = ('Ada', 'Alan', 'Grace', 'Linus', 'Barbara', 'Ken', 'Margaret', 'Dennis', 'Radia', 'Guido')
+        last_names = ('Lovelace', 'Turing', 'Hopper', 'Torvalds', 'Liskov', 'Thompson', 'Hamilton', 'Ritchie')
+        rows = (
+            User(
+                username=f'{self.prefix}{offset + i}',
+                email=f'{self.prefix}{offset + i}@example.com',
+                password=password,
+                role=role,
+                first_name=rng.choice(first_names),
+                last_name=rng.choice(last_names),
+            )
+            for i in range(n)
+        )
+        pks = self.insert(User, rows, n, f'{role}s')
+        if len(pks) != n:
+            pks = list(
+                User.objects.filter(username__startswith=self.prefix, role=role).order_by('id').values_list('id', flat=True)
+            )
+        return pks
+
+    def create_courses(self, n, instructor_ids):
+        rng = self.rng
+        categories = [Category.objects.get_or_create(name=name)[0] for name in CATEGORIES]
+        rows = (
+            Course(
+                title=f'{rng.choice(LEVELS)} {rng.choice(TOPICS)} #{i}',
+                description=f'Synthetic course {i} covering {", ".join(rng.sample(TOPICS, 3))}.',
+                category=rng.choice(categories),
+                instructor_id=rng.choice(instructor_ids),
+                duration=f'{rng.randint(2, 60)} Hours',
+                price=rng.choice((0, 19, 49, 89, 129, 199)),
+            )
+            for i in range(n)
+        )
+        pks = self.insert(Course, rows, n, 'courses')
+        if len(pks) != n:
+            pks = list(
+                Course.objects.filter(instructor__username__startswith=self.prefix).order_by('id').values_list('id', flat=True)
+            )
+        return pks
+
+    def create_enrollments(self, n, student_ids, course_ids):
+        """Spread ``n`` enrollments over the students. Student s takes courses
+        ``(start + j * step) % C`` for ``j < k_s``; with ``gcd(step, C) == 1``
+        and ``k_s <= C`` those are distinct, so unique_together always holds."""
+        rng = self.rng
+        n_courses = len(course_ids)
+        per_student, extra = divmod(n, len(student_ids)) if student_ids else (0, 0)
+        steps = [step for step in range(1, min(n_courses, 1000) + 1) if math.gcd(step, n_courses) == 1]
+
+        def rows():
+            for index, student_id in enumerate(student_ids):
+                taken = per_student + (1 if index < extra else 0)
+                if not taken:
+                    continue
+                start, step = rng.randrange(n_courses), rng.choice(steps)
+                for j in range(taken):
+                    yield Enrollment(student_id=student_id, course_id=course_ids[(start + j * step) % n_courses])
+
+        # Nothing reads the enrollment pks, which would be 1e7 ints at full scale
+        self.insert(Enrollment, rows(), n, 'enrollments', keep_pks=False)
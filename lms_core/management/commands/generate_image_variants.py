@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from lms_core import images
+
+
+class Command(BaseCommand):
+    help = 'Build missing or stale responsive variants for course thumbnails and avatars.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild variants that look current.')
+
+    def handle(self, *args, **options):
+        for model, image_field, meta_field in images.image_fields():
+            done = 0
+            rows = model.objects.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True})
+            for instance in rows.only('pk', image_field, meta_field).iterator():
+                if options['force']:
+                    model.objects.filter(pk=instance.pk).update(**{meta_field: {}})
+                elif not images.needs_variants(instance, image_field, meta_field):
+                    continue
+                images.refresh_variants(model._meta.label, instance.pk, image_field, meta_field)
+                done += 1
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {done} image(s) processed')
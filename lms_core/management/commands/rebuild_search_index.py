@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from lms_core import search
+from lms_core.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the course full-text search index, e.g. after bulk loads.'
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            self.stdout.write('Full-text index is SQLite only; nothing to rebuild.')
+            return
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {Course.objects.count()} course(s).'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+
+from lms_core.caching import bump_catalog_version
+from lms_core.enrollments import chunked
+from lms_core.models import Course
+
+# Drifted courses listed by name; the rest are only counted
+MAX_LISTED = 20
+
+
+class Command(BaseCommand):
+    help = 'Recount Course.enrollment_count from the enrollment rows and report any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drift without writing the recounted values.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drift = list(
+                Course.objects.annotate(actual=Course.counted_enrollments())
+                .exclude(enrollment_count=models.F('actual'))
+                .values_list('pk', 'title', 'enrollment_count', 'actual')
+                .iterator()
+            )
+            for pk, title, stored, actual in drift[:MAX_LISTED]:
+                self.stdout.write(self.style.WARNING(
+                    f'{title} (#{pk}): stored {stored}, actual {actual} (drift {stored - actual:+d})'
+                ))
+            if len(drift) > MAX_LISTED:
+                self.stdout.write(self.style.WARNING(f'... and {len(drift) - MAX_LISTED} more'))
+
+            if options['dry_run']:
+                self.stdout.write(f'{len(drift)} course(s) drifted; nothing written (--dry-run).')
+                return
+
+            for chunk in chunked([pk for pk, *_ in drift], 500):
+                Course.objects.filter(pk__in=chunk).update(enrollment_count=Course.counted_enrollments())
+
+        if drift:
+            # The cached catalog pages carry the old counts
+            bump_catalog_version()
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drift)} course(s).'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Enrollment counts are in sync.'))
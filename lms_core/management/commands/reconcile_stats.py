@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from lms_core.models import DashboardStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the dashboard counters from scratch and report any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report drift without writing the recomputed counters.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            stats = DashboardStats.objects.select_for_update().filter(pk=DashboardStats.SINGLETON_PK).first()
+            actual = DashboardStats.compute()
+            if stats is None:
+                stats = DashboardStats(pk=DashboardStats.SINGLETON_PK)
+                drift = {}
+                self.stdout.write('No stats row yet; creating it.')
+            else:
+                drift = {
+                    name: (getattr(stats, name), value)
+                    for name, value in actual.items()
+                    if getattr(stats, name) != value
+                }
+
+            for name, (stored, value) in drift.items():
+                self.stdout.write(self.style.WARNING(
+                    f'{name}: stored {stored}, actual {value} (drift {stored - value:+d})'
+                ))
+
+            if options['dry_run']:
+                self.stdout.write(f'{len(drift)} counter(s) drifted; nothing written (--dry-run).')
+                return
+
+            for name, value in actual.items():
+                setattr(stats, name, value)
+            stats.save()
+
+        if drift:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(drift)} counter(s).'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Counters are in sync.'))
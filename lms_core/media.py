@@ -0,0 +1,148 @@
+"""Serving ``MEDIA_ROOT`` in production.
+
+``serve_media`` replaces ``django.views.static.serve``, which is only meant
+for development:
+
+* Content-hashed names (see ``lms_core.storage``) are sent with a one-year
+  ``Cache-Control: public, immutable``. Other names get ``no-cache``, so
+  clients revalidate them.
+* Every response has an ETag and Last-Modified header. ``If-None-Match`` and
+  ``If-Modified-Since`` answer 304.
+* A single ``Range: bytes=`` range is answered with 206 and only those bytes,
+  honouring ``If-Range``. An unsatisfiable range gets 416. A multi-range
+  request gets the whole file.
+* With ``LMS_MEDIA_OFFLOAD = 'x-sendfile'`` (Apache mod_xsendfile, lighttpd)
+  or ``'x-accel-redirect'`` (nginx, with an ``internal`` location aliasing
+  ``LMS_MEDIA_ACCEL_PREFIX`` to MEDIA_ROOT), the response carries headers
+  only. The front server sends the bytes and handles ranges itself.
+* Paths with a component starting with ``.`` are 404, so the storage's
+  ``.incoming-*`` temporaries and other dotfiles are never served.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_safe
+
+from .storage import is_hashed, name_hash
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+CHUNK_SIZE = 64 * 1024
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def media_path(path):
+    if any(part.startswith('.') for part in re.split(r'[\\/]', path)):
+        raise Http404('Not found')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except ValueError:
+        raise Http404('Not found')
+    if not os.path.isfile(full_path):
+        raise Http404('Not found')
+    return full_path
+
+
+def file_etag(path, stat):
+    if is_hashed(path):
+        # The name already pins the content
+        return quote_etag(name_hash(path))
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}')
+
+
+def requested_range(request, size, etag, last_modified):
+    """``(start, end)`` (inclusive) of the one range to send, None for the
+    whole file, or False when the range cannot be satisfied."""
+    header = request.headers.get('Range')
+    if not header:
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        return None
+    match = RANGE.match(header.replace(' ', ''))
+    if match is None:
+        # Several ranges, or another unit: the whole file is a valid answer
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    elif last:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        return None
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def offload(response, path, full_path):
+    mode = getattr(settings, 'LMS_MEDIA_OFFLOAD', None)
+    if mode == 'x-sendfile':
+        response['X-Sendfile'] = full_path
+    elif mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'LMS_MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix + quote(path)
+    else:
+        return False
+    return True
+
+
+@require_safe
+def serve_media(request, path):
+    full_path = media_path(path)
+    stat = os.stat(full_path)
+    etag = file_etag(path, stat)
+    last_modified = int(stat.st_mtime)
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    headers = HttpResponse()
+    headers['ETag'] = etag
+    headers['Last-Modified'] = http_date(last_modified)
+    headers['Cache-Control'] = IMMUTABLE if is_hashed(path) else REVALIDATE
+    headers['Accept-Ranges'] = 'bytes'
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified, response=headers)
+    if not_modified is not headers:
+        return not_modified
+
+    byte_range = None if request.method == 'HEAD' else requested_range(request, stat.st_size, etag, last_modified)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+    elif offload(headers, path, full_path):
+        # The front server sends the body, and answers Range requests itself
+        response = headers
+        response['Content-Type'] = content_type
+    elif byte_range is not None:
+        start, end = byte_range
+        response = StreamingHttpResponse(read_range(full_path, start, end - start + 1), status=206,
+                                         content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+    else:
+        # A file response lets the server use wsgi.file_wrapper / sendfile()
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for header in ('ETag', 'Last-Modified', 'Cache-Control', 'Accept-Ranges'):
+        response[header] = headers[header]
+    return response
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.IntegerField(default=0)),
+                ('total_courses', models.IntegerField(default=0)),
+                ('total_enrollments', models.IntegerField(default=0)),
+                ('admin_users', models.IntegerField(default=0)),
+                ('instructor_users', models.IntegerField(default=0)),
+                ('student_users', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'dashboard stats',
+            },
+        ),
+    ]
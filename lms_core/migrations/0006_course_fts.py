@@ -0,0 +1,44 @@
+# Generated by Django 6.0 on 2026-10-18 02:40
+
+from django.conf import settings
+from django.db import migrations
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Course = apps.get_model('lms_core', 'Course')
+    Category = apps.get_model('lms_core', 'Category')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS lms_core_course_fts USING fts5("
+        "title, description, category, instructor, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        f"""
+        INSERT INTO lms_core_course_fts (rowid, title, description, category, instructor)
+        SELECT c.id, c.title, c.description, COALESCE(cat.name, ''),
+               TRIM(u.first_name || ' ' || u.last_name || ' ' || u.username)
+        FROM {Course._meta.db_table} c
+        LEFT JOIN {Category._meta.db_table} cat ON cat.id = c.category_id
+        JOIN {User._meta.db_table} u ON u.id = c.instructor_id
+        """
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS lms_core_course_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0005_dashboardstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
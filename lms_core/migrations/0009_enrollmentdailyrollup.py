@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0008_enrollment_recent_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('enrollments', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('course', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='lms_core.course')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('course', 'day'), name='rollup_course_day_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-18 15:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_enrollments(apps, schema_editor):
+    Course = apps.get_model('lms_core', 'Course')
+    Enrollment = apps.get_model('lms_core', 'Enrollment')
+    counts = (
+        Enrollment.objects.filter(course=models.OuterRef('pk')).order_by()
+        .values('course').annotate(count=models.Count('id')).values('count')
+    )
+    Course.objects.update(enrollment_count=Coalesce(models.Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lms_core', '0009_enrollmentdailyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='enrollment_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_enrollments, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['enrollment_count', 'id'], name='course_popularity_idx'),
+        ),
+    ]
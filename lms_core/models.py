@@ -1,6 +1,11 @@
+import asyncio
+
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
+from .deletes import CountedDeleteModel, CountedDeleteQuerySet
+
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
@@ -8,27 +13,216 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
-class Course(models.Model):
+class Course(CountedDeleteModel):
     title = models.CharField(max_length=200)
     description = models.TextField()
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='courses')
     instructor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='courses_taught')
     thumbnail = models.ImageField(upload_to='course_thumbnails/', null=True, blank=True)
+    # Derivatives written by lms_core.images
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     duration = models.CharField(max_length=50, blank=True, null=True, help_text="Duration of the course (e.g. '4 Weeks', '10 Hours')")
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    # Kept current by lms_core/signals.py and bulk_enroll, repaired by
+    # ``manage.py reconcile_enrollment_counts``
+    enrollment_count = models.IntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CountedDeleteQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='course_created_id_idx'),
+            # ... and on (enrollment_count, id) for ?ordering=-enrollment_count
+            models.Index(fields=['enrollment_count', 'id'], name='course_popularity_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # Only adjust_enrollment_counts writes enrollment_count: a full save
+        # would put back whatever this instance loaded, losing enrollments
+        # counted since
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'enrollment_count' and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def adjust_enrollment_counts(cls, deltas):
+        """Atomically add ``{course_id: delta}`` to the courses' enrollment
+        counts, in one UPDATE."""
+        deltas = {course: delta for course, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        if len(deltas) == 1:
+            [(course, delta)] = deltas.items()
+            change = models.Value(delta)
+        else:
+            change = models.Case(
+                *[models.When(pk=course, then=models.Value(delta)) for course, delta in deltas.items()],
+                default=models.Value(0), output_field=models.IntegerField(),
+            )
+        cls.objects.filter(pk__in=deltas).update(enrollment_count=models.F('enrollment_count') + change)
+
+    @classmethod
+    def counted_enrollments(cls):
+        """Each course's enrollment count from scratch, as a subquery."""
+        counts = (
+            Enrollment.objects.filter(course=models.OuterRef('pk')).order_by()
+            .values('course').annotate(count=models.Count('id')).values('count')
+        )
+        return Coalesce(models.Subquery(counts), 0)
+
 class Enrollment(models.Model):
-    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='enrollments')
-    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments')
+    # Both foreign keys lead the composite indexes in Meta, which replace the
+    # single-column ones Django would add.
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='enrollments', db_index=False)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrollments', db_index=False)
     enrolled_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CountedDeleteQuerySet.as_manager()
+
     class Meta:
         unique_together = ('student', 'course')
+        indexes = [
+            models.Index(fields=['enrolled_at', 'id'], name='enrollment_enrolled_id_idx'),
+            # A student's / a course's enrollments, newest first
+            models.Index(fields=['student', 'enrolled_at', 'id'], name='enrollment_student_recent_idx'),
+            models.Index(fields=['course', 'enrolled_at', 'id'], name='enrollment_course_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.username} -> {self.course.title}"
+
+class EnrollmentDailyRollup(models.Model):
+    """Enrollments and revenue per course per day, kept current by
+    ``lms_core.analytics`` and rebuilt by ``manage.py backfill_enrollment_rollups``."""
+
+    # The (course, day) constraint's index serves lookups by course
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_rollups', db_index=False)
+    day = models.DateField()
+    enrollments = models.IntegerField(default=0)
+    # Approximate: see lms_core/analytics.py
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'day'], name='rollup_course_day_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} {self.day}: {self.enrollments}"
+
+class DashboardStats(models.Model):
+    """Single-row counters behind DashboardStatsView, kept current by the
+    handlers in lms_core/signals.py and repaired by ``manage.py reconcile_stats``."""
+
+    SINGLETON_PK = 1
+
+    total_users = models.IntegerField(default=0)
+    total_courses = models.IntegerField(default=0)
+    total_enrollments = models.IntegerField(default=0)
+    admin_users = models.IntegerField(default=0)
+    instructor_users = models.IntegerField(default=0)
+    student_users = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'dashboard stats'
+
+    @staticmethod
+    def role_field(role):
+        return f'{role}_users'
+
+    @classmethod
+    def role_delta(cls, role, delta):
+        field = cls.role_field(role)
+        return {field: delta} if any(f.name == field for f in cls._meta.fields) else {}
+
+    @classmethod
+    def compute(cls):
+        """Count everything from scratch."""
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+
+        counts = {
+            'total_users': User.objects.count(),
+            'total_courses': Course.objects.count(),
+            'total_enrollments': Enrollment.objects.count(),
+        }
+        for role, _ in User.ROLE_CHOICES:
+            counts[cls.role_field(role)] = 0
+        for row in User.objects.values('role').annotate(count=models.Count('id')).order_by():
+            field = cls.role_field(row['role'])
+            if field in counts:
+                counts[field] = row['count']
+        return counts
+
+    @classmethod
+    async def acompute(cls):
+        """``compute`` for async views, issuing the four counts together."""
+        from django.contrib.auth import get_user_model
+        User = get_user_model()
+
+        users, courses, enrollments, roles = await asyncio.gather(
+            User.objects.acount(),
+            Course.objects.acount(),
+            Enrollment.objects.acount(),
+            cls.arole_counts(User),
+        )
+        counts = {'total_users': users, 'total_courses': courses, 'total_enrollments': enrollments}
+        for role, _ in User.ROLE_CHOICES:
+            counts[cls.role_field(role)] = 0
+        for role, count in roles:
+            field = cls.role_field(role)
+            if field in counts:
+                counts[field] = count
+        return counts
+
+    @staticmethod
+    async def arole_counts(User):
+        return [row async for row in User.objects.values_list('role').annotate(count=models.Count('id')).order_by()]
+
+    @classmethod
+    def load(cls):
+        stats = cls.objects.filter(pk=cls.SINGLETON_PK).first()
+        if stats is None:
+            stats, _ = cls.objects.get_or_create(pk=cls.SINGLETON_PK, defaults=cls.compute())
+        return stats
+
+    @classmethod
+    async def aload(cls):
+        stats = await cls.objects.filter(pk=cls.SINGLETON_PK).afirst()
+        if stats is None:
+            stats, _ = await cls.objects.aget_or_create(pk=cls.SINGLETON_PK, defaults=await cls.acompute())
+        return stats
+
+    @classmethod
+    def adjust(cls, **deltas):
+        """Atomically add ``deltas`` to the counters, e.g. ``adjust(total_users=1)``."""
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        updated = cls.objects.filter(pk=cls.SINGLETON_PK).update(
+            **{name: models.F(name) + delta for name, delta in deltas.items()}
+        )
+        if not updated:
+            # First write ever: the row starts from a full count, which already
+            # includes the change that triggered this call.
+            cls.load()
+
+    def role_distribution(self):
+        from django.contrib.auth import get_user_model
+
+        return [
+            {'role': role, 'count': getattr(self, self.role_field(role))}
+            for role, _ in get_user_model().ROLE_CHOICES
+            if getattr(self, self.role_field(role))
+        ]
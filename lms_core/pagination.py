@@ -0,0 +1,156 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks on the full ordering key.
+
+    The view declares ``ordering`` (e.g. ``('-created_at', '-id')``); the last
+    field must be unique. Cursors encode the key of the boundary row, so each
+    page is a ``WHERE key < cursor ORDER BY key LIMIT n`` range scan and a deep
+    page costs the same as the first one, unlike OFFSET.
+
+    Requests without ``cursor`` or ``page_size`` get the legacy unpaginated list
+    while ``LMS_LEGACY_UNPAGINATED_LISTS`` is on, so existing clients keep
+    receiving a plain array.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_legacy_request(request):
+            return None
+        return self.set_page(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, fetching through the async ORM."""
+        if self.is_legacy_request(request):
+            return None
+        return self.set_page([row async for row in self.page_queryset(queryset, request, view)])
+
+    def page_queryset(self, queryset, request, view):
+        """The seek query for the requested page, with one extra row to tell
+        whether another page follows."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, 'ordering', None) or ('-pk',))
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.descending = self.ordering[0].startswith('-')
+        if any(name.startswith('-') != self.descending for name in self.ordering):
+            raise ValueError('KeysetPagination requires every ordering field to share a direction.')
+
+        position, reverse = self.decode_cursor(request, queryset.model)
+        self.cursor_given = position is not None
+        self.reverse = reverse
+
+        # Walking backwards flips the sort and the comparison, then the page is
+        # put back in display order.
+        descending = self.descending != reverse
+        order = [('-' if descending else '') + name for name in self.fields]
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(position, descending))
+        return queryset.order_by(*order)[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+        return self.page
+
+    def is_legacy_request(self, request):
+        if not getattr(settings, 'LMS_LEGACY_UNPAGINATED_LISTS', False):
+            return False
+        params = request.query_params
+        return self.cursor_query_param not in params and self.page_size_query_param not in params
+
+    def get_page_size(self, request):
+        default = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 20
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            size = default
+        return max(1, min(size, self.max_page_size))
+
+    def keyset_filter(self, position, descending):
+        # (f1, f2, ...) < (v1, v2, ...) expanded as
+        #   f1 <= v1 AND (f1 < v1 OR (f2 <= v2 AND (f2 < v2 OR ...)))
+        # which keeps a range condition on the leading index column.
+        strict, loose = ('lt', 'lte') if descending else ('gt', 'gte')
+        condition = None
+        for name, value in reversed(list(zip(self.fields, position))):
+            if condition is None:
+                condition = Q(**{f'{name}__{strict}': value})
+            else:
+                condition = Q(**{f'{name}__{loose}': value}) & (Q(**{f'{name}__{strict}': value}) | condition)
+        return condition
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = payload['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.fields, values)
+            ]
+            return position, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        values = []
+        for name in self.fields:
+            value = getattr(row, 'pk' if name == 'pk' else name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps({'p': values, 'r': int(reverse)}, separators=(',', ':'), default=str)
+        encoded = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.page:
+            return None
+        # A backwards page always has rows after it: the ones we came from.
+        if self.reverse or self.has_more:
+            return self.encode_cursor(self.page[-1], reverse=False)
+        return None
+
+    def get_previous_link(self):
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param) if self.cursor_given else None
+        if self.reverse:
+            return self.encode_cursor(self.page[0], reverse=True) if self.has_more else None
+        return self.encode_cursor(self.page[0], reverse=True) if self.cursor_given else None
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
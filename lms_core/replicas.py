@@ -0,0 +1,172 @@
+"""Read replicas for the catalog and dashboard reads.
+
+``PrimaryReplicaRouter`` sends every write to ``default``. Reads go to
+``default`` too, unless the view serving the request opted in with
+``ReplicaReadsMixin``. Those views read from one of ``LMS_DATABASE_REPLICAS``,
+chosen once per request, when the request is a safe method and nothing makes
+the replica too stale to use:
+
+* the request has already written (it reads its own writes for the rest of
+  the request);
+* the same user wrote less than ``LMS_REPLICA_LAG`` seconds ago (a sticky
+  window that covers the replica catching up);
+* a fence named by the view was crossed less than ``LMS_REPLICA_LAG`` seconds
+  ago. The catalog views fence on every catalog change, so a response built
+  from a lagging replica is never cached under the new catalog version.
+
+``ReplicaRoutingMiddleware`` holds the per-request state and starts the
+sticky window of users who wrote. With no replicas configured, everything
+here is a no-op.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+CATALOG_FENCE = 'catalog'
+
+_routing = ContextVar('lms_db_routing', default=None)
+
+
+class RoutingState:
+    """Where the current request may read from."""
+
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+def replica_aliases():
+    return tuple(getattr(settings, 'LMS_DATABASE_REPLICAS', ()))
+
+
+def replica_lag():
+    return getattr(settings, 'LMS_REPLICA_LAG', 2)
+
+
+def routing_cache():
+    return caches[getattr(settings, 'LMS_REPLICA_CACHE', 'default')]
+
+
+def fence_key(name):
+    return f'lms:db:wrote:{name}'
+
+
+def user_fence(user):
+    return f'user:{user.pk}' if user is not None and user.is_authenticated else None
+
+
+def note_write(name):
+    """Keep reads fenced by ``name`` on the primary for the next
+    ``LMS_REPLICA_LAG`` seconds."""
+    if replica_aliases():
+        routing_cache().set(fence_key(name), 1, replica_lag())
+
+
+async def anote_write(name):
+    if replica_aliases():
+        await routing_cache().aset(fence_key(name), 1, replica_lag())
+
+
+def _candidate_keys(request, fences):
+    """The fence keys to check, or None when the request cannot use a replica."""
+    state = _routing.get()
+    if state is None or state.wrote or request.method not in SAFE_METHODS or not replica_aliases():
+        return None
+    names = [*fences, user_fence(getattr(request, 'user', None))]
+    return [fence_key(name) for name in names if name is not None]
+
+
+def use_replica(request, fences=()):
+    """Let the rest of ``request`` read from a replica unless its user, or one
+    of ``fences``, wrote within the replica lag."""
+    keys = _candidate_keys(request, fences)
+    if keys is not None and not (keys and routing_cache().get_many(keys)):
+        _routing.get().replica = random.choice(replica_aliases())
+
+
+async def ause_replica(request, fences=()):
+    keys = _candidate_keys(request, fences)
+    if keys is not None and not (keys and await routing_cache().aget_many(keys)):
+        _routing.get().replica = random.choice(replica_aliases())
+
+
+class ReplicaReadsMixin:
+    """Serve this view's safe requests from a read replica (see ``use_replica``)."""
+
+    # Fences whose recent writes keep this view on the primary
+    replica_fences = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        use_replica(request, self.replica_fences)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None:
+            return None
+        if state.wrote:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        return db not in replica_aliases()
+
+
+class ReplicaRoutingMiddleware:
+    """Scope ``PrimaryReplicaRouter`` decisions to one request, and open the
+    sticky window for users whose request wrote."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        name = user_fence(getattr(request, 'user', None)) if state.wrote else None
+        if name is not None:
+            note_write(name)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        # request.user may still be the session's lazy user, which queries
+        name = await sync_to_async(user_fence)(getattr(request, 'user', None)) if state.wrote else None
+        if name is not None:
+            await anote_write(name)
+        return response
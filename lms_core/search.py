@@ -0,0 +1,155 @@
+"""Full-text course search on an SQLite FTS5 index.
+
+``lms_core_course_fts`` holds one row per course (rowid = course id) with the
+course title and description, its category name and its instructor's name. The
+signal handlers in lms_core/signals.py keep it in sync; ``manage.py
+rebuild_search_index`` rebuilds it after bulk loads. Other database vendors
+fall back to an ``icontains`` scan without ranking or snippets.
+"""
+import html
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q
+
+from .models import Category, Course
+
+FTS_TABLE = 'lms_core_course_fts'
+
+# bm25 column weights: title, description, category, instructor
+BM25_WEIGHTS = (10.0, 1.0, 3.0, 3.0)
+SNIPPET_TOKENS = 16
+
+# Control characters survive FTS5 untouched and never appear in course text,
+# so the highlighted output can be HTML-escaped before they become <mark> tags.
+_MARK_OPEN, _MARK_CLOSE = '\x02', '\x03'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_enabled(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'sqlite'
+
+
+def _source_sql(where=''):
+    user_table = get_user_model()._meta.db_table
+    return f"""
+        SELECT c.id, c.title, c.description, COALESCE(cat.name, ''),
+               TRIM(u.first_name || ' ' || u.last_name || ' ' || u.username)
+        FROM {Course._meta.db_table} c
+        LEFT JOIN {Category._meta.db_table} cat ON cat.id = c.category_id
+        JOIN {user_table} u ON u.id = c.instructor_id
+        {where}
+    """
+
+
+def _reindex(where, params):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT c.id FROM {Course._meta.db_table} c {where})',
+            params,
+        )
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, category, instructor) {_source_sql(where)}',
+            params,
+        )
+
+
+def index_course(course_id):
+    _reindex('WHERE c.id = %s', [course_id])
+
+
+def index_category(category_id):
+    _reindex('WHERE c.category_id = %s', [category_id])
+
+
+def index_uncategorized():
+    _reindex('WHERE c.category_id IS NULL', [])
+
+
+def index_instructor(user_id):
+    _reindex('WHERE c.instructor_id = %s', [user_id])
+
+
+def remove_course(course_id):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [course_id])
+
+
+def rebuild_index():
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, description, category, instructor) {_source_sql()}'
+        )
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+
+def to_match_expression(query):
+    """Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix so results follow the user while typing. Returns '' when the
+    text has no searchable words."""
+    tokens = _TOKEN_RE.findall(query)
+    if not tokens:
+        return ''
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def _marked_to_html(text):
+    return html.escape(text or '').replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>')
+
+
+def search_courses(query, limit, using=DEFAULT_DB_ALIAS):
+    """Return ``[(course_id, rank, highlights)]`` best match first.
+
+    ``highlights`` has an HTML-escaped ``title`` with every hit wrapped in
+    ``<mark>`` and a ``description`` snippet around the best hit. ``using``
+    is the database to search, which should be the one the matching courses
+    are then read from: a replica may not have indexed what the primary has.
+    """
+    if not fts_enabled(using):
+        ids = (
+            Course.objects.using(using).filter(
+                Q(title__icontains=query)
+                | Q(description__icontains=query)
+                | Q(category__name__icontains=query)
+                | Q(instructor__username__icontains=query)
+                | Q(instructor__first_name__icontains=query)
+                | Q(instructor__last_name__icontains=query)
+            )
+            .order_by('-created_at', '-id')
+            .values_list('id', flat=True)[:limit]
+        )
+        return [(course_id, None, None) for course_id in ids]
+
+    expression = to_match_expression(query)
+    if not expression:
+        return []
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT rowid, bm25({FTS_TABLE}, {weights}) AS rank,
+                   highlight({FTS_TABLE}, 0, %s, %s),
+                   snippet({FTS_TABLE}, 1, %s, %s, '…', %s)
+            FROM {FTS_TABLE}
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY rank
+            LIMIT %s
+            """,
+            [_MARK_OPEN, _MARK_CLOSE, _MARK_OPEN, _MARK_CLOSE, SNIPPET_TOKENS, expression, limit],
+        )
+        rows = cursor.fetchall()
+    return [
+        (course_id, rank, {'title': _marked_to_html(title), 'description': _marked_to_html(snippet)})
+        for course_id, rank, title, snippet in rows
+    ]
@@ -1,5 +1,11 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
+from . import analytics
+from .images import ImageVariantsField
 from .models import Category, Course, Enrollment
+from .sparse import SparseFieldsetMixin
 from users.serializers import UserSerializer
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -7,18 +13,19 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = '__all__'
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     instructor_name = serializers.ReadOnlyField(source='instructor.username')
     category_name = serializers.ReadOnlyField(source='category.name')
     category_detail = CategorySerializer(source='category', read_only=True)
     instructor_detail = UserSerializer(source='instructor', read_only=True)
+    thumbnail_variants = ImageVariantsField()
 
     class Meta:
         model = Course
         fields = '__all__'
-        read_only_fields = ('instructor', 'created_at', 'updated_at')
+        read_only_fields = ('instructor', 'enrollment_count', 'created_at', 'updated_at')
 
-class EnrollmentSerializer(serializers.ModelSerializer):
+class EnrollmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     course_title = serializers.ReadOnlyField(source='course.title')
     student_name = serializers.ReadOnlyField(source='student.username')
     course_detail = CourseSerializer(source='course', read_only=True)
@@ -27,3 +34,62 @@ class EnrollmentSerializer(serializers.ModelSerializer):
         model = Enrollment
         fields = '__all__'
         read_only_fields = ('student', 'enrolled_at')
+
+class EnrollmentPairField(serializers.Field):
+    """``{"student": id, "course": id}`` -> ``(student_id, course_id)``."""
+    default_error_messages = {'invalid': 'Expected {{"student": <id>, "course": <id>}}.'}
+
+    def to_internal_value(self, data):
+        if not isinstance(data, dict):
+            self.fail('invalid')
+        try:
+            student, course = int(data['student']), int(data['course'])
+        except (KeyError, TypeError, ValueError):
+            self.fail('invalid')
+        return student, course
+
+class BulkEnrollmentSerializer(serializers.Serializer):
+    """Either explicit ``pairs`` or every combination of ``students`` x ``courses``."""
+    MAX_PAIRS = 100_000
+
+    pairs = serializers.ListField(child=EnrollmentPairField(), required=False)
+    students = serializers.ListField(child=serializers.IntegerField(), required=False)
+    courses = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    def validate(self, attrs):
+        if 'pairs' in attrs:
+            if 'students' in attrs or 'courses' in attrs:
+                raise serializers.ValidationError('Send either "pairs" or "students" and "courses", not both.')
+            pairs = attrs['pairs']
+        elif 'students' in attrs and 'courses' in attrs:
+            if len(attrs['students']) * len(attrs['courses']) > self.MAX_PAIRS:
+                raise serializers.ValidationError(f'At most {self.MAX_PAIRS} pairs per request.')
+            pairs = [(student, course) for student in attrs['students'] for course in attrs['courses']]
+        else:
+            raise serializers.ValidationError('Send "pairs", or both "students" and "courses".')
+        if len(pairs) > self.MAX_PAIRS:
+            raise serializers.ValidationError(f'At most {self.MAX_PAIRS} pairs per request.')
+        return {'pairs': pairs}
+
+class EnrollmentAnalyticsQuerySerializer(serializers.Serializer):
+    """Query string of the enrollment analytics endpoint. ``end`` defaults to
+    today and ``start`` to 30 days (or 12 weeks) before it."""
+    MAX_DAYS = 3 * 366
+    DEFAULT_DAYS = {analytics.DAY: 30, analytics.WEEK: 12 * 7}
+
+    period = serializers.ChoiceField(choices=analytics.PERIODS, default=analytics.DAY)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    course = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        end = attrs.get('end') or timezone.localdate()
+        start = attrs.get('start') or end - timedelta(days=self.DEFAULT_DAYS[attrs['period']] - 1)
+        if attrs['period'] == analytics.WEEK:
+            # Whole weeks only
+            start -= timedelta(days=start.weekday())
+        if start > end:
+            raise serializers.ValidationError('"start" must not be after "end".')
+        if (end - start).days >= self.MAX_DAYS:
+            raise serializers.ValidationError(f'At most {self.MAX_DAYS} days per request.')
+        return {**attrs, 'start': start, 'end': end}
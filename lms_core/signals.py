@@ -0,0 +1,152 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import analytics, deletes, images, search
+from .caching import bump_catalog_version
+from .models import Category, Course, DashboardStats, Enrollment
+
+# User columns that never show up in a course's instructor_detail
+USER_FIELDS_OUTSIDE_CATALOG = {'password', 'last_login'}
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_catalog_for_instructor(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields and set(update_fields) <= USER_FIELDS_OUTSIDE_CATALOG:
+        return
+    if Course.objects.filter(instructor=instance).exists():
+        bump_catalog_version()
+
+
+# Dashboard counters
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def remember_user_role(sender, instance, **kwargs):
+    # Read __dict__ so a deferred role column is not fetched here.
+    instance._stats_role = instance.__dict__.get('role')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def count_user_save(sender, instance, created, **kwargs):
+    previous, instance._stats_role = instance._stats_role, instance.role
+    if created:
+        DashboardStats.adjust(total_users=1, **DashboardStats.role_delta(instance.role, 1))
+    elif previous is not None and previous != instance.role:
+        DashboardStats.adjust(
+            **DashboardStats.role_delta(previous, -1),
+            **DashboardStats.role_delta(instance.role, 1),
+        )
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def count_user_delete(sender, instance, **kwargs):
+    DashboardStats.adjust(total_users=-1, **DashboardStats.role_delta(instance.role, -1))
+
+
+@receiver(post_save, sender=Course)
+def count_course_save(sender, instance, created, **kwargs):
+    if created:
+        DashboardStats.adjust(total_courses=1)
+
+
+@receiver(post_delete, sender=Course)
+def count_course_delete(sender, instance, **kwargs):
+    DashboardStats.adjust(total_courses=-1)
+
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment_save(sender, instance, created, **kwargs):
+    if created:
+        DashboardStats.adjust(total_enrollments=1)
+        Course.adjust_enrollment_counts({instance.course_id: 1})
+
+
+@receiver(post_delete, sender=Enrollment)
+def count_enrollment_delete(sender, instance, **kwargs):
+    # Batched per delete, see lms_core/deletes.py
+    deletes.enrollment_deleted(instance)
+
+
+# Enrollment analytics (count_enrollment_delete counts deletes out)
+
+@receiver(post_save, sender=Enrollment)
+def rollup_enrollment_save(sender, instance, created, **kwargs):
+    if created:
+        analytics.record_enrollments([instance])
+
+
+# Search index
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, **kwargs):
+    search.index_course(instance.pk)
+
+
+@receiver(post_delete, sender=Course)
+def unindex_course(sender, instance, **kwargs):
+    search.remove_course(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def index_category(sender, instance, created, **kwargs):
+    if not created:
+        search.index_category(instance.pk)
+
+
+@receiver(post_delete, sender=Category)
+def unindex_category(sender, instance, **kwargs):
+    # on_delete=SET_NULL has already detached the courses
+    search.index_uncategorized()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def index_instructor(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= USER_FIELDS_OUTSIDE_CATALOG):
+        return
+    search.index_instructor(instance.pk)
+
+
+# Image derivatives
+
+def _schedule_variants(instance, image_field, meta_field):
+    if {image_field, meta_field} & instance.get_deferred_fields():
+        return
+    images.schedule_variants(instance, image_field, meta_field)
+
+
+def _delete_variants(instance, image_field, meta_field):
+    meta = instance.__dict__.get(meta_field)
+    if meta:
+        storage = getattr(instance, image_field).storage
+        transaction.on_commit(lambda: images.delete_variants(storage, meta))
+
+
+@receiver(post_save, sender=Course)
+def course_thumbnail_variants(sender, instance, **kwargs):
+    _schedule_variants(instance, 'thumbnail', 'thumbnail_variants')
+
+
+@receiver(post_delete, sender=Course)
+def course_thumbnail_variants_delete(sender, instance, **kwargs):
+    _delete_variants(instance, 'thumbnail', 'thumbnail_variants')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_avatar_variants(sender, instance, **kwargs):
+    _schedule_variants(instance, 'avatar', 'avatar_variants')
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_avatar_variants_delete(sender, instance, **kwargs):
+    _delete_variants(instance, 'avatar', 'avatar_variants')
@@ -0,0 +1,116 @@
+"""Sparse fieldsets (``?fields=``) and expansion control (``?expand=``).
+
+``fields`` lists the keys to return. Dots reach into embedded objects, as in
+``?fields=id,title,instructor_detail.username``. ``expand`` names the
+embedded objects to include, as in ``?expand=course_detail.category_detail``.
+Without ``expand`` every embedded object is included, as before, and naming
+one in ``fields`` expands it implicitly. Unknown names are ignored.
+
+The view narrows its queryset to match. ``only()`` selects just the columns
+behind the chosen fields, and only the relations those fields traverse are
+joined. Both parameters apply to GET requests only.
+"""
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+def parse_spec(value):
+    """``"a,b.c,b.d"`` -> ``{'a': {}, 'b': {'c': {}, 'd': {}}}``; None when absent."""
+    if value is None:
+        return None
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def nested_serializer(field):
+    if isinstance(field, ListSerializer):
+        return field.child
+    return field if isinstance(field, BaseSerializer) else None
+
+
+def prune(serializer, fields=None, expand=None):
+    """Remove the fields of ``serializer`` (and its embedded serializers) that
+    the parsed ``fields``/``expand`` specs leave out."""
+    for name in list(serializer.fields):
+        nested = nested_serializer(serializer.fields[name])
+        if fields is not None and name not in fields:
+            del serializer.fields[name]
+        elif nested is not None and expand is not None and name not in expand and fields is None:
+            del serializer.fields[name]
+        elif nested is not None:
+            prune(
+                nested,
+                (fields.get(name) or None) if fields is not None else None,
+                expand.get(name, {}) if expand is not None else None,
+            )
+
+
+def requested_specs(request):
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None, None
+    params = getattr(request, 'query_params', request.GET)
+    return parse_spec(params.get(FIELDS_PARAM)), parse_spec(params.get(EXPAND_PARAM))
+
+
+def model_paths(serializer, prefix=''):
+    """``(only() paths, select_related() relations)`` behind the serializer's
+    fields, or None when a field's source cannot be mapped to columns."""
+    paths, relations = set(), set()
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            return None
+        source = prefix + field.source.replace('.', '__')
+        nested = nested_serializer(field)
+        if nested is not None:
+            inner = model_paths(nested, source + '__')
+            if inner is None:
+                return None
+            paths |= inner[0]
+            relations |= inner[1] | {source}
+        else:
+            paths.add(source)
+            if '__' in source[len(prefix):]:
+                relations.add(source.rsplit('__', 1)[0])
+    return paths, relations
+
+
+class SparseFieldsetMixin:
+    """Serializer side: prune ``self.fields`` from the request's query params.
+    Only the serializer a view builds gets the request at ``__init__``, so
+    embedded copies are pruned by their parent rather than twice."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = requested_specs(self.context.get('request'))
+        if fields is not None or expand is not None:
+            prune(self, fields, expand)
+
+
+class SparseQuerysetMixin:
+    """View side: defer the columns and joins the pruned serializer won't read."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, expand = requested_specs(self.request)
+        if fields is None and expand is None:
+            return queryset
+        spec = model_paths(self.get_serializer())
+        if spec is None:
+            return queryset
+        paths, relations = spec
+        # Keyset pagination reads the ordering columns off each row.
+        paths |= {name.lstrip('-') for name in getattr(self, 'ordering', ())}
+        paths.add('pk')
+        queryset = queryset.select_related(None)
+        if relations:
+            # A bare select_related() would follow every foreign key.
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*paths)
@@ -0,0 +1,112 @@
+"""Content-addressed media storage.
+
+``ContentAddressedStorage`` ignores the name it is given, apart from the
+extension. It stores each upload once, as ``blobs/ab/cd/<sha256><ext>``, so
+identical thumbnails, avatars and variants share one file however many rows
+point at them. A name only ever holds one content, so
+``lms_core.media.serve_media`` can serve it with ``Cache-Control: immutable``.
+
+Blobs are written to a temporary file and renamed into place, so a crash
+cannot leave a truncated file under a hash name. Because a blob may be shared,
+``delete()`` leaves blobs alone. ``manage.py gc_media`` removes the ones no
+row references once they are older than ``LMS_MEDIA_GC_GRACE``. Saving
+content that already exists refreshes the blob's mtime, which restarts that
+grace period.
+
+Names from earlier storages stay readable. The ``<stem>.<16 hex><ext>`` names
+written by the previous hashed storage are also treated as immutable.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+BLOB_ROOT = 'blobs'
+
+BLOB_NAME = re.compile(r'^%s/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[^./]+)?$' % BLOB_ROOT)
+# "<stem>.<hash><ext>" from the previous hashed storage
+LEGACY_HASHED_NAME = re.compile(r'\.([0-9a-f]{16})\.[^./]+$')
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def blob_name(digest, ext=''):
+    return f'{BLOB_ROOT}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}'
+
+
+def is_blob(name):
+    return bool(BLOB_NAME.match(name))
+
+
+def name_hash(name):
+    """The content hash a name carries, or None."""
+    match = BLOB_NAME.match(name) or LEGACY_HASHED_NAME.search(name)
+    return match.group(1) if match else None
+
+
+def is_hashed(name):
+    return name_hash(name) is not None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        blob = blob_name(content_hash(content), os.path.splitext(name)[1])
+        if not self.touch(blob):
+            self.write_blob(blob, content)
+        return blob
+
+    def touch(self, name):
+        """Mark ``name`` as just used, so gc_media leaves it alone for another
+        grace period. Returns False if it does not exist."""
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def write_blob(self, name, content):
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        handle = tempfile.NamedTemporaryFile(dir=directory, prefix='.incoming-', delete=False)
+        try:
+            with handle:
+                for chunk in content.chunks():
+                    handle.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(handle.name, self.file_permissions_mode)
+            # Racing writers of the same blob write the same bytes
+            os.replace(handle.name, path)
+        except BaseException:
+            if os.path.exists(handle.name):
+                os.remove(handle.name)
+            raise
+
+    def delete(self, name):
+        # Blobs may be shared between rows; gc_media removes unreferenced ones
+        if not is_blob(name):
+            super().delete(name)
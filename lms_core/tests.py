@@ -1,3 +1,1829 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.authentication import remember_state
+
+from . import deletes, enrollments, renderers, search
+from .compression import CompressionMiddleware, available_encodings, negotiate
+from .db import retry_when_locked
+from .models import Category, Course, DashboardStats, Enrollment, EnrollmentDailyRollup
+from .renderers import FastJSONParser, FastJSONRenderer
+from .serializers import CourseSerializer
+
+User = get_user_model()
+
+# Row counts the query budget suite is run against. Override with e.g.
+# QUERY_BUDGET_SIZES=10,100 for a quick local run.
+QUERY_BUDGET_SIZES = [
+    int(n) for n in os.environ.get('QUERY_BUDGET_SIZES', '10,1000,10000').split(',')
+]
+
+
+def auth_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+class QueryBudgetTests(TestCase):
+    """Every list/detail endpoint must run a fixed number of queries, however
+    many rows exist. JWT requests authenticate from the cached account state,
+    so they add nothing while it is warm."""
+
+    BATCH_SIZE = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('budget_student', password='pass', role='student')
+        cls.instructor = User.objects.create_user('budget_instructor', password='pass', role='instructor')
+        cls.admin = User.objects.create_user('budget_admin', password='pass', role='admin')
+        cls.seeded = 0
+
+    def seed(self, n):
+        """Grow the dataset to ``n`` categories, courses, users and enrollments."""
+        start, self.seeded = self.seeded, n
+        if n <= start:
+            return
+        User.objects.bulk_create(
+            [User(username=f'seed_user_{i}', password='!', role='student') for i in range(start, n)],
+            batch_size=self.BATCH_SIZE,
+        )
+        categories = Category.objects.bulk_create(
+            [Category(name=f'Category {i}') for i in range(start, n)],
+            batch_size=self.BATCH_SIZE,
+        )
+        courses = Course.objects.bulk_create(
+            [
+                Course(
+                    title=f'Course {i}',
+                    description='Seeded course',
+                    category=categories[i - start],
+                    instructor=self.instructor,
+                )
+                for i in range(start, n)
+            ],
+            batch_size=self.BATCH_SIZE,
+        )
+        Enrollment.objects.bulk_create(
+            [Enrollment(student=self.student, course=course) for course in courses],
+            batch_size=self.BATCH_SIZE,
+        )
+
+    def count_queries(self, client, url):
+        # Measure the uncached path; bulk_create does not invalidate the catalog.
+        cache.clear()
+        for user in (self.student, self.instructor, self.admin):
+            remember_state(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(ctx.captured_queries)
+
+    def assert_budget(self, budget, client, url_factory):
+        counts = {}
+        for n in QUERY_BUDGET_SIZES:
+            self.seed(n)
+            counts[n] = self.count_queries(client, url_factory())
+        self.assertEqual(set(counts.values()), {budget}, f'query counts by row count: {counts}')
+
+    def test_category_list(self):
+        self.assert_budget(1, APIClient(), lambda: '/api/lms/categories/')
+
+    def test_category_detail(self):
+        self.assert_budget(1, APIClient(), lambda: f'/api/lms/categories/{Category.objects.last().pk}/')
+
+    def test_course_list(self):
+        self.assert_budget(1, APIClient(), lambda: '/api/lms/courses/')
+
+    def test_course_detail(self):
+        self.assert_budget(1, APIClient(), lambda: f'/api/lms/courses/{Course.objects.last().pk}/')
+
+    def test_enrollment_list_as_student(self):
+        self.assert_budget(1, auth_client(self.student), lambda: '/api/lms/enrollments/')
+
+    def test_enrollment_list_as_instructor(self):
+        self.assert_budget(1, auth_client(self.instructor), lambda: '/api/lms/enrollments/')
+
+    def test_enrollment_detail(self):
+        self.assert_budget(
+            1,
+            auth_client(self.student),
+            lambda: f'/api/lms/enrollments/{Enrollment.objects.last().pk}/',
+        )
+
+    def test_dashboard_stats(self):
+        self.assert_budget(1, auth_client(self.admin), lambda: '/api/lms/dashboard/stats/')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+class QueryPlanTests(TestCase):
+    """Run EXPLAIN QUERY PLAN on every SELECT a hot path issues and fail on
+    full-table scans. Scanning a covering index for an aggregate is fine."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('plan_instructor', email='plan@example.com', password='pass',
+                                                  role='instructor')
+        cls.student = User.objects.create_user('plan_student', password='pass')
+        course = Course.objects.create(title='Plans', description='x', instructor=cls.instructor)
+        Enrollment.objects.create(student=cls.student, course=course)
+
+    def setUp(self):
+        cache.clear()
+
+    def plans(self, run):
+        with CaptureQueriesContext(connection) as ctx:
+            run()
+        plans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                if query['sql'].lstrip().upper().startswith('SELECT'):
+                    cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                    plans.append((query['sql'], [row[-1] for row in cursor.fetchall()]))
+        self.assertTrue(plans, 'nothing was queried')
+        return plans
+
+    def assert_no_full_scan(self, run, sorted_by_index=False):
+        for sql, details in self.plans(run):
+            scans = [line for line in details if re.match(r'SCAN \S+$', line)]
+            self.assertEqual(scans, [], f'{sql}\n' + '\n'.join(details))
+            if sorted_by_index:
+                self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', details, sql)
+
+    def get(self, client, url):
+        return lambda: self.assertEqual(client.get(url).status_code, 200)
+
+    def test_instructor_enrollments(self):
+        self.assert_no_full_scan(self.get(auth_client(self.instructor), '/api/lms/enrollments/?page_size=20'))
+
+    def test_student_enrollments(self):
+        self.assert_no_full_scan(self.get(auth_client(self.student), '/api/lms/enrollments/?page_size=20'),
+                                 sorted_by_index=True)
+
+    def test_password_reset_email_lookup(self):
+        self.assert_no_full_scan(lambda: APIClient().post('/api/auth/password-reset/', {'email': 'plan@example.com'}))
+
+    def test_role_counts(self):
+        self.assert_no_full_scan(DashboardStats.compute)
+
+    def test_course_catalog_default_ordering(self):
+        # The legacy unpaginated list returns every row, so only pages count.
+        Course.objects.create(title='Plans 2', description='x', instructor=self.instructor)
+        client = APIClient()
+        next_page = client.get('/api/lms/courses/?page_size=1').json()['next']
+        cache.clear()
+        self.assert_no_full_scan(self.get(client, '/api/lms/courses/?page_size=1'), sorted_by_index=True)
+        self.assert_no_full_scan(self.get(client, next_page), sorted_by_index=True)
+
+    def test_course_catalog_popularity_ordering(self):
+        Course.objects.create(title='Plans 2', description='x', instructor=self.instructor)
+        client = APIClient()
+        url = '/api/lms/courses/?ordering=-enrollment_count&page_size=1'
+        next_page = client.get(url).json()['next']
+        cache.clear()
+        self.assert_no_full_scan(self.get(client, url), sorted_by_index=True)
+        self.assert_no_full_scan(self.get(client, next_page), sorted_by_index=True)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('pager', password='pass', role='instructor')
+        Course.objects.bulk_create(
+            [Course(title=f'Course {i}', description='-', instructor=cls.instructor) for i in range(25)]
+        )
+        # Force ties on created_at so the id tie-breaker is exercised.
+        first_ids = Course.objects.order_by('id').values_list('id', flat=True)[:10]
+        Course.objects.filter(id__in=list(first_ids)).update(
+            created_at=Course.objects.order_by('id').first().created_at
+        )
+        cls.expected = list(Course.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, url):
+        pages = []
+        while url:
+            body = self.client.get(url).json()
+            pages.append([row['id'] for row in body['results']])
+            url = body['next']
+        return pages
+
+    def test_next_links_cover_every_row_once_in_order(self):
+        pages = self.walk('/api/lms/courses/?page_size=10')
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), self.expected)
+
+    def test_previous_link_returns_the_prior_page(self):
+        first = self.client.get('/api/lms/courses/?page_size=10').json()
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        third = self.client.get(second['next']).json()
+        back = self.client.get(third['previous']).json()
+        self.assertEqual(back['results'], second['results'])
+        back_again = self.client.get(back['previous']).json()
+        self.assertEqual(back_again['results'], first['results'])
+        self.assertIsNone(back_again['previous'])
+
+    def test_deep_page_is_a_single_seek_without_offset(self):
+        url = self.client.get('/api/lms/courses/?page_size=10').json()['next']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn('OFFSET', ctx.captured_queries[0]['sql'].upper())
+
+    def test_legacy_request_returns_plain_list(self):
+        body = self.client.get('/api/lms/courses/').json()
+        self.assertIsInstance(body, list)
+        self.assertEqual(len(body), 25)
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get('/api/lms/courses/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_enrollments_paginate_on_enrolled_at(self):
+        student = User.objects.create_user('pager_student', password='pass')
+        Enrollment.objects.bulk_create([Enrollment(student=student, course_id=pk) for pk in self.expected])
+        client = auth_client(student)
+        ids, url = [], '/api/lms/enrollments/?page_size=7'
+        while url:
+            body = client.get(url).json()
+            ids += [row['id'] for row in body['results']]
+            url = body['next']
+        self.assertEqual(
+            ids, list(Enrollment.objects.order_by('-enrolled_at', '-id').values_list('id', flat=True))
+        )
+
+
+class CatalogCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('cached', password='pass', role='instructor')
+        cls.category = Category.objects.create(name='Data')
+        cls.course = Course.objects.create(
+            title='Cached course', description='-', instructor=cls.instructor, category=cls.category
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeat_reads_skip_the_database(self):
+        for url in ('/api/lms/courses/', f'/api/lms/courses/{self.course.pk}/', '/api/lms/categories/'):
+            first = self.client.get(url)
+            with CaptureQueriesContext(connection) as ctx:
+                second = self.client.get(url)
+            self.assertEqual(len(ctx.captured_queries), 0, url)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.client.get('/api/lms/courses/')['ETag']
+        self.assertTrue(etag.startswith('"'))
+        response = self.client.get('/api/lms/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        stale = self.client.get('/api/lms/courses/', HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_course_save_invalidates(self):
+        etag = self.client.get('/api/lms/courses/')['ETag']
+        self.course.title = 'Renamed'
+        self.course.save()
+        response = self.client.get('/api/lms/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['title'], 'Renamed')
+
+    def test_category_delete_invalidates(self):
+        self.client.get('/api/lms/categories/')
+        self.category.delete()
+        self.assertEqual(self.client.get('/api/lms/categories/').json(), [])
+
+    def test_instructor_profile_change_invalidates(self):
+        self.client.get(f'/api/lms/courses/{self.course.pk}/')
+        self.instructor.first_name = 'Ada'
+        self.instructor.save()
+        body = self.client.get(f'/api/lms/courses/{self.course.pk}/').json()
+        self.assertEqual(body['instructor_detail']['first_name'], 'Ada')
+
+    def test_unrelated_user_change_keeps_cache(self):
+        student = User.objects.create_user('bystander', password='pass')
+        etag = self.client.get('/api/lms/courses/')['ETag']
+        student.first_name = 'Bob'
+        student.save()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/lms/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}
+            with override_settings(CACHES={'default': backend}):
+                first = self.client.get('/api/lms/courses/')
+                with CaptureQueriesContext(connection) as ctx:
+                    second = self.client.get('/api/lms/courses/')
+                self.assertEqual(len(ctx.captured_queries), 0)
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(
+                    self.client.get('/api/lms/courses/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304
+                )
+                self.course.save()
+                self.assertNotEqual(self.client.get('/api/lms/courses/')['ETag'], first['ETag'])
+
+
+class FastListTests(TestCase):
+    """The values_list() row mapper must render exactly what the serializers do."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('fast_teacher', email='f@example.com', password='pass',
+                                                  role='instructor', first_name='Grace', avatar='avatars/g.png')
+        cls.student = User.objects.create_user('fast_student', password='pass')
+        category = Category.objects.create(name='Systems')
+        variants = {'lqip': 'data:,', 'width': 640, 'variants': {'webp': {'320': 'course_thumbnails/a-320.webp'}}}
+        courses = [
+            Course.objects.create(title='Full', description='All fields', instructor=cls.instructor,
+                                  category=category, thumbnail='course_thumbnails/a.jpg',
+                                  thumbnail_variants=variants, duration='4 Weeks', price='19.90'),
+            Course.objects.create(title='Bare', description='No category or image', instructor=cls.instructor),
+        ]
+        for course in courses:
+            Enrollment.objects.create(student=cls.student, course=course)
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_same_output(self, client, url):
+        fast = client.get(url)
+        cache.clear()
+        with override_settings(LMS_FAST_LIST_READS=False):
+            slow = client.get(url)
+        cache.clear()
+        self.assertEqual(fast.status_code, 200, url)
+        self.assertEqual(fast.content, slow.content, url)
+
+    def test_course_list_matches_serializer(self):
+        for url in ('/api/lms/courses/', '/api/lms/courses/?page_size=1',
+                    '/api/lms/courses/?fields=id,price,category_detail.name,instructor_detail.avatar',
+                    '/api/lms/courses/?expand=category_detail'):
+            self.assert_same_output(self.client, url)
+
+    def test_enrollment_list_matches_serializer(self):
+        client = auth_client(self.student)
+        for url in ('/api/lms/enrollments/', '/api/lms/enrollments/?page_size=1',
+                    f'/api/lms/enrollments/?fields={SparseFieldsetTests.ENROLLMENT_CARD}'):
+            self.assert_same_output(client, url)
+        self.assert_same_output(auth_client(self.instructor), '/api/lms/enrollments/')
+
+    def test_cursor_links_match_serializer(self):
+        first = self.client.get('/api/lms/courses/?page_size=1').json()
+        self.assert_same_output(self.client, first['next'])
+        self.assertEqual(self.client.get(first['next']).json()['results'][0]['title'], 'Full')
+
+    def test_one_query_per_list(self):
+        remember_state(self.student)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(auth_client(self.student).get('/api/lms/enrollments/').status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+
+class SparseFieldsetTests(TestCase):
+    # What CourseList.jsx and Dashboard.jsx render on their cards
+    COURSE_CARD = ('id,title,description,price,duration,thumbnail,thumbnail_variants,category_name,'
+                   'instructor_detail.username,instructor_detail.first_name,instructor_detail.last_name,'
+                   'instructor_detail.avatar,instructor_detail.avatar_variants')
+    ENROLLMENT_CARD = ('id,course,course_title,course_detail.description,course_detail.duration,'
+                       'course_detail.instructor_name,course_detail.category_detail.name,'
+                       'course_detail.instructor_detail.first_name,course_detail.instructor_detail.last_name,'
+                       'course_detail.instructor_detail.avatar,course_detail.instructor_detail.avatar_variants')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('sparse_teacher', email='t@example.com', password='pass',
+                                                  role='instructor', first_name='Ada')
+        cls.student = User.objects.create_user('sparse_student', password='pass')
+        category = Category.objects.create(name='Data', description='Long category description ' * 20)
+        courses = Course.objects.bulk_create([
+            Course(title=f'Course {i}', description='Short blurb', instructor=cls.instructor, category=category)
+            for i in range(5)
+        ])
+        Enrollment.objects.bulk_create([Enrollment(student=cls.student, course=course) for course in courses])
+
+    def setUp(self):
+        cache.clear()
+
+    def select_sql(self, client, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response, ctx.captured_queries[-1]['sql']
+
+    def test_default_output_is_unchanged(self):
+        body = self.client.get('/api/lms/courses/').json()
+        self.assertIn('category_detail', body[0])
+        self.assertIn('email', body[0]['instructor_detail'])
+        self.assertIn('created_at', body[0])
+
+    def test_fields_pick_top_level_and_nested_keys(self):
+        body = self.client.get('/api/lms/courses/?fields=id,title,instructor_detail.username').json()
+        self.assertEqual(body[0].keys(), {'id', 'title', 'instructor_detail'})
+        self.assertEqual(body[0]['instructor_detail'], {'username': 'sparse_teacher'})
+
+    def test_expand_limits_embedded_objects(self):
+        body = self.client.get('/api/lms/courses/?expand=').json()
+        self.assertNotIn('instructor_detail', body[0])
+        self.assertNotIn('category_detail', body[0])
+        self.assertEqual(body[0]['instructor_name'], 'sparse_teacher')
+
+        client = auth_client(self.student)
+        row = client.get('/api/lms/enrollments/?expand=course_detail.category_detail').json()[0]
+        self.assertEqual(row['course_detail']['category_detail']['name'], 'Data')
+        self.assertNotIn('instructor_detail', row['course_detail'])
+        self.assertNotIn('course_detail', client.get('/api/lms/enrollments/?expand=').json()[0])
+
+    def test_query_selects_only_requested_columns_and_joins(self):
+        _, sql = self.select_sql(self.client, '/api/lms/courses/?fields=id,title')
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('JOIN', sql.upper())
+
+        _, sql = self.select_sql(self.client, '/api/lms/courses/?fields=id,instructor_detail.username')
+        self.assertIn('"users_user"."username"', sql)
+        self.assertNotIn('"users_user"."password"', sql)
+        self.assertNotIn('lms_core_category', sql)
+
+    def test_card_payloads_stay_small(self):
+        client = auth_client(self.student)
+        for full_url, card_url in (
+            ('/api/lms/courses/', f'/api/lms/courses/?fields={self.COURSE_CARD}'),
+            ('/api/lms/enrollments/', f'/api/lms/enrollments/?fields={self.ENROLLMENT_CARD}'),
+        ):
+            full = client.get(full_url)
+            card, _ = self.select_sql(client, card_url)
+            per_row = len(card.content) / len(card.json())
+            self.assertLess(per_row, 500, card_url)
+            self.assertLess(len(card.content), len(full.content) / 2, card_url)
+
+    def test_card_fields_cost_no_extra_queries(self):
+        client = auth_client(self.student)
+        remember_state(self.student)
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(f'/api/lms/enrollments/?fields={self.ENROLLMENT_CARD}')
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_paginated_sparse_page_keeps_cursor(self):
+        body = self.client.get('/api/lms/courses/?page_size=2&fields=title').json()
+        self.assertEqual(body['results'][0].keys(), {'title'})
+        following = self.client.get(body['next']).json()
+        self.assertEqual([row.keys() for row in following['results']], [{'title'}, {'title'}])
+
+    def test_writes_ignore_fields(self):
+        client = auth_client(self.instructor)
+        response = client.post('/api/lms/courses/?fields=id', {'title': 'New', 'description': 'd'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('instructor_detail', response.json())
+
+
+class FastJSONTests(TestCase):
+    SAMPLE = {
+        'when': datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+        'price': Decimal('19.90'),
+        'text': 'caf\u00e9 \u2028 line',
+        1: [None, True, 1.5],
+    }
+
+    def test_renderer_matches_drf(self):
+        expected = JSONRenderer().render(self.SAMPLE)
+        self.assertEqual(FastJSONRenderer().render(self.SAMPLE), expected)
+        with override_settings(LMS_ORJSON=False):
+            self.assertEqual(FastJSONRenderer().render(self.SAMPLE), expected)
+
+    def test_indented_output_still_works(self):
+        content = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(content, b'{\n  "a": 1\n}')
+
+    def test_parser_round_trip_and_errors(self):
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(BytesIO('{"title": "caf\u00e9"}'.encode())), {'title': 'caf\u00e9'})
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{"title": NaN}'))
+        with self.assertRaises(ParseError):
+            parser.parse(BytesIO(b'{nope'))
+
+    @skipUnless(renderers.orjson, 'orjson is not installed')
+    def test_orjson_is_used_when_installed(self):
+        with mock.patch.object(renderers.orjson, 'dumps', wraps=renderers.orjson.dumps) as dumps:
+            FastJSONRenderer().render({'a': 1})
+        dumps.assert_called_once()
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('zip_teacher', password='pass', role='instructor')
+        Course.objects.bulk_create([
+            Course(title=f'Compressible {i}', description='Repeated description text. ' * 10, instructor=instructor)
+            for i in range(20)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_negotiation(self):
+        self.assertEqual(negotiate('gzip, deflate, br, zstd', ['br', 'zstd', 'gzip']), 'br')
+        self.assertEqual(negotiate('gzip;q=0.5, zstd', ['br', 'zstd', 'gzip']), 'zstd')
+        self.assertEqual(negotiate('br', ['gzip']), None)
+        self.assertEqual(negotiate('*;q=0.3, gzip;q=0', ['gzip']), None)
+        self.assertEqual(negotiate('*', ['zstd', 'gzip']), 'zstd')
+        self.assertEqual(negotiate('', ['gzip']), None)
+
+    def test_catalog_is_gzipped_when_asked(self):
+        plain = self.client.get('/api/lms/courses/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get('/api/lms/courses/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertLess(len(response.content), len(plain.content) / 3)
+
+    def test_weakened_etag_still_revalidates(self):
+        etag = self.client.get('/api/lms/courses/', HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        response = self.client.get('/api/lms/courses/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(LMS_COMPRESSION_ENCODINGS=('br', 'zstd', 'gzip'))
+    def test_uses_best_available_coding(self):
+        response = self.client.get('/api/lms/courses/', HTTP_ACCEPT_ENCODING='br, zstd, gzip')
+        self.assertEqual(response['Content-Encoding'], available_encodings()[0])
+
+    def test_skips_small_and_incompressible_bodies(self):
+        small = self.client.get('/api/lms/courses/?fields=id&page_size=1', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+        middleware = CompressionMiddleware(lambda request: None)
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        image = HttpResponse(b'\x89PNG' + b'\0' * 5000, content_type='image/png')
+        self.assertFalse(middleware.process_response(request, image).has_header('Content-Encoding'))
+        encoded = HttpResponse(b'x' * 5000, content_type='application/json')
+        encoded['Content-Encoding'] = 'br'
+        self.assertEqual(middleware.process_response(request, encoded).content, b'x' * 5000)
+
+
+@override_settings(ROOT_URLCONF='backend.urls_asgi')
+class AsyncReadTests(TestCase):
+    """The async GET views behind backend/asgi.py answer byte for byte what
+    the sync views do, and hand everything else to them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('async_teacher', password='pass', role='instructor')
+        cls.admin = User.objects.create_user('async_admin', password='pass', role='admin')
+        cls.category = Category.objects.create(name='Async')
+        cls.course = Course.objects.create(title='Awaited', description='-', instructor=cls.instructor,
+                                           category=cls.category, price='5.00')
+        Course.objects.create(title='Second', description='-', instructor=cls.instructor)
+
+    def setUp(self):
+        cache.clear()
+
+    def headers(self, user=None):
+        return {'Authorization': f'Bearer {AccessToken.for_user(user)}'} if user else {}
+
+    async def assert_same_as_sync(self, url, user=None):
+        response = await self.async_client.get(url, headers=self.headers(user))
+        await cache.aclear()
+        with override_settings(ROOT_URLCONF='backend.urls'):
+            expected = await sync_to_async(self.client.get)(url, headers=self.headers(user))
+        await cache.aclear()
+        self.assertEqual(response.status_code, expected.status_code, url)
+        self.assertEqual(response.content, expected.content, url)
+        for header in ('Content-Type', 'Allow', 'Vary', 'ETag'):
+            self.assertEqual(response.get(header), expected.get(header), f'{url} {header}')
+        return response
+
+    async def test_reads_match_sync_views(self):
+        for url in ('/api/lms/courses/', '/api/lms/courses/?page_size=1', '/api/lms/courses/?fields=id,title',
+                    f'/api/lms/courses/{self.course.pk}/', '/api/lms/categories/',
+                    f'/api/lms/categories/{self.category.pk}/'):
+            await self.assert_same_as_sync(url)
+            await self.assert_same_as_sync(url, self.instructor)
+        await self.assert_same_as_sync('/api/lms/dashboard/stats/', self.admin)
+
+    async def test_errors_come_from_the_sync_views(self):
+        for url, user in (('/api/lms/courses/999999/', None), ('/api/lms/courses/abc/', None),
+                          ('/api/lms/courses/?cursor=bad', None), ('/api/lms/dashboard/stats/', None)):
+            await self.assert_same_as_sync(url, user)
+        browsable = await self.async_client.get('/api/lms/courses/?format=api')
+        self.assertEqual(browsable['Content-Type'], 'text/html; charset=utf-8')
+        response = await self.async_client.get('/api/lms/courses/', headers={'Authorization': 'Bearer junk'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_get_does_not_go_through_the_sync_view(self):
+        from .views import CourseViewSet
+
+        with mock.patch.object(CourseViewSet, 'list', side_effect=AssertionError('sync list called')):
+            response = await self.async_client.get('/api/lms/courses/')
+        self.assertEqual(response.status_code, 200)
+
+    async def test_catalog_cache_and_etags(self):
+        first = await self.async_client.get('/api/lms/courses/')
+        with mock.patch('lms_core.async_views.alist', side_effect=AssertionError('cache missed')):
+            again = await self.async_client.get('/api/lms/courses/', headers={'If-None-Match': first['ETag']})
+            cached = await self.async_client.get('/api/lms/courses/')
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(cached.content, first.content)
+
+    async def test_writes_still_work(self):
+        response = await self.async_client.post(
+            '/api/lms/courses/', {'title': 'Posted', 'description': '-'}, headers=self.headers(self.instructor),
+        )
+        self.assertEqual(response.status_code, 201)
+
+    async def test_stats_are_computed_concurrently_on_first_load(self):
+        await DashboardStats.objects.all().adelete()
+        stats = await DashboardStats.aload()
+        self.assertEqual(stats.total_courses, 2)
+        self.assertEqual(stats.instructor_users, 1)
+        self.assertEqual(await sync_to_async(DashboardStats.compute)(), await DashboardStats.acompute())
+
+
+
+@override_settings(LMS_DATABASE_REPLICAS=('replica',), LMS_REPLICA_LAG=60)
+class ReplicaRoutingTests(TransactionTestCase):
+    """Catalog and dashboard reads hit the replica; writes, and reads that
+    must see them, hit the primary. The replica is a second SQLite database
+    that only changes when ``sync_replica()`` copies the primary onto it."""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.instructor = User.objects.create_user('replica_teacher', password='pass', role='instructor')
+        self.admin = User.objects.create_user('replica_admin', password='pass', role='admin')
+        self.student = User.objects.create_user('replica_student', password='pass')
+        self.category = Category.objects.create(name='Replicated')
+        self.course = Course.objects.create(title='Primary title', description='-', instructor=self.instructor,
+                                            category=self.category)
+        self.sync_replica()
+        cache.clear()
+        # Only the replica says this, so a response that shows it came from there
+        Course.objects.using('replica').filter(pk=self.course.pk).update(title='Replica title')
+
+    def sync_replica(self):
+        primary, replica = connections['default'], connections['replica']
+        primary.ensure_connection()
+        replica.ensure_connection()
+        primary.connection.backup(replica.connection)
+
+    def client_for(self, user=None):
+        client = APIClient()
+        if user is not None:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def course_title(self, client):
+        return client.get(f'/api/lms/courses/{self.course.pk}/').json()['title']
+
+    def test_catalog_and_stats_reads_use_the_replica(self):
+        self.assertEqual(self.course_title(self.client_for()), 'Replica title')
+        list_titles = [c['title'] for c in self.client_for(self.student).get('/api/lms/courses/').json()]
+        self.assertEqual(list_titles, ['Replica title'])
+        DashboardStats.objects.using('replica').update(total_courses=99)
+        stats = self.client_for(self.admin).get('/api/lms/dashboard/stats/').json()
+        self.assertEqual(stats['total_courses'], 99)
+
+    @skipUnless(connection.vendor == 'sqlite', 'FTS5 search is SQLite only')
+    def test_search_matches_on_the_replica_it_reads_from(self):
+        # The primary has dropped the course from its index; the replica still has it
+        with connections['default'].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.FTS_TABLE} WHERE rowid = %s', [self.course.pk])
+        results = self.client_for().get('/api/lms/courses/', {'search': 'Primary'}).json()
+        self.assertEqual([course['title'] for course in results], ['Replica title'])
+
+    def test_other_views_read_the_primary(self):
+        Enrollment.objects.create(student=self.student, course=self.course)
+        enrollments = self.client_for(self.student).get('/api/lms/enrollments/').json()
+        self.assertEqual([e['course_title'] for e in enrollments], ['Primary title'])
+
+    def test_writes_go_to_the_primary_and_pin_the_writer(self):
+        writer = self.client_for(self.instructor)
+        response = writer.patch(f'/api/lms/courses/{self.course.pk}/', {'description': 'changed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # The write request read its own row back from the primary
+        self.assertEqual(response.json()['title'], 'Primary title')
+        self.assertEqual(Course.objects.using('replica').get(pk=self.course.pk).description, '-')
+        self.assertEqual(self.course_title(writer), 'Primary title')
+
+    def test_catalog_writes_fence_every_catalog_reader(self):
+        Course.objects.create(title='Fresh', description='-', instructor=self.instructor)
+        anonymous = self.client_for()
+        self.assertEqual(self.course_title(anonymous), 'Primary title')
+        # Stats are not fenced: they may trail by the replica lag
+        DashboardStats.objects.using('replica').update(total_courses=99)
+        stats = self.client_for(self.admin).get('/api/lms/dashboard/stats/').json()
+        self.assertEqual(stats['total_courses'], 99)
+
+    def test_sticky_window_ends_after_the_lag(self):
+        writer = self.client_for(self.instructor)
+        with override_settings(LMS_REPLICA_LAG=0):
+            writer.patch(f'/api/lms/courses/{self.course.pk}/', {'description': 'changed'}, format='json')
+            self.assertEqual(self.course_title(writer), 'Replica title')
+
+    async def test_async_reads_use_the_replica(self):
+        with override_settings(ROOT_URLCONF='backend.urls_asgi'):
+            response = await self.async_client.get(f'/api/lms/courses/{self.course.pk}/')
+        self.assertEqual(response.json()['title'], 'Replica title')
+
+    def test_no_replicas_means_no_routing(self):
+        with override_settings(LMS_DATABASE_REPLICAS=()):
+            self.assertEqual(self.course_title(self.client_for()), 'Primary title')
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('stats_admin', password='pass', role='admin')
+        self.instructor = User.objects.create_user('stats_instructor', password='pass', role='instructor')
+        self.student = User.objects.create_user('stats_student', password='pass')
+        self.course = Course.objects.create(title='Stats', description='-', instructor=self.instructor)
+        Enrollment.objects.create(student=self.student, course=self.course)
+
+    def assert_in_sync(self):
+        stats = DashboardStats.load()
+        self.assertEqual({name: getattr(stats, name) for name in DashboardStats.compute()}, DashboardStats.compute())
+
+    def test_view_reads_counters(self):
+        response = auth_client(self.admin).get('/api/lms/dashboard/stats/')
+        self.assertEqual(response.json(), {
+            'total_users': 3,
+            'total_courses': 1,
+            'total_enrollments': 1,
+            'role_distribution': [
+                {'role': 'admin', 'count': 1},
+                {'role': 'instructor', 'count': 1},
+                {'role': 'student', 'count': 1},
+            ],
+        })
+
+    def test_role_change_moves_counts(self):
+        self.student.role = 'instructor'
+        self.student.save()
+        self.assert_in_sync()
+        self.assertEqual(DashboardStats.load().instructor_users, 2)
+
+    def test_cascade_delete_updates_every_counter(self):
+        self.instructor.delete()
+        self.assert_in_sync()
+        stats = DashboardStats.load()
+        self.assertEqual((stats.total_users, stats.total_courses, stats.total_enrollments), (2, 0, 0))
+
+    def test_reconcile_reports_and_repairs_drift(self):
+        Course.objects.bulk_create([Course(title='Bulk', description='-', instructor=self.instructor)])
+        out = StringIO()
+        call_command('reconcile_stats', '--dry-run', stdout=out)
+        self.assertIn('total_courses: stored 1, actual 2', out.getvalue())
+        self.assertEqual(DashboardStats.load().total_courses, 1)
+
+        call_command('reconcile_stats', stdout=StringIO())
+        self.assert_in_sync()
+        out = StringIO()
+        call_command('reconcile_stats', stdout=out)
+        self.assertIn('in sync', out.getvalue())
+
+
+class EnrollmentCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.instructor = User.objects.create_user('popular', password='pass', role='instructor')
+        self.students = User.objects.bulk_create([User(username=f'fan_{i}', password='!') for i in range(6)])
+        self.courses = [
+            Course.objects.create(title=f'Popular {i}', description='-', instructor=self.instructor) for i in range(3)
+        ]
+
+    def counts(self):
+        courses = Course.objects.filter(pk__in=[course.pk for course in self.courses]).order_by('id')
+        return list(courses.values_list('enrollment_count', flat=True))
+
+    def test_counts_follow_creates_bulk_and_deletes(self):
+        Enrollment.objects.create(student=self.students[0], course=self.courses[0])
+        enrollments.bulk_enroll([(student.pk, course.pk) for student in self.students[:3]
+                                 for course in self.courses[1:]])
+        self.assertEqual(self.counts(), [1, 3, 3])
+        Enrollment.objects.filter(course=self.courses[1], student__in=self.students[:2]).delete()
+        self.assertEqual(self.counts(), [1, 1, 3])
+        # Deleting a student cascades to their enrollments
+        self.students[2].delete()
+        self.assertEqual(self.counts(), [1, 0, 2])
+        self.courses[2].delete()
+        self.assertEqual(DashboardStats.load().total_enrollments, Enrollment.objects.count())
+
+    def test_cascades_adjust_counters_once_per_delete(self):
+        def delete_queries(instance, students):
+            course = Course.objects.create(title='Crowded', description='-', instructor=self.instructor)
+            enrollments.bulk_enroll([(student.pk, course.pk) for student in students])
+            with CaptureQueriesContext(connection) as ctx:
+                (course if instance == 'course' else Enrollment.objects.filter(course=course)).delete()
+            self.assertEqual(DashboardStats.load().total_enrollments, Enrollment.objects.count())
+            return len(ctx.captured_queries)
+
+        many = User.objects.bulk_create([User(username=f'crowd_{i}', password='!') for i in range(40)])
+        for instance in ('course', 'queryset'):
+            self.assertEqual(delete_queries(instance, many[:2]), delete_queries(instance, many), instance)
+
+        # A student's cascade spans courses, each adjusted in the same UPDATE
+        enrollments.bulk_enroll([(self.students[0].pk, course.pk) for course in self.courses])
+        enrollments.bulk_enroll([(self.students[1].pk, self.courses[0].pk)])
+        self.students[0].delete()
+        self.assertEqual(self.counts(), [1, 0, 0])
+        self.assertEqual(sum(EnrollmentDailyRollup.objects.values_list('enrollments', flat=True)), 1)
+
+    def test_failed_delete_counts_nothing_and_leaves_no_batch(self):
+        enrollments.bulk_enroll([(student.pk, self.courses[0].pk) for student in self.students])
+        # The course's own post_delete runs after its enrollments are gone
+        with mock.patch.object(search, 'remove_course', side_effect=RuntimeError('index down')):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.courses[0].delete()
+        self.assertIsNone(deletes._deleted_enrollments.get())
+        self.assertEqual(self.counts(), [6, 0, 0])
+        self.assertEqual(DashboardStats.load().total_enrollments, 6)
+
+        self.courses[0].delete()
+        self.assertEqual(DashboardStats.load().total_enrollments, 0)
+        self.assertFalse(EnrollmentDailyRollup.objects.filter(enrollments__gt=0).exists())
+
+    def test_reconcile_reports_and_repairs_drift(self):
+        Enrollment.objects.bulk_create([Enrollment(student=student, course=self.courses[0]) for student in self.students])
+        out = StringIO()
+        call_command('reconcile_enrollment_counts', '--dry-run', stdout=out)
+        self.assertIn('Popular 0', out.getvalue())
+        self.assertIn('stored 0, actual 6', out.getvalue())
+        self.assertEqual(self.counts(), [0, 0, 0])
+
+        call_command('reconcile_enrollment_counts', stdout=StringIO())
+        self.assertEqual(self.counts(), [6, 0, 0])
+        out = StringIO()
+        call_command('reconcile_enrollment_counts', stdout=out)
+        self.assertIn('in sync', out.getvalue())
+
+    def test_popularity_ordering_pages_and_legacy_list(self):
+        for course, fans in zip(self.courses, (2, 5, 1)):
+            enrollments.bulk_enroll([(student.pk, course.pk) for student in self.students[:fans]])
+        expected = [self.courses[1].pk, self.courses[0].pk, self.courses[2].pk]
+
+        first = self.client.get('/api/lms/courses/?ordering=-enrollment_count&page_size=2').json()
+        self.assertEqual([(row['id'], row['enrollment_count']) for row in first['results']],
+                         [(expected[0], 5), (expected[1], 2)])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([row['id'] for row in second['results']], expected[2:])
+        legacy = self.client.get('/api/lms/courses/?ordering=-enrollment_count').json()
+        self.assertEqual([row['id'] for row in legacy], expected)
+        ascending = self.client.get('/api/lms/courses/?ordering=enrollment_count&page_size=3').json()
+        self.assertEqual([row['id'] for row in ascending['results']], expected[::-1])
+
+    def test_count_is_read_only(self):
+        client = auth_client(self.instructor)
+        response = client.patch(f'/api/lms/courses/{self.courses[0].pk}/', {'enrollment_count': 99}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['enrollment_count'], 0)
+
+    def test_full_saves_keep_counts_made_since_loading(self):
+        course = self.courses[0]
+        update = CourseSerializer.update
+
+        def enroll_then_update(serializer, instance, validated_data):
+            enrollments.enroll(self.students[0].pk, instance)
+            return update(serializer, instance, validated_data)
+
+        client = auth_client(self.instructor)
+        with mock.patch.object(CourseSerializer, 'update', enroll_then_update):
+            response = client.put(f'/api/lms/courses/{course.pk}/',
+                                  {'title': 'Renamed', 'description': '-', 'price': '5.00'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counts(), [1, 0, 0])
+
+        stale = Course.objects.get(pk=course.pk)
+        enrollments.enroll(self.students[1].pk, course)
+        stale.title = 'Renamed again'
+        stale.save()
+        self.assertEqual(self.counts(), [2, 0, 0])
+        self.assertEqual(Course.objects.get(pk=course.pk).title, 'Renamed again')
+
+
+class EnrollmentAnalyticsTests(TestCase):
+    url = '/api/lms/analytics/enrollments/'
+
+    def setUp(self):
+        self.admin = User.objects.create_user('analyst', password='pass', role='admin')
+        self.instructor = User.objects.create_user('teacher', password='pass', role='instructor')
+        other = User.objects.create_user('rival', password='pass', role='instructor')
+        self.students = User.objects.bulk_create([User(username=f'learner_{i}', password='!') for i in range(10)])
+        self.course = Course.objects.create(title='Charts', description='-', instructor=self.instructor, price=49)
+        self.free = Course.objects.create(title='Free', description='-', instructor=self.instructor, price=0)
+        self.foreign = Course.objects.create(title='Other', description='-', instructor=other, price=10)
+
+    def enroll_on(self, day, student, course):
+        enrollment = Enrollment.objects.create(student=student, course=course)
+        moment = datetime(day.year, day.month, day.day, 12, tzinfo=dt_timezone.utc)
+        Enrollment.objects.filter(pk=enrollment.pk).update(enrolled_at=moment)
+
+    def rollups(self):
+        return sorted(EnrollmentDailyRollup.objects.values_list('course_id', 'day', 'enrollments', 'revenue'))
+
+    def test_enrollments_update_todays_rollup(self):
+        today = timezone.localdate()
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        Enrollment.objects.create(student=self.students[1], course=self.course)
+        self.assertEqual(self.rollups(), [(self.course.pk, today, 2, Decimal('98.00'))])
+        Enrollment.objects.filter(student=self.students[0]).delete()
+        enrollments.bulk_enroll([(student.pk, self.free.pk) for student in self.students[:3]])
+        self.assertEqual(self.rollups(), [
+            (self.course.pk, today, 1, Decimal('49.00')), (self.free.pk, today, 3, Decimal('0.00')),
+        ])
+
+    def test_backfill_matches_incremental_rollups(self):
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        enrollments.bulk_enroll([(student.pk, course.pk) for student in self.students[:4]
+                                 for course in (self.free, self.foreign)])
+        incremental = self.rollups()
+        EnrollmentDailyRollup.objects.all().delete()
+        out = StringIO()
+        call_command('backfill_enrollment_rollups', stdout=out)
+        self.assertIn('Wrote 3 daily rollup row(s)', out.getvalue())
+        self.assertEqual(self.rollups(), incremental)
+
+    def test_series_by_day_and_week(self):
+        for i, day in enumerate((date(2026, 3, 2), date(2026, 3, 2), date(2026, 3, 4), date(2026, 3, 10))):
+            self.enroll_on(day, self.students[i], self.course)
+        self.enroll_on(date(2026, 3, 4), self.students[0], self.free)
+        self.enroll_on(date(2026, 3, 4), self.students[0], self.foreign)
+        call_command('backfill_enrollment_rollups', stdout=StringIO())
+        client = auth_client(self.instructor)
+
+        body = client.get(self.url, {'start': '2026-03-01', 'end': '2026-03-31'}).json()
+        self.assertEqual([row['title'] for row in body['courses']], ['Charts', 'Free'])
+        charts = body['courses'][0]
+        self.assertEqual((charts['enrollments'], charts['revenue']), (4, '196.00'))
+        self.assertEqual(charts['series'], [
+            {'date': '2026-03-02', 'enrollments': 2, 'revenue': '98.00'},
+            {'date': '2026-03-04', 'enrollments': 1, 'revenue': '49.00'},
+            {'date': '2026-03-10', 'enrollments': 1, 'revenue': '49.00'},
+        ])
+        self.assertEqual(body['totals']['series'][1], {'date': '2026-03-04', 'enrollments': 2, 'revenue': '49.00'})
+
+        # Weeks start on Monday, and a start date mid-week is moved back to it
+        body = client.get(self.url, {'period': 'week', 'start': '2026-03-04', 'end': '2026-03-15',
+                                     'course': self.course.pk}).json()
+        self.assertEqual(body['start'], '2026-03-02')
+        self.assertEqual([(row['date'], row['enrollments']) for row in body['courses'][0]['series']],
+                         [('2026-03-02', 3), ('2026-03-09', 1)])
+
+        admin = auth_client(self.admin).get(self.url, {'start': '2026-03-01', 'end': '2026-03-31'}).json()
+        self.assertEqual(admin['totals']['enrollments'], 6)
+
+    def test_queries_do_not_grow_with_enrollments(self):
+        client = auth_client(self.instructor)
+        params = {'start': '2026-01-01', 'end': '2026-12-31'}
+
+        def queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(client.get(self.url, params).status_code, 200)
+            return len(ctx.captured_queries)
+
+        self.enroll_on(date(2026, 1, 5), self.students[0], self.course)
+        call_command('backfill_enrollment_rollups', stdout=StringIO())
+        few = queries()
+        for i, student in enumerate(self.students[1:]):
+            self.enroll_on(date(2026, 1, 5) + timedelta(days=30 * i), student, self.course)
+            self.enroll_on(date(2026, 1, 5) + timedelta(days=30 * i), student, self.free)
+        call_command('backfill_enrollment_rollups', stdout=StringIO())
+        self.assertEqual(queries(), few)
+
+    def test_access_and_validation(self):
+        self.assertEqual(auth_client(self.students[0]).get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        client = auth_client(self.instructor)
+        self.assertEqual(client.get(self.url, {'course': self.foreign.pk}).status_code, 404)
+        for params in ({'start': '2026-03-02', 'end': '2026-03-01'}, {'start': '2020-01-01', 'end': '2026-01-01'},
+                       {'period': 'month'}, {'start': 'yesterday'}):
+            self.assertEqual(client.get(self.url, params).status_code, 400, params)
+        body = client.get(self.url).json()
+        self.assertEqual(body['end'], timezone.localdate().isoformat())
+        self.assertEqual(body['courses'], [])
+
+
+class BulkEnrollmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('cohort_admin', password='pass', role='admin')
+        instructor = User.objects.create_user('cohort_instructor', password='pass', role='instructor')
+        cls.students = User.objects.bulk_create([User(username=f'cohort_{i}', password='!') for i in range(30)])
+        cls.courses = Course.objects.bulk_create(
+            [Course(title=f'Cohort course {i}', description='x', instructor=instructor) for i in range(3)]
+        )
+        cls.url = '/api/lms/enrollments/bulk/'
+
+    def setUp(self):
+        DashboardStats.load()
+        self.client = auth_client(self.admin)
+
+    def test_students_times_courses(self):
+        student_ids = [s.pk for s in self.students]
+        course_ids = [c.pk for c in self.courses]
+        Enrollment.objects.create(student=self.students[0], course=self.courses[0])
+        total_before = DashboardStats.load().total_enrollments
+
+        response = self.client.post(self.url, {'students': student_ids, 'courses': course_ids}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual((body['created'], body['already_enrolled']), (89, 1))
+        self.assertEqual(body['results'][0], {
+            'student': student_ids[0], 'course': course_ids[0], 'status': 'already_enrolled',
+        })
+        self.assertEqual(Enrollment.objects.count(), 90)
+        self.assertEqual(DashboardStats.load().total_enrollments, total_before + 89)
+
+        again = self.client.post(self.url, {'students': student_ids, 'courses': course_ids}, format='json').json()
+        self.assertEqual((again['created'], again['already_enrolled']), (0, 90))
+
+    def test_pairs_report_each_outcome_once(self):
+        student, course = self.students[1].pk, self.courses[1].pk
+        pairs = [
+            {'student': student, 'course': course},
+            {'student': student, 'course': course},
+            {'student': 999999, 'course': course},
+            {'student': student, 'course': 999999},
+        ]
+        body = self.client.post(self.url, {'pairs': pairs}, format='json').json()
+        self.assertEqual([row['status'] for row in body['results']], ['created', 'unknown_student', 'unknown_course'])
+        self.assertEqual((body['created'], body['unknown_student'], body['unknown_course']), (1, 1, 1))
+
+    def test_queries_per_chunk_do_not_grow_with_the_cohort(self):
+        def queries(students):
+            body = {'students': [s.pk for s in students], 'courses': [c.pk for c in self.courses]}
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.post(self.url, body, format='json').status_code, 200)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(self.students[:3]), queries(self.students[3:30]))
+
+    def test_only_admins_may_bulk_enroll(self):
+        body = {'students': [self.students[0].pk], 'courses': [self.courses[0].pk]}
+        response = auth_client(self.students[0]).post(self.url, body, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Enrollment.objects.exists())
+
+    def test_invalid_payloads(self):
+        for body in (
+            {},
+            {'students': [1]},
+            {'pairs': [{'student': 1}]},
+            {'pairs': [], 'students': [1], 'courses': [1]},
+            {'students': list(range(1000)), 'courses': list(range(101))},
+        ):
+            self.assertEqual(self.client.post(self.url, body, format='json').status_code, 400, body)
+
+
+class IdempotentEnrollmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        instructor = User.objects.create_user('burst_instructor', password='pass', role='instructor')
+        cls.student = User.objects.create_user('burst_student', password='pass', role='student')
+        cls.course = Course.objects.create(title='Launch day', description='x', instructor=instructor)
+        cls.other = Course.objects.create(title='Launch day 2', description='x', instructor=instructor)
+
+    def setUp(self):
+        cache.clear()
+        self.client = auth_client(self.student)
+
+    def test_second_enrollment_returns_the_first(self):
+        first = self.client.post('/api/lms/enrollments/', {'course': self.course.pk})
+        second = self.client.post('/api/lms/enrollments/', {'course': self.course.pk})
+        self.assertEqual((first.status_code, second.status_code), (201, 200))
+        self.assertEqual(first.json()['id'], second.json()['id'])
+        self.assertEqual(Enrollment.objects.count(), 1)
+
+    def test_idempotency_key_replays_the_stored_response(self):
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'checkout-1'}
+        first = self.client.post('/api/lms/enrollments/', {'course': self.course.pk}, **headers)
+        Enrollment.objects.all().delete()
+        replay = self.client.post('/api/lms/enrollments/', {'course': self.course.pk}, **headers)
+        self.assertEqual((first.status_code, replay.status_code), (201, 201))
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertFalse(Enrollment.objects.exists())
+
+    def test_idempotency_key_reused_with_another_body_is_rejected(self):
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'checkout-2'}
+        self.client.post('/api/lms/enrollments/', {'course': self.course.pk}, **headers)
+        response = self.client.post('/api/lms/enrollments/', {'course': self.other.pk}, **headers)
+        self.assertEqual(response.status_code, 422)
+
+    def test_idempotency_keys_are_per_user(self):
+        other = User.objects.create_user('burst_other', password='pass')
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'same-key'}
+        self.client.post('/api/lms/enrollments/', {'course': self.course.pk}, **headers)
+        response = auth_client(other).post('/api/lms/enrollments/', {'course': self.course.pk}, **headers)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Enrollment.objects.count(), 2)
+
+    def test_failed_requests_release_the_key(self):
+        headers = {'HTTP_IDEMPOTENCY_KEY': 'checkout-3'}
+        self.assertEqual(self.client.post('/api/lms/enrollments/', {'course': 999999}, **headers).status_code, 400)
+        self.assertEqual(self.client.post('/api/lms/enrollments/', {'course': self.course.pk}, **headers).status_code, 201)
+
+    def test_locked_writes_are_retried(self):
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'ok'
+
+        self.assertEqual(retry_when_locked(flaky, base_delay=0), 'ok')
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_and_exhausted_retries_propagate(self):
+        def broken():
+            raise OperationalError('no such table: lms_core_enrollment')
+
+        def locked():
+            raise OperationalError('database is locked')
+
+        with self.assertRaisesMessage(OperationalError, 'no such table'):
+            retry_when_locked(broken, base_delay=0)
+        with self.assertRaisesMessage(OperationalError, 'locked'):
+            retry_when_locked(locked, attempts=2, base_delay=0)
+
+
+class EnrollmentBurstTests(TransactionTestCase):
+    """Concurrent double-clicking students against one course: every request
+    must be answered with 200/201 and each student enrolled exactly once.
+    benchmarks/enrollment_burst.py runs the same burst at scale on a file
+    database and reports enrollments/s."""
+
+    THREADS = 8
+    STUDENTS = 24
+
+    def test_burst_has_no_server_errors(self):
+        instructor = User.objects.create_user('burst_instructor', password='pass', role='instructor')
+        course = Course.objects.create(title='Launch day', description='x', instructor=instructor)
+        students = [User.objects.create_user(f'burst_{i}', password='pass') for i in range(self.STUDENTS)]
+        tokens = [str(AccessToken.for_user(student)) for student in students]
+        # Each student clicks twice, once with an Idempotency-Key.
+        jobs = [(token, key) for token in tokens for key in (None, f'click-{token[-12:]}')]
+
+        def post(job):
+            token, key = job
+            client = APIClient(raise_request_exception=False)
+            headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+            if key:
+                headers['HTTP_IDEMPOTENCY_KEY'] = key
+            try:
+                return client.post('/api/lms/enrollments/', {'course': course.pk}, **headers).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+            statuses = list(pool.map(post, jobs))
+
+        self.assertEqual([code for code in statuses if code >= 500], [])
+        self.assertEqual(set(statuses) - {200, 201}, set())
+        self.assertEqual(Enrollment.objects.filter(course=course).count(), self.STUDENTS)
+
+
+
+class BulkEnrollRaceTests(TransactionTestCase):
+    """An enroll() racing a bulk_enroll chunk for the same pair waits for the
+    chunk's write lock, so the pair is inserted and counted once."""
+
+    def test_enroll_during_a_chunk_is_counted_once(self):
+        instructor = User.objects.create_user('race_instructor', password='pass', role='instructor')
+        course = Course.objects.create(title='Race', description='-', instructor=instructor)
+        students = User.objects.bulk_create([User(username=f'racer_{i}', password='!') for i in range(2)])
+        bulk_create = Enrollment.objects.bulk_create
+        racing = {}
+
+        def enroll_elsewhere():
+            try:
+                racing['created'] = enrollments.enroll(students[0].pk, course)[1]
+            finally:
+                connection.close()
+
+        def racing_bulk_create(objs, **kwargs):
+            # The chunk has read the existing pairs; enroll() tries now
+            racing['thread'] = threading.Thread(target=enroll_elsewhere)
+            racing['thread'].start()
+            time.sleep(0.2)
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(Enrollment.objects, 'bulk_create', side_effect=racing_bulk_create):
+            results = enrollments.bulk_enroll([(student.pk, course.pk) for student in students])
+        racing['thread'].join()
+
+        self.assertEqual([status for _, _, status in results], ['created', 'created'])
+        self.assertIs(racing['created'], False)
+        course.refresh_from_db()
+        self.assertEqual(course.enrollment_count, 2)
+        self.assertEqual(DashboardStats.load().total_enrollments, 2)
+        self.assertEqual(sum(EnrollmentDailyRollup.objects.values_list('enrollments', flat=True)), 2)
+
+
+class SQLiteProfileTests(TestCase):
+    """New connections to a file database get the production profile from
+    settings.SQLITE_PRODUCTION_OPTIONS."""
+
+    def test_connections_are_tuned(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            primary = connections['default']
+            probe = type(primary)({**primary.settings_dict, 'NAME': os.path.join(tmp, 'probe.sqlite3')},
+                                  alias='profile_probe')
+            try:
+                with probe.cursor() as cursor:
+                    pragmas = {}
+                    for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size',
+                                 'temp_store'):
+                        cursor.execute(f'PRAGMA {name}')
+                        pragmas[name] = cursor.fetchone()[0]
+            finally:
+                probe.close()
+        self.assertEqual(pragmas, {
+            'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 20000, 'mmap_size': 134217728,
+            'cache_size': -32000, 'temp_store': 2,
+        })
+        self.assertEqual(probe.transaction_mode, 'IMMEDIATE')
+
+class CourseSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            'grace', password='pass', role='instructor', first_name='Grace', last_name='Hopper'
+        )
+        cls.category = Category.objects.create(name='Compilers')
+        cls.parsing = Course.objects.create(
+            title='Parsing <Techniques>', description='Recursive descent and LR parsing in depth.',
+            instructor=cls.instructor, category=cls.category,
+        )
+        cls.cooking = Course.objects.create(
+            title='Cooking basics', description='Knife skills, stocks and a little parsing of recipes.',
+            instructor=User.objects.create_user('chef', password='pass', role='instructor'),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def search(self, text):
+        return self.client.get('/api/lms/courses/', {'search': text}).json()
+
+    def test_ranks_title_hits_first_and_highlights(self):
+        results = self.search('parsing')
+        self.assertEqual([row['id'] for row in results], [self.parsing.pk, self.cooking.pk])
+        self.assertEqual(results[0]['search']['highlights']['title'], '<mark>Parsing</mark> &lt;Techniques&gt;')
+        self.assertIn('<mark>parsing</mark>', results[1]['search']['highlights']['description'])
+        self.assertLess(results[0]['search']['rank'], results[1]['search']['rank'])
+
+    def test_matches_category_instructor_and_prefix(self):
+        self.assertEqual([row['id'] for row in self.search('compil')], [self.parsing.pk])
+        self.assertEqual([row['id'] for row in self.search('hopper')], [self.parsing.pk])
+        self.assertEqual(self.search('"); DROP TABLE'), [])
+        self.assertEqual(self.search('!!!'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.category.name = 'Language Design'
+        self.category.save()
+        self.assertEqual([row['id'] for row in self.search('language')], [self.parsing.pk])
+
+        self.instructor.last_name = 'Lovelace'
+        self.instructor.save()
+        self.assertEqual(self.search('hopper'), [])
+        self.assertEqual([row['id'] for row in self.search('lovelace')], [self.parsing.pk])
+
+        self.category.delete()
+        self.assertEqual(self.search('language'), [])
+
+        self.cooking.delete()
+        self.assertEqual([row['id'] for row in self.search('parsing')], [self.parsing.pk])
+
+    def test_rebuild_command_picks_up_bulk_rows(self):
+        Course.objects.bulk_create([Course(title='Bulk loaded', description='-', instructor=self.instructor)])
+        self.assertEqual(self.search('bulk'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        cache.clear()
+        self.assertEqual(len(self.search('bulk')), 1)
+
+
+def make_jpeg(width=1200, height=800):
+    from io import BytesIO
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.linear_gradient('L').resize((width, height)).convert('RGB').save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        overrides = override_settings(MEDIA_ROOT=self.media.name, LMS_IMAGE_VARIANTS_ASYNC=False)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        cache.clear()
+        self.instructor = User.objects.create_user('painter', password='pass', role='instructor')
+
+    def create_course(self):
+        from django.core.files.base import ContentFile
+
+        course = Course(title='Drawing', description='-', instructor=self.instructor)
+        with self.captureOnCommitCallbacks(execute=True):
+            course.thumbnail.save('drawing.jpg', ContentFile(make_jpeg()), save=True)
+        course.refresh_from_db()
+        return course
+
+    def test_upload_writes_webp_variants_and_lqip(self):
+        from django.core.files.storage import default_storage
+
+        course = self.create_course()
+        meta = course.thumbnail_variants
+        self.assertEqual(meta['source'], course.thumbnail.name)
+        self.assertEqual(list(meta['variants']['webp']), ['320', '640', '960'])
+        original_size = default_storage.size(course.thumbnail.name)
+        for name in meta['variants']['webp'].values():
+            self.assertRegex(name, r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.webp$')
+            self.assertLess(default_storage.size(name), original_size)
+        self.assertTrue(meta['lqip'].startswith('data:image/webp;base64,'))
+        self.assertLess(len(meta['lqip']), 1000)
+
+    def test_serializer_exposes_srcset(self):
+        course = self.create_course()
+        body = self.client.get(f'/api/lms/courses/{course.pk}/').json()
+        variants = body['thumbnail_variants']
+        self.assertEqual(variants['width'], 1200)
+        self.assertEqual(variants['types'], {'webp': 'image/webp'})
+        self.assertRegex(variants['srcset']['webp'], r'^http://testserver/media/blobs/\S+/[0-9a-f]{64}\.webp 320w, ')
+        self.assertTrue(variants['srcset']['webp'].endswith('960w'))
+
+    def test_replacing_image_leaves_old_variants_to_gc_media(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+
+        course = self.create_course()
+        old = [course.thumbnail.name, *course.thumbnail_variants['variants']['webp'].values()]
+        with self.captureOnCommitCallbacks(execute=True):
+            course.thumbnail.save('small.png', ContentFile(make_jpeg(200, 100)), save=True)
+        course.refresh_from_db()
+        self.assertEqual(list(course.thumbnail_variants['variants']['webp']), ['200'])
+        self.assertTrue(all(default_storage.exists(name) for name in old))
+        call_command('gc_media', grace=0, stdout=StringIO())
+        self.assertFalse(any(default_storage.exists(name) for name in old))
+        current = [course.thumbnail.name, *course.thumbnail_variants['variants']['webp'].values()]
+        self.assertTrue(all(default_storage.exists(name) for name in current))
+
+    def test_avatar_upload_through_profile(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        client = auth_client(self.instructor)
+        upload = SimpleUploadedFile('me.jpg', make_jpeg(800, 800), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.put('/api/auth/profile/', {'avatar': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        body = client.get('/api/auth/profile/').json()
+        self.assertIn('320w', body['avatar_variants']['srcset']['webp'])
+
+    def test_backfill_command(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+
+        name = default_storage.save('course_thumbnails/legacy.jpg', ContentFile(make_jpeg()))
+        course = Course.objects.create(title='Legacy', description='-', instructor=self.instructor)
+        Course.objects.filter(pk=course.pk).update(thumbnail=name)
+        call_command('generate_image_variants', stdout=StringIO())
+        course.refresh_from_db()
+        self.assertEqual(course.thumbnail_variants['source'], name)
+
+
+
+class MediaServingTests(TestCase):
+    """Uploads get content-hashed names, which /media/ serves as immutable,
+    with conditional and range requests, or hands to the front server."""
+
+    def setUp(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        overrides = override_settings(MEDIA_ROOT=self.media.name, LMS_IMAGE_VARIANTS_ASYNC=False)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.body = bytes(range(256)) * 40
+        self.name = default_storage.save('course_thumbnails/clip.jpg', ContentFile(self.body))
+        self.url = f'/media/{self.name}'
+
+    def test_names_are_the_content_hash(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+
+        digest = hashlib.sha256(self.body).hexdigest()
+        self.assertEqual(self.name, f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg')
+        # The same bytes under any name are stored once
+        self.assertEqual(default_storage.save('avatars/other.JPG', ContentFile(self.body)), self.name)
+        self.assertEqual(len(os.listdir(os.path.dirname(default_storage.path(self.name)))), 1)
+        long_name = default_storage.save('avatars/' + 'x' * 200 + '.png', ContentFile(b'png'), max_length=100)
+        self.assertLessEqual(len(long_name), 100)
+
+    def test_serializers_emit_the_hashed_urls(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        instructor = User.objects.create_user('framer', password='pass', role='instructor')
+        client = auth_client(instructor)
+        upload = SimpleUploadedFile('me.jpg', make_jpeg(40, 40), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            avatar = client.put('/api/auth/profile/', {'avatar': upload}, format='multipart').json()['avatar']
+        self.assertRegex(avatar, r'^http://testserver/media/blobs/[0-9a-f/]{6}[0-9a-f]{64}\.jpg$')
+        Course.objects.create(title='Framed', description='-', instructor=instructor, thumbnail=self.name)
+        self.assertEqual(self.client.get('/api/lms/courses/').json()[0]['thumbnail'], f'http://testserver{self.url}')
+        self.assertEqual(self.client.get(avatar).status_code, 200)
+
+    def test_hashed_files_are_immutable(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Length'], str(len(self.body)))
+
+    def test_legacy_names_are_revalidated(self):
+        os.makedirs(os.path.join(self.media.name, 'course_thumbnails'))
+        with open(os.path.join(self.media.name, 'course_thumbnails', 'old.jpg'), 'wb') as handle:
+            handle.write(b'old')
+        response = self.client.get('/media/course_thumbnails/old.jpg')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        again = self.client.get('/media/course_thumbnails/old.jpg', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(again.status_code, 304)
+
+    def test_conditional_requests(self):
+        first = self.client.get(self.url)
+        for headers in ({'If-None-Match': first['ETag']}, {'If-Modified-Since': first['Last-Modified']}):
+            response = self.client.get(self.url, headers=headers)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': '"other"'}).status_code, 200)
+
+    def test_ranges(self):
+        size = len(self.body)
+        for header, start, end in (('bytes=0-99', 0, 99), ('bytes=1000-', 1000, size - 1),
+                                   ('bytes=-10', size - 10, size - 1), ('bytes=100-999999', 100, size - 1)):
+            response = self.client.get(self.url, headers={'Range': header})
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{size}')
+            self.assertEqual(b''.join(response.streaming_content), self.body[start:end + 1])
+        unsatisfiable = self.client.get(self.url, headers={'Range': f'bytes={size}-'})
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable['Content-Range'], f'bytes */{size}')
+        # A stale If-Range, or several ranges, get the whole file
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': etag}).status_code, 206)
+        self.assertEqual(self.client.get(self.url, headers={'Range': 'bytes=0-9', 'If-Range': '"old"'}).status_code, 200)
+        self.assertEqual(self.client.get(self.url, headers={'Range': 'bytes=0-1,5-9'}).status_code, 200)
+
+    def test_offload_modes(self):
+        with override_settings(LMS_MEDIA_OFFLOAD='x-sendfile'):
+            response = self.client.get(self.url, headers={'Range': 'bytes=0-9'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.media.name, self.name))
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        with override_settings(LMS_MEDIA_OFFLOAD='x-accel-redirect', LMS_MEDIA_ACCEL_PREFIX='/internal/'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/internal/{self.name}')
+
+    def test_missing_and_escaping_paths_are_404(self):
+        for url in ('/media/course_thumbnails/nope.jpg', '/media/../manage.py', '/media/%2E%2E/manage.py',
+                    '/media/course_thumbnails/'):
+            self.assertIn(self.client.get(url).status_code, (400, 404), url)
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    def test_dotfiles_are_404(self):
+        blob_dir = os.path.dirname(self.name)
+        for name in ('.sync-media-cache.json', f'{blob_dir}/.incoming-abc123', '.hidden/clip.jpg'):
+            path = os.path.join(self.media.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as handle:
+                handle.write(b'private')
+            self.assertEqual(self.client.get(f'/media/{name}').status_code, 404, name)
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        overrides = override_settings(MEDIA_ROOT=self.media.name, LMS_IMAGE_VARIANTS_ASYNC=False)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.instructor = User.objects.create_user('archivist', password='pass', role='instructor')
+
+    def save(self, body, name='course_thumbnails/x.jpg'):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+
+        return default_storage.save(name, ContentFile(body))
+
+    def age(self, name, seconds):
+        from django.core.files.storage import default_storage
+
+        then = time.time() - seconds
+        os.utime(default_storage.path(name), (then, then))
+
+    def gc(self, *args):
+        out = StringIO()
+        call_command('gc_media', *args, stdout=out)
+        return out.getvalue()
+
+    def test_delete_keeps_shared_blobs_and_saving_touches_them(self):
+        from django.core.files.storage import default_storage
+
+        name = self.save(b'shared')
+        default_storage.delete(name)
+        self.assertTrue(default_storage.exists(name))
+        self.age(name, 3600)
+        self.assertEqual(self.save(b'shared', 'avatars/y.jpg'), name)
+        self.assertGreater(os.path.getmtime(default_storage.path(name)), time.time() - 60)
+        self.assertFalse(default_storage.touch('blobs/00/00/' + '0' * 64))
+
+    def test_gc_removes_only_old_unreferenced_blobs(self):
+        from django.core.files.storage import default_storage
+
+        kept = self.save(b'kept')
+        Course.objects.create(title='Kept', description='-', instructor=self.instructor, thumbnail=kept)
+        orphan, fresh = self.save(b'orphan'), self.save(b'fresh')
+        for name in (kept, orphan):
+            self.age(name, 2 * 24 * 3600)
+
+        output = self.gc('--dry-run')
+        self.assertIn(f'would remove {orphan}', output)
+        self.assertTrue(default_storage.exists(orphan))
+
+        output = self.gc()
+        self.assertIn('3 file(s) scanned, 1 referenced, 1 within', output)
+        self.assertIn('removed 1 (6 bytes)', output)
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertFalse(os.path.exists(os.path.dirname(default_storage.path(orphan))))
+        self.assertTrue(default_storage.exists(kept))
+        self.assertTrue(default_storage.exists(fresh))
+        self.gc('--grace', '0')
+        self.assertFalse(default_storage.exists(fresh))
+
+    def test_gc_keeps_variants_and_sweeps_legacy_names_on_request(self):
+        from django.core.files.base import ContentFile
+
+        course = Course(title='Sketching', description='-', instructor=self.instructor)
+        with self.captureOnCommitCallbacks(execute=True):
+            course.thumbnail.save('sketch.jpg', ContentFile(make_jpeg()), save=True)
+        course.refresh_from_db()
+        self.assertIn('removed 0', self.gc('--grace', '0'))
+
+        legacy = os.path.join(self.media.name, 'course_thumbnails')
+        os.makedirs(legacy)
+        for name in ('old.jpg', 'used.jpg'):
+            with open(os.path.join(legacy, name), 'wb') as handle:
+                handle.write(b'legacy')
+        Course.objects.create(title='Old', description='-', instructor=self.instructor,
+                              thumbnail='course_thumbnails/used.jpg')
+        self.assertIn('removed 0', self.gc('--grace', '0'))
+        self.assertIn('removed 1', self.gc('--grace', '0', '--legacy'))
+        self.assertEqual(os.listdir(legacy), ['used.jpg'])
+
+
+class AssetHandler(BaseHTTPRequestHandler):
+    """Stand-in image host: serves ``assets`` with ETags and honours If-None-Match."""
+
+    assets = {}
+    log = []
+
+    def do_GET(self):
+        body = self.assets.get(self.path)
+        self.log.append((self.path, self.headers.get('If-None-Match')))
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SyncMediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), AssetHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        state = tempfile.TemporaryDirectory()
+        self.addCleanup(state.cleanup)
+        self.cache = os.path.join(state.name, 'sync-media.json')
+        overrides = override_settings(
+            MEDIA_ROOT=self.media.name, LMS_SYNC_MEDIA_CACHE=self.cache, LMS_IMAGE_VARIANTS_ASYNC=False,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        AssetHandler.assets = {'/react.jpg': make_jpeg(64, 48), '/face.jpg': make_jpeg(40, 40), '/alt.jpg': make_jpeg(30, 30)}
+        AssetHandler.log = []
+
+        self.instructors = [
+            User.objects.create_user(f'mentor_{i}', password='pass', role='instructor') for i in range(3)
+        ]
+        self.course = Course.objects.create(
+            title='React in Practice', description='-', instructor=self.instructors[0]
+        )
+        self.manifest = os.path.join(self.media.name, 'manifest.json')
+        with open(self.manifest, 'w') as handle:
+            json.dump({
+                'courses': [{'keyword': 'React', 'url': f'{self.base_url}/react.jpg'}],
+                'avatars': [f'{self.base_url}/face.jpg', f'{self.base_url}/alt.jpg'],
+            }, handle)
+
+    def sync(self):
+        out = StringIO()
+        call_command('sync_media', manifest=self.manifest, workers=4, stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def media_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media.name)
+            for root, _, names in os.walk(self.media.name)
+            for name in names
+            if name.endswith('.jpg')
+        )
+
+    def test_first_run_downloads_each_url_once(self):
+        output = self.sync()
+        self.assertIn('3 URL(s), 3 downloaded', output)
+        self.assertEqual(len(AssetHandler.log), 3)
+        self.course.refresh_from_db()
+        self.assertTrue(self.course.thumbnail.name.startswith('blobs/'))
+        avatars = [user.avatar.name for user in User.objects.filter(role='instructor').order_by('id')]
+        # Two instructors share face.jpg, which is written once and linked.
+        self.assertEqual(avatars[0], avatars[2])
+        self.assertEqual(len(self.media_files()), 3)
+        # The cache lives outside the served MEDIA_ROOT
+        self.assertTrue(os.path.exists(self.cache))
+        self.assertFalse(any(name.startswith('.') for name in os.listdir(self.media.name)))
+
+    def test_second_run_revalidates_and_writes_nothing(self):
+        self.sync()
+        files = {name: os.path.getmtime(os.path.join(self.media.name, name)) for name in self.media_files()}
+        AssetHandler.log = []
+        output = self.sync()
+        self.assertIn('0 downloaded', output)
+        self.assertIn('4 unchanged', output)
+        self.assertTrue(all(etag for _, etag in AssetHandler.log))
+        self.assertEqual(
+            {name: os.path.getmtime(os.path.join(self.media.name, name)) for name in self.media_files()}, files
+        )
+
+    def test_changed_asset_is_rewritten(self):
+        self.sync()
+        old = Course.objects.get(pk=self.course.pk).thumbnail.name
+        AssetHandler.assets['/react.jpg'] = make_jpeg(80, 60)
+        output = self.sync()
+        self.assertIn('1 downloaded', output)
+        self.assertIn('1 written', output)
+        self.assertNotEqual(Course.objects.get(pk=self.course.pk).thumbnail.name, old)
+
+    def test_failed_fetch_is_reported(self):
+        del AssetHandler.assets['/alt.jpg']
+        output = self.sync()
+        self.assertIn('1 failed', output)
+
+
+class GenerateDatasetTests(TestCase):
+    def generate(self, *args):
+        call_command('generate_dataset', '--users', '50', '--courses', '1e1', '--enrollments', '200', '--seed', '7',
+                     *args, stdout=StringIO())
+
+    def snapshot(self):
+        return sorted(Enrollment.objects.values_list('student__username', 'course__title'))
+
+    def test_generates_requested_rows_with_one_password_hash(self):
+        self.generate()
+        users = User.objects.filter(username__startswith='synthetic_7_')
+        self.assertEqual(users.count(), 50)
+        self.assertEqual(users.filter(role='instructor').count(), 1)
+        self.assertEqual(Course.objects.count(), 10)
+        self.assertEqual(Enrollment.objects.count(), 200)
+        self.assertEqual(users.values('password').distinct().count(), 1)
+        self.assertTrue(users.first().check_password('synthetic'))
+        self.assertEqual(DashboardStats.load().total_enrollments, 200)
+
+    def test_is_deterministic_and_resettable(self):
+        self.generate()
+        first = self.snapshot()
+        with self.assertRaises(CommandError):
+            self.generate()
+        self.generate('--reset')
+        self.assertEqual(self.snapshot(), first)
+        self.assertEqual(Course.objects.count(), 10)
+
+    def test_rejects_more_enrollments_than_unique_pairs(self):
+        with self.assertRaises(CommandError):
+            call_command('generate_dataset', '--users', '3', '--courses', '2', '--enrollments', '5', stdout=StringIO())
+
+
+class GenerateDatasetResetTests(TransactionTestCase):
+    """--reset commits its raw deletes on their own, so foreign keys are
+    checked there and not only at the end of the load."""
+
+    def test_reset_replaces_a_previous_load(self):
+        call_command('generate_dataset', users=200, courses=20, enrollments=500, stdout=StringIO())
+        call_command('generate_dataset', users=200, courses=20, enrollments=500, reset=True, stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__startswith='synthetic_42_').count(), 200)
+        self.assertEqual(Course.objects.count(), 20)
+        self.assertEqual(Enrollment.objects.count(), 500)
+        rollups = EnrollmentDailyRollup.objects.all()
+        self.assertEqual(sum(rollups.values_list('enrollments', flat=True)), 500)
+        self.assertEqual(DashboardStats.load().total_enrollments, 500)
+
+
+class EndpointBenchmarkTests(TestCase):
+    """Keeps benchmarks/endpoints.py runnable as the routes evolve."""
+
+    def test_every_scenario_runs_cleanly_in_process(self):
+        from django.conf import settings
+
+        from benchmarks import endpoints
+
+        middleware = ['benchmarks.endpoints.QueryCountMiddleware', *settings.MIDDLEWARE]
+        with override_settings(MIDDLEWARE=middleware):
+            results = endpoints.run_benchmark(
+                endpoints.InProcessTransport(), endpoints.SCENARIOS, requests=2, concurrency=1
+            )
+        self.assertEqual(set(results), {scenario.name for scenario in endpoints.SCENARIOS})
+        for name, row in results.items():
+            self.assertEqual(row['errors'], 0, f'{name}: {row["statuses"]}')
+            self.assertIsNotNone(row['latency_ms']['p99'], name)
+            self.assertIsNotNone(row['queries']['max'], name)
+
+    def test_compare_flags_latency_query_and_size_regressions(self):
+        from benchmarks.endpoints import compare_reports
+
+        def report(p95, queries, size):
+            return {'endpoints': {'courses-list': {
+                'latency_ms': {'p95': p95}, 'queries': {'max': queries}, 'bytes_mean': size, 'errors': 0,
+            }}}
+
+        _, regressions = compare_reports(report(10.0, 1, 1000), report(10.5, 1, 1100))
+        self.assertEqual(regressions, [])
+        _, regressions = compare_reports(report(10.0, 1, 1000), report(20.0, 2, 2000))
+        self.assertEqual(len(regressions[0][1]), 3)
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, CourseViewSet, EnrollmentViewSet, DashboardStatsView
+from .views import CategoryViewSet, CourseViewSet, EnrollmentViewSet, DashboardStatsView, EnrollmentAnalyticsView
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet)
@@ -10,4 +10,5 @@ router.register(r'enrollments', EnrollmentViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('dashboard/stats/', DashboardStatsView.as_view(), name='dashboard-stats'),
+    path('analytics/enrollments/', EnrollmentAnalyticsView.as_view(), name='enrollment-analytics'),
 ]
@@ -2,10 +2,21 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.views import APIView
-from django.db.models import Count
 from django.contrib.auth import get_user_model
-from .models import Category, Course, Enrollment
-from .serializers import CategorySerializer, CourseSerializer, EnrollmentSerializer
+from django.http import Http404
+from users.views import IsAdminRole
+from . import analytics, enrollments, search
+from .caching import CatalogCacheMixin
+from .db import retry_when_locked
+from .idempotency import IdempotentCreateMixin
+from .models import Category, Course, DashboardStats, Enrollment
+from .replicas import CATALOG_FENCE, ReplicaReadsMixin
+from .rows import FastListMixin
+from .serializers import (
+    BulkEnrollmentSerializer, CategorySerializer, CourseSerializer, EnrollmentAnalyticsQuerySerializer,
+    EnrollmentSerializer,
+)
+from .sparse import SparseQuerysetMixin
 
 User = get_user_model()
 
@@ -22,43 +33,194 @@ class IsInstructorOrAdminOrReadOnly(permissions.BasePermission):
         if request.user.role == 'admin':
             return True
         # Instructor can only modify their own courses
-        return obj.instructor == request.user
+        return obj.instructor_id == request.user.id
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class IsInstructorOrAdmin(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.role in ['instructor', 'admin']
+
+# Query budgets are fixed regardless of row count (JWT requests authenticate
+# from the cached account state, see users.authentication) and are enforced by
+# QueryBudgetTests in lms_core/tests.py. Category and course reads served from
+# the catalog cache run none at all.
+#   categories list/detail ........ 1
+#   courses list/detail ........... 1
+#   enrollments list/detail ....... 1
+#   dashboard stats ............... 1
+#   enrollment analytics .......... 2 (rollups, then course titles)
+# ?fields= / ?expand= (see lms_core.sparse) narrow the columns and joins of
+# the course and enrollment reads without changing these counts.
+
+class CategoryViewSet(ReplicaReadsMixin, CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = None
+    replica_fences = (CATALOG_FENCE,)
 
-class CourseViewSet(viewsets.ModelViewSet):
-    queryset = Course.objects.all()
+class CourseViewSet(ReplicaReadsMixin, CatalogCacheMixin, FastListMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
+    # CourseSerializer reads instructor and category on every row
+    queryset = Course.objects.select_related('instructor', 'category')
     serializer_class = CourseSerializer
     permission_classes = [IsInstructorOrAdminOrReadOnly]
+    replica_fences = (CATALOG_FENCE,)
+    # ?ordering= values; each key ends on the unique id for keyset pagination
+    # and is backed by an index on Course
+    orderings = {
+        '-created_at': ('-created_at', '-id'),
+        'created_at': ('created_at', 'id'),
+        '-enrollment_count': ('-enrollment_count', '-id'),
+        'enrollment_count': ('enrollment_count', 'id'),
+    }
+    default_ordering = '-created_at'
+
+    @property
+    def ordering(self):
+        params = getattr(getattr(self, 'request', None), 'query_params', {})
+        return self.orderings.get(params.get('ordering'), self.orderings[self.default_ordering])
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if 'ordering' in self.request.query_params:
+            # Pages are ordered by the paginator; this orders the legacy unpaginated list
+            queryset = queryset.order_by(*self.ordering)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if 'search' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        return self.serve_cached(self.search_list, request, *args, **kwargs)
+
+    def search_list(self, request, *args, **kwargs):
+        """``?search=`` returns the best matches ranked by bm25, each with a
+        ``search`` object holding the rank and highlighted title/snippet."""
+        limit = self.paginator.get_page_size(request)
+        queryset = self.get_queryset()
+        # Match and hydrate on the same database, replica or primary
+        hits = search.search_courses(request.query_params['search'], limit, using=queryset.db)
+        courses = queryset.in_bulk([course_id for course_id, _, _ in hits])
+        results = []
+        for course_id, rank, highlights in hits:
+            if course_id not in courses:
+                continue
+            row = self.get_serializer(courses[course_id]).data
+            row['search'] = {'rank': rank, 'highlights': highlights}
+            results.append(row)
+        return Response(results)
 
     def perform_create(self, serializer):
         serializer.save(instructor=self.request.user)
 
-class EnrollmentViewSet(viewsets.ModelViewSet):
-    queryset = Enrollment.objects.all()
+class EnrollmentViewSet(IdempotentCreateMixin, FastListMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Enrollment.objects.select_related(
+        'student', 'course__instructor', 'course__category'
+    )
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    ordering = ('-enrolled_at', '-id')
 
-    def perform_create(self, serializer):
-        serializer.save(student=self.request.user)
+    def create(self, request, *args, **kwargs):
+        return self.serve_idempotent(self.enroll, request, *args, **kwargs)
+
+    def enroll(self, request, *args, **kwargs):
+        """Enrolling twice is not an error: the existing enrollment comes back
+        with 200 instead of 201."""
+        serializer = self.get_serializer(data=request.data)
+        # Validation reads the course, which can also hit a locked database.
+        retry_when_locked(lambda: serializer.is_valid(raise_exception=True))
+        enrollment, created = enrollments.enroll(request.user.id, serializer.validated_data['course'])
+        # One joined read for the response instead of lazy loads per relation
+        enrollment = retry_when_locked(lambda: self.queryset.get(pk=enrollment.pk))
+        data = self.get_serializer(enrollment).data
+        if created:
+            return Response(data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(data))
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsAdminRole])
+    def bulk(self, request):
+        """Enroll a cohort: ``pairs`` of {student, course}, or ``students`` x
+        ``courses``. Answers 200 with one result per distinct pair."""
+        serializer = BulkEnrollmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = enrollments.bulk_enroll(serializer.validated_data['pairs'])
+        summary = dict.fromkeys(
+            (enrollments.CREATED, enrollments.ALREADY_ENROLLED, enrollments.UNKNOWN_STUDENT, enrollments.UNKNOWN_COURSE), 0,
+        )
+        for _, _, outcome in results:
+            summary[outcome] += 1
+        return Response({
+            **summary,
+            'results': [
+                {'student': student, 'course': course, 'status': outcome} for student, course, outcome in results
+            ],
+        })
 
     def get_queryset(self):
         user = self.request.user
         if user.role == 'instructor':
-            return Enrollment.objects.filter(course__instructor=user)
-        return Enrollment.objects.filter(student=user)
+            return self.queryset.filter(course__instructor_id=user.id)
+        return self.queryset.filter(student_id=user.id)
 
-class DashboardStatsView(APIView):
+class DashboardStatsView(ReplicaReadsMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        data = {
-            'total_users': User.objects.count(),
-            'total_courses': Course.objects.count(),
-            'total_enrollments': Enrollment.objects.count(),
-            'role_distribution': User.objects.values('role').annotate(count=Count('role'))
+        return Response(self.stats_data(DashboardStats.load()))
+
+    @staticmethod
+    def stats_data(stats):
+        return {
+            'total_users': stats.total_users,
+            'total_courses': stats.total_courses,
+            'total_enrollments': stats.total_enrollments,
+            'role_distribution': stats.role_distribution(),
         }
-        return Response(data)
+
+class EnrollmentAnalyticsView(ReplicaReadsMixin, APIView):
+    """Enrollments and revenue per course per day or week, read from the
+    daily rollups (see lms_core.analytics). Instructors see their own
+    courses, admins every course. Only courses and buckets with enrollments
+    in the range are listed."""
+    permission_classes = [permissions.IsAuthenticated, IsInstructorOrAdmin]
+
+    def get(self, request):
+        query = EnrollmentAnalyticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        courses = Course.objects.all()
+        if request.user.role != 'admin':
+            courses = courses.filter(instructor_id=request.user.id)
+        if 'course' in params:
+            courses = courses.filter(pk=params['course'])
+        by_course = analytics.series(courses, params['start'], params['end'], params['period'])
+        if 'course' in params and not by_course and not courses.exists():
+            raise Http404
+
+        titles = dict(Course.objects.filter(pk__in=by_course).values_list('pk', 'title')) if by_course else {}
+        totals = {}
+        results = []
+        for course_id, buckets in by_course.items():
+            for bucket in buckets:
+                total = totals.setdefault(bucket['date'], {'date': bucket['date'], 'enrollments': 0, 'revenue': 0})
+                total['enrollments'] += bucket['enrollments']
+                total['revenue'] += bucket['revenue']
+            results.append({
+                'course': course_id,
+                'title': titles.get(course_id),
+                'enrollments': sum(bucket['enrollments'] for bucket in buckets),
+                'revenue': analytics.money(sum(bucket['revenue'] for bucket in buckets)),
+                'series': [{**bucket, 'revenue': analytics.money(bucket['revenue'])} for bucket in buckets],
+            })
+        series = [totals[date] for date in sorted(totals)]
+        return Response({
+            'period': params['period'],
+            'start': params['start'],
+            'end': params['end'],
+            'courses': results,
+            'totals': {
+                'enrollments': sum(bucket['enrollments'] for bucket in series),
+                'revenue': analytics.money(sum(bucket['revenue'] for bucket in series)),
+                'series': [{**bucket, 'revenue': analytics.money(bucket['revenue'])} for bucket in series],
+            },
+        })
@@ -7,20 +7,10 @@ django.setup()
 
 from lms_core.models import Category, Course
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
-import requests
+from django.core.management import call_command
 
 User = get_user_model()
 
-def download_image(url):
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            return ContentFile(response.content)
-    except Exception as e:
-        print(f"Error downloading {url}: {e}")
-    return None
-
 def seed_data():
     # 1. Ensure Categories exist
     se_cat, _ = Category.objects.get_or_create(
@@ -52,48 +42,42 @@ def seed_data():
             "description": "Learn to build high-performance, SEO-friendly web applications using the latest features of Next.js 15 and React Server Components.",
             "duration": "24 Hours",
             "price": 89.99,
-            "category": se_cat,
-            "img": "https://images.unsplash.com/photo-1633356122544-f134324a6cee?auto=format&fit=crop&w=800&q=80"
+            "category": se_cat
         },
         {
             "title": "Natural Language Processing with Transformers",
             "description": "Master BERT, GPT, and modern transformer architectures to build conversational AI and text analysis tools.",
             "duration": "45 Hours",
             "price": 149.00,
-            "category": ai_cat,
-            "img": "https://images.unsplash.com/photo-1677442136019-21780ecad995?auto=format&fit=crop&w=800&q=80"
+            "category": ai_cat
         },
         {
             "title": "Ethical Hacking: Zero to Hero",
             "description": "Learn network penetration testing, web application security, and exploit development from a white-hat perspective.",
             "duration": "50 Hours",
             "price": 129.99,
-            "category": cyber_cat,
-            "img": "https://images.unsplash.com/photo-1550751827-4bd374c3f58b?auto=format&fit=crop&w=800&q=80"
+            "category": cyber_cat
         },
         {
             "title": "Python for Data Science & AI",
             "description": "A comprehensive journey from Python basics to advanced machine learning models using NumPy, Pandas, and Scikit-learn.",
             "duration": "32 Hours",
             "price": 120.00,
-            "category": se_cat,
-            "img": "https://images.unsplash.com/photo-1555949963-ff9fe0c870eb?auto=format&fit=crop&w=800&q=80"
+            "category": se_cat
         },
         {
             "title": "Mastering Go (Golang) Microservices",
             "description": "Deep dive into cloud-native development. Build scalable, concurrent systems with gRPC, Docker, and Kubernetes.",
             "duration": "18 Hours",
             "price": 75.00,
-            "category": se_cat,
-            "img": "https://images.unsplash.com/photo-1515879218367-8466d910aaa4?auto=format&fit=crop&w=800&q=80"
+            "category": se_cat
         },
         {
             "title": "Full Stack Django & React Blueprint",
             "description": "Bridge the gap between backend and frontend. Master REST APIs, JWT authentication, and state management in a real-world LMS project.",
             "duration": "40 Hours",
             "price": 99.00,
-            "category": se_cat,
-            "img": "https://images.unsplash.com/photo-1587620962725-abab7fe55159?auto=format&fit=crop&w=800&q=80"
+            "category": se_cat
         }
     ]
 
@@ -108,18 +92,14 @@ def seed_data():
                 'price': course_data['price']
             }
         )
-        
-        # Always refresh image for demo purposes
-        img_content = download_image(course_data['img'])
-        if img_content:
-            filename = f"{course_data['title'].lower().replace(' ', '_')}.jpg"
-            course.thumbnail.save(filename, img_content, save=True)
-            print(f"Updated image for: {course.title}")
 
         if created:
             print(f"Course created: {course.title}")
         else:
             print(f"Course updated: {course.title}")
 
+    # Thumbnails come from the sync_media manifest; unchanged images are skipped
+    call_command('sync_media')
+
 if __name__ == "__main__":
     seed_data()
@@ -0,0 +1,16 @@
+"""Native async GET for the profile; see lms_core/async_views.py."""
+from rest_framework.response import Response
+
+from .models import User
+from .serializers import UserSerializer
+from .views import UserProfileView
+
+
+async def profile(view):
+    user = await User.objects.aget(pk=view.request.user.id)
+    return Response(UserSerializer(user, context={'request': view.request}).data)
+
+
+READS = {
+    (UserProfileView, None): profile,
+}
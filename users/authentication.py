@@ -0,0 +1,154 @@
+"""JWT authentication without the per-request ``users_user`` lookup.
+
+simplejwt's ``JWTAuthentication`` loads the whole user row for every request,
+although most views only read ``request.user.id`` and ``role``.
+``StatelessJWTAuthentication`` answers those from the token and a small cached
+account state, and only loads the row when a view touches anything else.
+
+The account state, ``(is_active, role)``, is cached for
+``LMS_AUTH_STATE_TTL`` seconds and rewritten by the user signals. A
+deactivated, deleted or re-roled account therefore stops authenticating
+immediately when the change goes through the ORM on a worker sharing the
+cache, and within the TTL otherwise (e.g. after a queryset ``update()``).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from lms_core.db import retry_when_locked
+
+# Marks a user id that no longer exists
+MISSING = (False, None)
+
+
+def auth_cache():
+    return caches[getattr(settings, 'LMS_AUTH_CACHE', 'default')]
+
+
+def state_key(user_id):
+    return f'lms:auth:state:{user_id}'
+
+
+def state_ttl():
+    return getattr(settings, 'LMS_AUTH_STATE_TTL', 60)
+
+
+def remember_state(user):
+    fields = user.__dict__
+    if 'is_active' in fields and 'role' in fields:
+        auth_cache().set(state_key(user.pk), (user.is_active, user.role), state_ttl())
+    else:
+        # Deferred columns: let the next request read them from the database.
+        auth_cache().delete(state_key(user.pk))
+
+
+def forget_state(user_id):
+    auth_cache().set(state_key(user_id), MISSING, state_ttl())
+
+
+def account_state(user_id):
+    """``(is_active, role)`` for ``user_id``, from the cache when possible."""
+    cache = auth_cache()
+    state = cache.get(state_key(user_id))
+    if state is None:
+        users = get_user_model()._default_manager.filter(pk=user_id)
+        row = retry_when_locked(lambda: users.values_list('is_active', 'role').first())
+        state = tuple(row) if row else MISSING
+        cache.set(state_key(user_id), state, state_ttl())
+    return state
+
+
+async def aaccount_state(user_id):
+    """``account_state`` for async views."""
+    cache = auth_cache()
+    state = await cache.aget(state_key(user_id))
+    if state is None:
+        row = await get_user_model()._default_manager.filter(pk=user_id).values_list('is_active', 'role').afirst()
+        state = tuple(row) if row else MISSING
+        await cache.aset(state_key(user_id), state, state_ttl())
+    return state
+
+
+def _token_attribute(name):
+    def get(self):
+        value = self.__dict__['_claims'].get(name)
+        if self._wrapped is empty and value is not None:
+            return value
+        if self._wrapped is empty:
+            self._setup()
+        return getattr(self._wrapped, name)
+    return property(get)
+
+
+class LazyTokenUser(SimpleLazyObject):
+    """``request.user`` for a verified access token.
+
+    ``id``, ``pk``, ``role`` and ``username`` come from the token (and the
+    checked account state); any other attribute, ``isinstance()`` or equality
+    check loads the real ``User`` once and delegates to it.
+    """
+    is_anonymous = False
+    is_authenticated = True
+
+    id = _token_attribute('id')
+    pk = _token_attribute('pk')
+    role = _token_attribute('role')
+    username = _token_attribute('username')
+
+    def __init__(self, user_id, role, username=None):
+        self.__dict__['_claims'] = {'id': user_id, 'pk': user_id, 'role': role, 'username': username}
+        super().__init__(lambda: get_user_model()._default_manager.get(pk=user_id))
+
+    def __bool__(self):
+        # DRF's IsAuthenticated truth-tests request.user; don't load for that.
+        return True
+
+    def __repr__(self):
+        if self._wrapped is empty:
+            return f'<LazyTokenUser: {self.__dict__["_claims"]["id"]}>'
+        return super().__repr__()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        return self.user_for_state(validated_token, user_id, account_state(user_id))
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for async views; reads the account state through the
+        async cache and ORM APIs."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user_id = self.get_user_id(validated_token)
+        user = self.user_for_state(validated_token, user_id, await aaccount_state(user_id))
+        return user, validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        return get_user_model()._meta.pk.to_python(user_id)
+
+    def user_for_state(self, validated_token, user_id, state):
+        is_active, role = state
+        if (is_active, role) == MISSING:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        # The frontend reads the role from the token, so a changed role means
+        # the client must sign in again rather than keep acting on the old one.
+        claimed = validated_token.get('role')
+        if claimed is not None and claimed != role:
+            raise AuthenticationFailed(_('User role has changed'), code='role_changed')
+        return LazyTokenUser(user_id, role, validated_token.get('username'))
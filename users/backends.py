@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Case, IntegerField, Q, Value, When
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """Log in with either the username or the email address.
+
+    One indexed lookup and one password hash per attempt, including failed
+    ones: an unknown login still hashes once so it takes as long as a wrong
+    password. An exact username match wins over another account's email.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        user = (
+            UserModel._default_manager
+            .filter(Q(username=username) | Q(email=username))
+            .order_by(
+                Case(When(username=username, then=Value(0)), default=Value(1), output_field=IntegerField()),
+                'pk',
+            )
+            .first()
+        )
+        if user is None:
+            # Hash anyway so unknown logins cost as much as wrong passwords.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,78 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import EmailOutbox
+from users.outbox import MailWorker, queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued email from the EmailOutbox in batches over one reused mail connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to sleep when nothing is due.')
+        parser.add_argument('--max-attempts', type=int, default=5,
+                            help='Sends before a message is marked failed.')
+        parser.add_argument('--backoff', type=float, default=30.0,
+                            help='Base retry delay in seconds; doubles with every failed attempt.')
+        parser.add_argument('--backoff-cap', type=float, default=3600.0)
+        parser.add_argument('--lease', type=float, default=300.0,
+                            help='Seconds a claimed batch is hidden from other workers.')
+        parser.add_argument('--purge-after', type=float, default=7.0,
+                            help='Delete sent messages older than this many days when idle (0 keeps them).')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once nothing is due instead of polling.')
+
+    def handle(self, *args, **options):
+        worker = MailWorker(
+            batch_size=options['batch_size'],
+            max_attempts=options['max_attempts'],
+            backoff=options['backoff'],
+            backoff_cap=options['backoff_cap'],
+            lease=options['lease'],
+        )
+        started = time.perf_counter()
+        try:
+            while True:
+                result = worker.run_once()
+                if result.sent or result.retried or result.failed:
+                    self.report_batch(result)
+                    continue
+                self.purge(options['purge_after'])
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            worker.close()
+
+        elapsed = time.perf_counter() - started
+        totals = worker.totals
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['sent']} sent, {totals['retried']} retried, {totals['failed']} failed "
+            f"in {totals['batches']} batch(es), {elapsed:.1f}s ({totals['sent'] / elapsed if elapsed else 0:.1f} msg/s)"
+        ))
+
+    def report_batch(self, result):
+        queue = queue_stats()
+        latency = f', p50 queue latency {statistics.median(result.latencies):.2f}s' if result.latencies else ''
+        self.stdout.write(
+            f'batch: {result.sent} sent, {result.retried} retried, {result.failed} failed '
+            f'in {result.seconds * 1000:.0f}ms{latency}; '
+            f"queue {queue['pending']} pending ({queue['due']} due, oldest {queue['oldest_age']:.0f}s)"
+        )
+        self.stdout.flush()
+
+    def purge(self, days):
+        if days <= 0:
+            return
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = EmailOutbox.objects.filter(status=EmailOutbox.SENT, sent_at__lt=cutoff).delete()
+        if deleted:
+            self.stdout.write(f'Purged {deleted} sent message(s) older than {days:g} day(s).')
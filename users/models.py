@@ -1,7 +1,15 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
 from django.db import models
+from django.utils import timezone
 
-class User(AbstractUser):
+from lms_core.deletes import CountedDeleteModel, CountedDeleteQuerySet
+
+
+class UserManager(BaseUserManager.from_queryset(CountedDeleteQuerySet)):
+    pass
+
+
+class User(CountedDeleteModel, AbstractUser):
     ROLE_CHOICES = (
         ('admin', 'Admin'),
         ('instructor', 'Instructor'),
@@ -9,6 +17,54 @@ class User(AbstractUser):
     )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='student')
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    # Derivatives written by lms_core.images
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    objects = UserManager()
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['date_joined', 'id'], name='user_joined_id_idx'),
+            # Email logins, see users.backends
+            models.Index(fields=['email'], name='user_email_idx'),
+            # Covers the per-role counts in DashboardStats.compute
+            models.Index(fields=['role'], name='user_role_idx'),
+        ]
 
     def __str__(self):
         return f"{self.username} ({self.role})"
+
+
+class EmailOutbox(models.Model):
+    """Mail queued by request handlers and delivered by ``manage.py run_mail_worker``."""
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Set while a worker holds the row; expires with next_attempt_at.
+    claim = models.CharField(max_length=32, blank=True, default='')
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker polls for due pending rows
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
@@ -0,0 +1,140 @@
+"""Queued email.
+
+Request handlers call ``enqueue()``, which is a single INSERT into
+``EmailOutbox``, and return immediately. ``manage.py run_mail_worker`` runs
+a ``MailWorker``. It claims due rows in batches and sends them over one
+backend connection that stays open between batches. Failed sends are retried
+with exponential backoff until ``max_attempts`` is reached.
+"""
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+
+def enqueue(subject, body, from_email, to):
+    return EmailOutbox.objects.create(subject=subject, body=body, from_email=from_email, to=list(to))
+
+
+def backoff_delay(attempts, base, cap):
+    """Seconds to wait after the ``attempts``-th failure: exponential, capped,
+    with jitter so a burst of failures does not retry in lockstep."""
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def claim_batch(size, lease):
+    """Lease up to ``size`` due rows to this caller for ``lease`` seconds.
+
+    The conditional UPDATE makes the claim safe between concurrent workers. A
+    worker that dies leaves its rows to be picked up again once the lease
+    runs out.
+    """
+    now = timezone.now()
+    due = EmailOutbox.objects.filter(status=EmailOutbox.PENDING, next_attempt_at__lte=now)
+    ids = list(due.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    due.filter(pk__in=ids).update(claim=token, next_attempt_at=now + timedelta(seconds=lease))
+    return list(EmailOutbox.objects.filter(pk__in=ids, claim=token).order_by('next_attempt_at', 'id'))
+
+
+def queue_stats():
+    now = timezone.now()
+    stats = EmailOutbox.objects.filter(status=EmailOutbox.PENDING).aggregate(
+        pending=Count('id'),
+        due=Count('id', filter=Q(next_attempt_at__lte=now)),
+        oldest=Min('created_at'),
+    )
+    stats['oldest_age'] = (now - stats.pop('oldest')).total_seconds() if stats['oldest'] else 0.0
+    return stats
+
+
+@dataclass
+class BatchResult:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    # Enqueue-to-delivery time of each sent message
+    latencies: list = field(default_factory=list)
+
+
+class MailWorker:
+    def __init__(self, batch_size=50, max_attempts=5, backoff=30.0, backoff_cap=3600.0, lease=300.0, connection=None):
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_cap = backoff_cap
+        self.lease = lease
+        self.connection = connection or get_connection(fail_silently=False)
+        self.totals = {'batches': 0, 'sent': 0, 'retried': 0, 'failed': 0}
+
+    def close(self):
+        self.connection.close()
+
+    def run_once(self):
+        """Claim and deliver one batch; returns a ``BatchResult`` (empty when idle)."""
+        batch = claim_batch(self.batch_size, self.lease)
+        if not batch:
+            return BatchResult()
+        result = self.deliver(batch)
+        self.totals['batches'] += 1
+        for name in ('sent', 'retried', 'failed'):
+            self.totals[name] += getattr(result, name)
+        return result
+
+    def deliver(self, batch):
+        started = time.perf_counter()
+        result = BatchResult()
+        try:
+            # Reuses the connection when it is still open from the previous batch.
+            self.connection.open()
+        except Exception as exc:
+            for row in batch:
+                self.reschedule(row, exc, result)
+            result.seconds = time.perf_counter() - started
+            return result
+
+        sent = []
+        for row in batch:
+            message = EmailMessage(row.subject, row.body, row.from_email, row.to, connection=self.connection)
+            try:
+                message.send()
+            except Exception as exc:
+                self.reschedule(row, exc, result)
+                # The connection may be broken; the next send reopens it.
+                self.connection.close()
+            else:
+                sent.append(row)
+
+        now = timezone.now()
+        if sent:
+            EmailOutbox.objects.filter(pk__in=[row.pk for row in sent]).update(
+                status=EmailOutbox.SENT, sent_at=now, claim='', last_error='', attempts=F('attempts') + 1,
+            )
+        result.sent = len(sent)
+        result.latencies = [(now - row.created_at).total_seconds() for row in sent]
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def reschedule(self, row, exc, result):
+        row.attempts += 1
+        row.claim = ''
+        row.last_error = f'{type(exc).__name__}: {exc}'
+        if row.attempts >= self.max_attempts:
+            row.status = EmailOutbox.FAILED
+            result.failed += 1
+        else:
+            delay = backoff_delay(row.attempts, self.backoff, self.backoff_cap)
+            row.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            result.retried += 1
+        row.save(update_fields=['attempts', 'claim', 'last_error', 'status', 'next_attempt_at'])
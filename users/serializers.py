@@ -1,12 +1,14 @@
 from rest_framework import serializers
+from lms_core.images import ImageVariantsField
 from .models import User
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False)
+    avatar_variants = ImageVariantsField()
 
     class Meta:
         model = User
-        fields = ('id', 'username', 'email', 'password', 'role', 'avatar', 'first_name', 'last_name')
+        fields = ('id', 'username', 'email', 'password', 'role', 'avatar', 'avatar_variants', 'first_name', 'last_name')
 
     def create(self, validated_data):
         user = User.objects.create_user(
@@ -34,9 +36,10 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from django.db.models import Q
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    # "username" may also be an email address; users.backends resolves it
+    # with a single lookup and password check.
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
@@ -45,23 +48,6 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['username'] = user.username
         return token
 
-    def validate(self, attrs):
-        # Allow login with either username or email
-        username_or_email = attrs.get('username')
-        password = attrs.get('password')
-
-        if username_or_email and password:
-            user = User.objects.filter(
-                Q(username=username_or_email) | Q(email=username_or_email)
-            ).first()
-
-            if user:
-                # If user found by email, use their actual username for authentication
-                if user.check_password(password):
-                    attrs['username'] = user.username
-                
-        return super().validate(attrs)
-
 class PasswordResetSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_state, remember_state
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def refresh_auth_state(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not {'is_active', 'role'} & set(update_fields):
+        return
+    remember_state(instance)
+
+
+@receiver(post_delete, sender=User)
+def drop_auth_state(sender, instance, **kwargs):
+    forget_state(instance.pk)
@@ -1,3 +1,378 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.db import connection
+from django.test.client import RequestFactory
+from django.utils import timezone
+from django.contrib.auth.hashers import MD5PasswordHasher
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework.request import Request
+from rest_framework_simplejwt.tokens import AccessToken
+
+from lms_core.models import Course
+
+from .authentication import LazyTokenUser, StatelessJWTAuthentication, auth_cache, remember_state, state_key
+from .models import EmailOutbox, User
+from .outbox import MailWorker, backoff_delay, claim_batch, enqueue
+from .serializers import CustomTokenObtainPairSerializer
+from .views import UserProfileView
+
+QUERY_BUDGET_SIZES = [
+    int(n) for n in os.environ.get('QUERY_BUDGET_SIZES', '10,1000,10000').split(',')
+]
+
+
+class CountingHasher(MD5PasswordHasher):
+    """MD5 hasher that counts how many hashes are computed."""
+    algorithm = 'counting_md5'
+    calls = 0
+
+    def encode(self, password, salt):
+        CountingHasher.calls += 1
+        return super().encode(password, salt)
+
+
+def auth_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+class QueryBudgetTests(TestCase):
+    """Budgets assume a warm JWT account state (see users.authentication)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('budget_admin', password='pass', role='admin')
+        cls.seeded = 0
+
+    def seed(self, n):
+        start, self.seeded = self.seeded, n
+        User.objects.bulk_create(
+            [User(username=f'seed_user_{i}', password='!', role='student') for i in range(start, n)],
+            batch_size=1000,
+        )
+
+    def assert_budget(self, budget, url):
+        client = auth_client(self.admin)
+        remember_state(self.admin)
+        counts = {}
+        for n in QUERY_BUDGET_SIZES:
+            self.seed(n)
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts[n] = len(ctx.captured_queries)
+        self.assertEqual(set(counts.values()), {budget}, f'query counts by row count: {counts}')
+
+    def test_profile(self):
+        self.assert_budget(1, '/api/auth/profile/')
+
+    def test_user_list(self):
+        self.assert_budget(1, '/api/auth/users/')
+
+
+class UserListPaginationTests(TestCase):
+    def test_pages_follow_date_joined(self):
+        admin = User.objects.create_user('pager_admin', password='pass', role='admin')
+        User.objects.bulk_create([User(username=f'paged_{i}', password='!') for i in range(12)])
+        client = auth_client(admin)
+        ids, url = [], '/api/auth/users/?page_size=5'
+        while url:
+            body = client.get(url).json()
+            ids += [row['id'] for row in body['results']]
+            url = body['next']
+        self.assertEqual(ids, list(User.objects.order_by('-date_joined', '-id').values_list('id', flat=True)))
+
+    def test_legacy_request_returns_plain_list(self):
+        admin = User.objects.create_user('pager_admin', password='pass', role='admin')
+        self.assertIsInstance(auth_client(admin).get('/api/auth/users/').json(), list)
+
+
+class StatelessJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user('jwt_instructor', email='jwt@example.com', password='pass', role='instructor')
+
+    def login_client(self, user):
+        """A client holding a token with the role/username claims the login view issues."""
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def authenticate(self, user):
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return StatelessJWTAuthentication().authenticate(Request(request))[0]
+
+    def test_claims_are_served_without_queries(self):
+        remember_state(self.instructor)
+        with self.assertNumQueries(0):
+            user = self.authenticate(self.instructor)
+            self.assertTrue(user and user.is_authenticated)
+            self.assertEqual((user.id, user.pk, user.role, user.username),
+                             (self.instructor.id, self.instructor.id, 'instructor', 'jwt_instructor'))
+
+    def test_full_user_loads_once_on_demand(self):
+        remember_state(self.instructor)
+        user = self.authenticate(self.instructor)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'jwt@example.com')
+            self.assertIsInstance(user, User)
+            self.assertEqual(user, self.instructor)
+
+    def test_cold_state_costs_one_query(self):
+        auth_cache().delete(state_key(self.instructor.pk))
+        with self.assertNumQueries(1):
+            self.authenticate(self.instructor)
+        with self.assertNumQueries(0):
+            self.authenticate(self.instructor)
+
+    def test_token_without_custom_claims_uses_account_state(self):
+        remember_state(self.instructor)
+        token = AccessToken.for_user(self.instructor)
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        user = StatelessJWTAuthentication().authenticate(Request(request))[0]
+        with self.assertNumQueries(0):
+            self.assertEqual(user.role, 'instructor')
+        self.assertEqual(user.username, 'jwt_instructor')
+
+    def test_deactivation_revokes_immediately(self):
+        client = self.login_client(self.instructor)
+        self.assertEqual(client.get('/api/auth/profile/').status_code, 200)
+        self.instructor.is_active = False
+        self.instructor.save(update_fields=['is_active'])
+        self.assertEqual(client.get('/api/auth/profile/').status_code, 401)
+
+    def test_role_change_revokes_immediately(self):
+        client = self.login_client(self.instructor)
+        self.instructor.role = 'student'
+        self.instructor.save()
+        response = client.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'role_changed')
+
+    def test_deleted_user_is_rejected(self):
+        client = self.login_client(self.instructor)
+        self.instructor.delete()
+        self.assertEqual(client.get('/api/lms/enrollments/').status_code, 401)
+
+    def test_bulk_update_is_picked_up_when_state_expires(self):
+        client = self.login_client(self.instructor)
+        self.assertEqual(client.get('/api/lms/enrollments/').status_code, 200)
+        User.objects.filter(pk=self.instructor.pk).update(is_active=False)
+        auth_cache().delete(state_key(self.instructor.pk))  # TTL elapsed
+        self.assertEqual(client.get('/api/lms/enrollments/').status_code, 401)
+
+    def test_writes_receive_a_real_user(self):
+        client = self.login_client(self.instructor)
+        response = client.post('/api/lms/courses/', {
+            'title': 'Lazy users', 'description': 'x', 'duration': '1 Hour', 'price': '0',
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Course.objects.get(pk=response.json()['id']).instructor, self.instructor)
+        self.assertEqual(response.json()['instructor_name'], 'jwt_instructor')
+
+    def test_repr_does_not_load(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(repr(LazyTokenUser(7, 'student')), '<LazyTokenUser: 7>')
+
+
+@override_settings(ROOT_URLCONF='backend.urls_asgi')
+class AsyncProfileTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user('async_student', email='a@example.com', password='pass',
+                                               first_name='Ada')
+
+    def headers(self):
+        token = CustomTokenObtainPairSerializer.get_token(self.student).access_token
+        return {'Authorization': f'Bearer {token}'}
+
+    async def test_profile_is_read_natively_and_matches_sync(self):
+        with mock.patch.object(UserProfileView, 'get', side_effect=AssertionError('sync profile called')):
+            response = await self.async_client.get('/api/auth/profile/', headers=self.headers())
+        with override_settings(ROOT_URLCONF='backend.urls'):
+            expected = await sync_to_async(self.client.get)('/api/auth/profile/', headers=self.headers())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+
+    async def test_revoked_and_anonymous_requests_get_sync_errors(self):
+        self.assertEqual((await self.async_client.get('/api/auth/profile/')).status_code, 401)
+        await User.objects.filter(pk=self.student.pk).aupdate(role='admin')
+        await auth_cache().adelete(state_key(self.student.pk))
+        response = await self.async_client.get('/api/auth/profile/', headers=self.headers())
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'role_changed')
+
+    async def test_profile_update_goes_to_sync_view(self):
+        response = await self.async_client.put(
+            '/api/auth/profile/', {'first_name': 'Grace'}, content_type='application/json', headers=self.headers(),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['first_name'], 'Grace')
+
+
+@override_settings(PASSWORD_HASHERS=['users.tests.CountingHasher'])
+class LoginTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('login_user', email='login@example.com', password='s3cret-pass')
+
+    def login(self, username, password='s3cret-pass'):
+        CountingHasher.calls = 0
+        with CaptureQueriesContext(connection) as ctx:
+            response = APIClient().post('/api/auth/login/', {'username': username, 'password': password})
+        return response, len(ctx.captured_queries), CountingHasher.calls
+
+    def test_username_login_hashes_once(self):
+        response, queries, hashes = self.login('login_user')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+        self.assertEqual((queries, hashes), (1, 1))
+
+    def test_email_login_hashes_once(self):
+        response, queries, hashes = self.login('login@example.com')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.json()['access'])['username'], 'login_user')
+        self.assertEqual((queries, hashes), (1, 1))
+
+    def test_wrong_password_and_unknown_user_cost_the_same(self):
+        wrong, _, wrong_hashes = self.login('login_user', 'nope')
+        unknown, _, unknown_hashes = self.login('nobody@example.com')
+        self.assertEqual((wrong.status_code, unknown.status_code), (401, 401))
+        self.assertEqual((wrong_hashes, unknown_hashes), (1, 1))
+
+    def test_username_wins_over_another_accounts_email(self):
+        User.objects.create_user('login@example.com', password='other-pass')
+        self.assertEqual(self.login('login@example.com', 'other-pass')[0].status_code, 200)
+        self.assertEqual(self.login('login@example.com')[0].status_code, 401)
+
+    def test_inactive_user_cannot_log_in(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.login('login_user')[0].status_code, 401)
+
+
+class FlakyBackend(LocmemEmailBackend):
+    """locmem backend with SMTP-like open/close that counts connections and
+    fails the first ``failures`` sends."""
+    opened = 0
+    failures = 0
+    is_open = False
+
+    def open(self):
+        if self.is_open:
+            return False
+        self.is_open = True
+        FlakyBackend.opened += 1
+        return True
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        if FlakyBackend.failures:
+            FlakyBackend.failures -= 1
+            raise ConnectionError('smtp unavailable')
+        return super().send_messages(messages)
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        FlakyBackend.opened = FlakyBackend.failures = 0
+
+    def test_reset_request_only_queues(self):
+        User.objects.create_user('forgetful', email='forgetful@example.com', password='pass')
+        with self.assertNumQueries(2):
+            response = APIClient().post('/api/auth/password-reset/', {'email': 'forgetful@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        queued = EmailOutbox.objects.get()
+        self.assertEqual((queued.to, queued.status), (['forgetful@example.com'], EmailOutbox.PENDING))
+        self.assertIn('/reset-password/', queued.body)
+
+    def test_unknown_email_queues_nothing(self):
+        response = APIClient().post('/api/auth/password-reset/', {'email': 'nobody@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_worker_drains_in_batches(self):
+        for i in range(5):
+            enqueue(f'Message {i}', 'body', 'noreply@codestation.io', [f'user{i}@example.com'])
+        out = StringIO()
+        call_command('run_mail_worker', '--once', '--batch-size', '2', stdout=out)
+        self.assertEqual(sorted(message.subject for message in mail.outbox), [f'Message {i}' for i in range(5)])
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.SENT, attempts=1).count(), 5)
+        self.assertIn('5 sent, 0 retried, 0 failed in 3 batch(es)', out.getvalue())
+
+    @override_settings(EMAIL_BACKEND='users.tests.FlakyBackend')
+    def test_one_connection_is_reused_across_batches(self):
+        for i in range(6):
+            enqueue(f'Message {i}', 'body', 'noreply@codestation.io', ['a@example.com'])
+        worker = MailWorker(batch_size=2)
+        while worker.run_once().sent:
+            pass
+        self.assertEqual((worker.totals['sent'], FlakyBackend.opened), (6, 1))
+
+    @override_settings(EMAIL_BACKEND='users.tests.FlakyBackend')
+    def test_failures_back_off_then_give_up(self):
+        message = enqueue('Hello', 'body', 'noreply@codestation.io', ['a@example.com'])
+        FlakyBackend.failures = 10
+        worker = MailWorker(max_attempts=2, backoff=60)
+
+        before = timezone.now()
+        self.assertEqual(worker.run_once().retried, 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts, message.claim), (EmailOutbox.PENDING, 1, ''))
+        self.assertIn('smtp unavailable', message.last_error)
+        self.assertGreaterEqual(message.next_attempt_at, before + timedelta(seconds=30))
+        self.assertEqual(worker.run_once().retried, 0)  # not due yet
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(worker.run_once().failed, 1)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (EmailOutbox.FAILED, 2))
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(EMAIL_BACKEND='users.tests.FlakyBackend')
+    def test_retry_succeeds_after_a_transient_failure(self):
+        enqueue('Hello', 'body', 'noreply@codestation.io', ['a@example.com'])
+        FlakyBackend.failures = 1
+        worker = MailWorker(backoff=0)
+        self.assertEqual(worker.run_once().retried, 1)
+        self.assertEqual(worker.run_once().sent, 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_claimed_rows_are_hidden_from_other_workers(self):
+        enqueue('Hello', 'body', 'noreply@codestation.io', ['a@example.com'])
+        self.assertEqual(len(claim_batch(10, lease=60)), 1)
+        self.assertEqual(claim_batch(10, lease=60), [])
+
+    def test_backoff_grows_and_is_capped(self):
+        self.assertTrue(15 <= backoff_delay(1, 30, 3600) <= 30)
+        self.assertTrue(60 <= backoff_delay(3, 30, 3600) <= 120)
+        self.assertTrue(1800 <= backoff_delay(20, 30, 3600) <= 3600)
+
+    def test_file_backend_receives_the_reset_mail(self):
+        User.objects.create_user('forgetful', email='forgetful@example.com', password='pass')
+        APIClient().post('/api/auth/password-reset/', {'email': 'forgetful@example.com'})
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend', EMAIL_FILE_PATH=tmp,
+        ):
+            call_command('run_mail_worker', '--once', stdout=StringIO())
+            files = os.listdir(tmp)
+            self.assertEqual(len(files), 1)
+            with open(os.path.join(tmp, files[0]), encoding='utf-8') as handle:
+                self.assertIn('forgetful@example.com', handle.read())
@@ -4,12 +4,19 @@ from rest_framework.views import APIView
 from .serializers import UserSerializer, PasswordResetSerializer, SetNewPasswordSerializer, CustomTokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 from .models import User
+from .outbox import enqueue
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.encoding import smart_str, force_str, smart_bytes, DjangoUnicodeDecodeError
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
-from django.core.mail import send_mail
 from django.conf import settings
 
+# Query budgets are fixed regardless of row count (JWT requests authenticate
+# from the cached account state, see users.authentication) and are enforced by
+# QueryBudgetTests in users/tests.py. The profile loads the full user row.
+#   profile ....................... 1
+#   user list ..................... 1
+#   password reset request ........ 2 (lookup + outbox insert)
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
@@ -44,8 +51,8 @@ class RequestPasswordResetView(generics.GenericAPIView):
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
             email = request.data['email']
-            if User.objects.filter(email=email).exists():
-                user = User.objects.get(email=email)
+            user = User.objects.filter(email=email).order_by('pk').first()
+            if user:
                 uidb64 = urlsafe_base64_encode(smart_bytes(user.id))
                 token = PasswordResetTokenGenerator().make_token(user)
                 
@@ -53,13 +60,13 @@ class RequestPasswordResetView(generics.GenericAPIView):
                 # For this local setup, assuming Frontend runs on 5173
                 reset_link = f"http://localhost:5173/reset-password/{uidb64}/{token}"
                 
-                # Send Email (Prints to console due to EMAIL_BACKEND setting)
-                send_mail(
+                # Queued for `manage.py run_mail_worker` so a slow mail backend
+                # never holds up the request.
+                enqueue(
                     'Password Reset Request',
                     f'Click the link to reset your password: {reset_link}',
                     'noreply@codestation.io', # From email
                     [email],
-                    fail_silently=False,
                 )
             
             # Always return success to prevent email enumeration
@@ -96,6 +103,7 @@ class UserListView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminRole]
+    ordering = ('-date_joined', '-id')
 
 class UserDeleteView(generics.DestroyAPIView):
     queryset = User.objects.all()